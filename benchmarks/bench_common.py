@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基准测试公共工具
+
+所有基准测试都在独立的测试库（默认 <配置中的库名>_bench）中进行，不会读写正式数据。
+连接参数取自 ~/.gametrad/db_config.json，可用 --database 指定测试库名。
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import MySQLdb
+from src.core.db_manager import DatabaseManager
+
+
+class BenchDatabaseManager(DatabaseManager):
+    """连接到测试库的DatabaseManager，不读写正式库"""
+
+    def __init__(self, config):
+        self.config = config
+        self._create_tables_mysql()
+
+
+def make_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--database', help='测试库名，默认为 <配置库名>_bench')
+    parser.add_argument('--repeat', type=int, default=5, help='每项测试重复次数，取中位数')
+    return parser
+
+
+def connect_bench_db(args, **config_overrides):
+    """创建（如不存在）测试库并返回连接到该库的DatabaseManager
+
+    config_overrides可覆盖连接配置，例如pool_size。
+    """
+    config = dict(DatabaseManager.load_db_config(DatabaseManager.__new__(DatabaseManager)))
+    bench_db = args.database or f"{config['db']}_bench"
+    server = MySQLdb.connect(
+        host=config['host'], port=int(config['port']), user=config['user'],
+        passwd=config['passwd'], charset=config['charset'],
+        connect_timeout=int(config['connect_timeout'])
+    )
+    try:
+        cursor = server.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{bench_db}` DEFAULT CHARACTER SET utf8mb4")
+        cursor.close()
+    finally:
+        server.close()
+    config['db'] = bench_db
+    config.update(config_overrides)
+    print(f"使用测试库: {config['host']}:{config['port']}/{bench_db}")
+    return BenchDatabaseManager(config)
+
+
+def timed(func, repeat=5):
+    """重复执行func，返回耗时中位数（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def item_names(count=2000):
+    return [f"测试物品{i:04d}" for i in range(count)]
+
+
+def random_time(rng, days=365):
+    return datetime.now() - timedelta(seconds=rng.randint(0, days * 86400))
+
+
+def bulk_insert(db_manager, query, rows, batch_size=5000):
+    """按批次executemany插入，每批一个事务"""
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(query, rows[start:start + batch_size])
+            conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    line = "  ".join(str(h).ljust(w) for h, w in zip(headers, widths))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def make_rng(seed=20250101):
+    return random.Random(seed)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+库存重算基准测试
+
+在测试库中生成不同规模的入库/出库记录（默认1万/10万/100万笔），对比旧的逐物品计算
+（清空库存表后每个物品一条INSERT并提交）与按列计算 + 单事务批量upsert 的 calculate_inventory。
+
+用法:
+    python benchmarks/bench_inventory_calculator.py --sizes 10000 100000 1000000
+"""
+from bench_common import (
+    make_parser, connect_bench_db, timed, item_names, random_time,
+    bulk_insert, print_table, make_rng
+)
+from src.core.inventory_calculator import calculate_inventory
+
+
+def legacy_calculate_inventory(db_manager):
+    """旧版calculate_inventory：TRUNCATE后逐物品计算，每个物品单独INSERT并提交"""
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("TRUNCATE TABLE inventory")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    trade_sums = db_manager.get_item_trade_sums()
+    db_manager.verify_item_summary(repair=True, actual=trade_sums)
+    result = {}
+    for item_name, sums in trade_sums.items():
+        in_qty, in_amount, out_qty, out_amount = sums['in_qty'], sums['in_amount'], sums['out_qty'], sums['out_total']
+        remain_qty = in_qty - out_qty
+        avg_price = in_amount / in_qty if in_qty > 0 else 0
+        out_avg = out_amount / out_qty if out_qty > 0 else 0
+        profit = (out_avg - avg_price) * out_qty if out_qty > 0 else 0
+        profit_rate = ((out_avg - avg_price) / avg_price * 100) if avg_price > 0 and out_qty > 0 else 0
+        inventory_value = remain_qty * avg_price if remain_qty > 0 else 0
+        selling_price = out_avg if out_avg > 0 else avg_price
+        result[item_name] = (remain_qty, avg_price, selling_price, profit, profit_rate, inventory_value)
+        conn = db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO inventory (
+                    item_name, quantity, avg_price, break_even_price,
+                    selling_price, profit, profit_rate, total_profit, inventory_value
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (item_name, remain_qty, avg_price, avg_price, selling_price, profit, profit_rate, profit, inventory_value))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+    return result
+
+
+def populate(db_manager, trades, rng):
+    names = item_names()
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        for table in ('stock_in', 'stock_out', 'item_trade_summary', 'inventory'):
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    half = trades // 2
+    print(f"生成 {trades} 笔交易（入库 {half}，出库 {trades - half}）...")
+    bulk_insert(db_manager,
+                "INSERT INTO stock_in (item_name, transaction_time, quantity, cost, avg_cost, note) VALUES (%s, %s, %s, %s, %s, %s)",
+                [(rng.choice(names), random_time(rng), q, q * 100, 100, '') for q in (rng.randint(1, 50) for _ in range(half))])
+    bulk_insert(db_manager,
+                "INSERT INTO stock_out (item_name, transaction_time, quantity, unit_price, fee, deposit, total_amount, note) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                [(rng.choice(names), random_time(rng), q, 120, 5, 0, q * 120 - 5, '') for q in (rng.randint(1, 40) for _ in range(trades - half))])
+
+
+def results_match(legacy, current, tolerance=0.01):
+    if legacy.keys() != current.keys():
+        return False
+    for name, values in legacy.items():
+        row = current[name]
+        expected = (row['quantity'], row['avg_price'], row['selling_price'],
+                    row['profit'], row['profit_rate'], row['inventory_value'])
+        if any(abs(a - b) > tolerance for a, b in zip(values, expected)):
+            return False
+    return True
+
+
+def main():
+    parser = make_parser("库存重算基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='交易笔数')
+    args = parser.parse_args()
+
+    db_manager = connect_bench_db(args)
+    rows = []
+    for trades in args.sizes:
+        populate(db_manager, trades, make_rng())
+        legacy = timed(lambda: legacy_calculate_inventory(db_manager), args.repeat)
+        current = timed(lambda: calculate_inventory(db_manager=db_manager, update_db=True, silent=True), args.repeat)
+        match = results_match(legacy_calculate_inventory(db_manager),
+                              calculate_inventory(db_manager=db_manager, update_db=True, silent=True))
+        rows.append((trades, f"{legacy:.1f}", f"{current:.1f}",
+                     f"{legacy / current:.1f}x" if current else "-", "是" if match else "否"))
+
+    print()
+    print_table(["交易笔数", "逐物品写入(ms)", "按列+批量upsert(ms)", "加速比", "结果一致"], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+操作日志关键词搜索基准测试
+
+在测试库的operation_logs中生成合成日志（默认100万行），分别测量
+只用 LIKE '%关键词%' 与 全文索引(ngram) + LIKE 两种方式的首页查询和计数耗时。
+
+用法:
+    python benchmarks/bench_log_search.py --rows 1000000
+"""
+import json
+
+from bench_common import (
+    make_parser, connect_bench_db, timed, item_names, random_time,
+    bulk_insert, print_table, make_rng
+)
+from src.core.schema_migrations import OPERATION_LOG_FULLTEXT_INDEX, add_operation_log_fulltext
+
+OP_TYPES = [('添加', '添加类', '入库管理'), ('添加', '添加类', '出库管理'),
+            ('修改', '修改类', '交易监控'), ('删除', '删除类', '入库管理')]
+
+
+def populate(db_manager, rows, rng):
+    names = item_names()
+    db_manager.execute_query("TRUNCATE TABLE operation_logs")
+    data = []
+    for _ in range(rows):
+        op_type, category, tab = rng.choice(OP_TYPES)
+        payload = {
+            'item_name': rng.choice(names),
+            'quantity': rng.randint(1, 500),
+            'unit_price': rng.randint(10, 5000),
+            'note': rng.choice(['', '批量导入', '手动录入', 'OCR识别'])
+        }
+        data.append((op_type, category, tab, random_time(rng),
+                     json.dumps(payload, ensure_ascii=False), 0, 1))
+    print(f"生成 operation_logs {rows} 行...")
+    bulk_insert(db_manager,
+                "INSERT INTO operation_logs (operation_type, operation_category, tab_name, operation_time, operation_data, reverted, can_revert) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                data)
+
+
+def set_fulltext(db_manager, enabled):
+    exists = db_manager.fetch_one(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_logs' AND INDEX_NAME = %s",
+        (OPERATION_LOG_FULLTEXT_INDEX,)
+    )[0]
+    if enabled and not exists:
+        print("创建全文索引...")
+        conn = db_manager.get_connection()
+        try:
+            cursor = conn.cursor()
+            add_operation_log_fulltext(cursor)
+            cursor.close()
+        finally:
+            conn.close()
+    elif not enabled and exists:
+        db_manager.execute_query(f"ALTER TABLE operation_logs DROP INDEX `{OPERATION_LOG_FULLTEXT_INDEX}`")
+    # 清除实例上缓存的索引检测结果
+    db_manager.__dict__.pop('_log_fulltext', None)
+
+
+def measure(db_manager, keywords, repeat):
+    results = []
+    for keyword in keywords:
+        page = timed(lambda: db_manager.get_operation_logs_page(keyword=keyword, page_size=20), repeat)
+        count = timed(lambda: db_manager.count_operation_logs(keyword=keyword), repeat)
+        results.append((page, count))
+    return results
+
+
+def main():
+    parser = make_parser("操作日志关键词搜索基准测试")
+    parser.add_argument('--rows', type=int, default=1000000, help='生成的日志行数')
+    parser.add_argument('--skip-populate', action='store_true', help='复用测试库中已有数据')
+    args = parser.parse_args()
+
+    db_manager = connect_bench_db(args)
+    rng = make_rng()
+    set_fulltext(db_manager, False)
+    if not args.skip_populate:
+        populate(db_manager, args.rows, rng)
+
+    names = item_names()
+    keywords = [names[7], names[1234], '批量导入', '不存在的物品']
+
+    print("\n测量 LIKE 搜索...")
+    like = measure(db_manager, keywords, args.repeat)
+    set_fulltext(db_manager, True)
+    print("测量 全文索引 + LIKE 搜索...\n")
+    fulltext = measure(db_manager, keywords, args.repeat)
+
+    print_table(
+        ["关键词", "LIKE首页(ms)", "全文首页(ms)", "LIKE计数(ms)", "全文计数(ms)"],
+        [(kw, f"{l[0]:.1f}", f"{f[0]:.1f}", f"{l[1]:.1f}", f"{f[1]:.1f}")
+         for kw, l, f in zip(keywords, like, fulltext)]
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+OCR后端基准测试
+
+对比各OCR后端的单张识别延迟和批量识别吞吐，不使用OCR结果缓存：
+    单张延迟      逐张顺序识别，取中位数和P90
+    批量吞吐      通过OCRBatchService并发识别全部图片，统计每秒张数
+
+图片取自 --images 目录（png/jpg/bmp），未指定时生成模拟交易表格截图。
+本地后端（tesseract）不需要网络，可离线运行；不连接数据库。
+
+用法:
+    python benchmarks/bench_ocr_backends.py --backends http tesseract --images ./screenshots
+"""
+import os
+import statistics
+import sys
+import time
+
+from bench_common import make_parser, print_table, make_rng
+from PIL import Image, ImageDraw
+
+from src.utils import ocr
+from src.utils.ocr_backends import create_backend
+from src.utils.ocr_batch import OCRBatchService
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def load_images(directory):
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with Image.open(os.path.join(directory, name)) as img:
+                images.append(img.convert('RGB'))
+    return images
+
+
+def make_images(count, rng):
+    """生成模拟的交易表格截图：每张12行 物品编号/数量/单价（默认字体不含中文）"""
+    images = []
+    for _ in range(count):
+        img = Image.new('RGB', (900, 400), 'white')
+        draw = ImageDraw.Draw(img)
+        for row in range(12):
+            y = 10 + row * 32
+            line = f"ITEM{rng.randint(0, 999):03d}    {rng.randint(1, 500)}    {rng.randint(10, 5000)}"
+            draw.text((20, y), line, fill='black')
+        images.append(img)
+    return images
+
+
+def measure_latency(backend, images):
+    """逐张识别，返回 (中位数毫秒, P90毫秒)"""
+    samples = []
+    for img in images:
+        start = time.perf_counter()
+        ocr.recognize_text(img, use_cache=False, backend=backend)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+
+
+def measure_throughput(backend, images, workers):
+    """并发识别全部图片，返回 (每秒张数, 失败张数)"""
+    service = OCRBatchService(
+        max_workers=workers, retries=0,
+        recognize=lambda img: ocr.recognize_text(img, use_cache=False, backend=backend)
+    )
+    try:
+        start = time.perf_counter()
+        results = service.recognize_batch(images)
+        elapsed = time.perf_counter() - start
+    finally:
+        service.shutdown()
+    return len(images) / elapsed if elapsed > 0 else 0.0, sum(1 for r in results if not r.ok)
+
+
+def main():
+    parser = make_parser("OCR后端基准测试")
+    parser.add_argument('--backends', nargs='+', default=['http', 'tesseract'], help='要测试的后端')
+    parser.add_argument('--images', help='截图目录，未指定时生成模拟截图')
+    parser.add_argument('--count', type=int, default=16, help='生成的模拟截图数量')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='批量识别并发数')
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else make_images(args.count, make_rng())
+    if not images:
+        print("没有可用的图片")
+        sys.exit(1)
+
+    table = []
+    for name in args.backends:
+        try:
+            backend = create_backend(name)
+        except Exception as e:
+            print(f"跳过后端 {name}: {e}")
+            continue
+        try:
+            # 预热：建立连接、启动识别进程
+            ocr.recognize_text(images[0], use_cache=False, backend=backend)
+            median, p90 = measure_latency(backend, images)
+            throughput, failed = measure_throughput(backend, images, args.workers)
+            table.append([name, f"{median:.0f}", f"{p90:.0f}", f"{throughput:.2f}", failed])
+        except Exception as e:
+            print(f"后端 {name} 识别失败: {e}")
+        finally:
+            backend.close()
+
+    print(f"\n{len(images)} 张图片，批量并发数 {args.workers}:")
+    print_table(['后端', '单张中位数(ms)', '单张P90(ms)', '批量吞吐(张/秒)', '失败数'], table or [['-'] * 5])
+
+
+if __name__ == '__main__':
+    main()
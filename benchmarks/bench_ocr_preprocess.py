@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+OCR预处理基准测试
+
+对比原图和预处理后的图片：
+    上传大小      base64编码后的字节数（原图为原有的PNG编码）
+    预处理耗时    灰度化、缩放（--lossy 时加上裁剪、二值化）的耗时
+    识别耗时      指定 --backend 时，逐张识别（不使用缓存）的端到端耗时，并统计两种方式识别结果一致的张数
+
+图片取自 --images 目录，未指定时生成模拟交易表格截图。不连接数据库。
+
+用法:
+    python benchmarks/bench_ocr_preprocess.py --images ./screenshots --backend http
+    python benchmarks/bench_ocr_preprocess.py --images ./screenshots --backend http --lossy
+"""
+import statistics
+import sys
+import time
+
+from bench_common import make_parser, print_table, make_rng
+from bench_ocr_backends import load_images, make_images
+
+from src.utils import ocr
+from src.utils.ocr_backends import create_backend, encode_image
+from src.utils.ocr_preprocess import OCRPreprocessor
+
+
+def median_ms(samples):
+    return f"{statistics.median(samples) * 1000:.1f}"
+
+
+def main():
+    parser = make_parser("OCR预处理基准测试")
+    parser.add_argument('--images', help='截图目录，未指定时生成模拟截图')
+    parser.add_argument('--count', type=int, default=16, help='生成的模拟截图数量')
+    parser.add_argument('--format', default='PNG', choices=['PNG', 'WEBP'], help='预处理后的编码格式')
+    parser.add_argument('--backend', help='同时测试识别耗时的OCR后端，如 http 或 tesseract')
+    parser.add_argument('--lossy', action='store_true', help='同时开启裁剪和二值化')
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else make_images(args.count, make_rng())
+    if not images:
+        print("没有可用的图片")
+        sys.exit(1)
+
+    preprocessor = OCRPreprocessor(crop=args.lossy, binarize=args.lossy)
+    raw_sizes, processed_sizes, preprocess_times = [], [], []
+    for img in images:
+        raw_sizes.append(len(encode_image(img)))
+        start = time.perf_counter()
+        processed = preprocessor.process(img)
+        preprocess_times.append(time.perf_counter() - start)
+        processed_sizes.append(len(encode_image(processed, args.format)))
+
+    raw_total, processed_total = sum(raw_sizes), sum(processed_sizes)
+    print(f"\n{len(images)} 张图片，预处理参数: {preprocessor.signature}，编码格式: {args.format}")
+    print_table(['', '平均上传字节数', '总上传字节数', '预处理中位数(ms)'], [
+        ['原图', raw_total // len(images), raw_total, '-'],
+        ['预处理', processed_total // len(images), processed_total, median_ms(preprocess_times)],
+    ])
+    print(f"上传数据量减少 {100 - processed_total * 100 / raw_total:.1f}%")
+
+    if not args.backend:
+        return
+    options = {'image_format': args.format} if args.backend == 'http' else {}
+    backend = create_backend(args.backend, **options)
+    ocr.set_preprocessor(preprocessor)
+    try:
+        timings = {False: [], True: []}
+        texts = {False: [], True: []}
+        for preprocess in (False, True):
+            for img in images:
+                start = time.perf_counter()
+                texts[preprocess].append(ocr.recognize_text(img, use_cache=False, backend=backend, preprocess=preprocess))
+                timings[preprocess].append(time.perf_counter() - start)
+    finally:
+        backend.close()
+
+    same = sum(1 for a, b in zip(texts[False], texts[True]) if a.strip() == b.strip())
+    print(f"\n后端 {args.backend} 逐张识别耗时:")
+    print_table(['', '中位数(ms)', '总耗时(ms)'], [
+        ['原图', median_ms(timings[False]), f"{sum(timings[False]) * 1000:.0f}"],
+        ['预处理', median_ms(timings[True]), f"{sum(timings[True]) * 1000:.0f}"],
+    ])
+    print(f"识别结果一致: {same}/{len(images)}")
+
+
+if __name__ == '__main__':
+    main()
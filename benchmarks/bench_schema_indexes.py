@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+热点查询索引基准测试
+
+在测试库中生成合成数据（默认每张表100万行），先删除结构迁移创建的热点索引测量查询耗时，
+再重新创建索引测量一次，输出前后对比。
+
+用法:
+    python benchmarks/bench_schema_indexes.py --rows 1000000
+"""
+from bench_common import (
+    make_parser, connect_bench_db, timed, item_names, random_time,
+    bulk_insert, print_table, make_rng
+)
+from src.core.schema_migrations import HOT_PATH_INDEXES, create_index
+
+TABLES = ['stock_in', 'stock_out', 'trade_monitor', 'silver_monitor', 'operation_logs']
+
+
+def populate(db_manager, rows, rng):
+    names = item_names()
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        for table in TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    print(f"生成 stock_in {rows} 行...")
+    bulk_insert(db_manager,
+                "INSERT INTO stock_in (item_name, transaction_time, quantity, cost, avg_cost, note) VALUES (%s, %s, %s, %s, %s, %s)",
+                [(rng.choice(names), random_time(rng), q, q * 100, 100, '') for q in (rng.randint(1, 50) for _ in range(rows))])
+    print(f"生成 stock_out {rows} 行...")
+    bulk_insert(db_manager,
+                "INSERT INTO stock_out (item_name, transaction_time, quantity, unit_price, fee, deposit, total_amount, note) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                [(rng.choice(names), random_time(rng), q, 120, 5, 0, q * 120 - 5, '') for q in (rng.randint(1, 50) for _ in range(rows))])
+    print(f"生成 trade_monitor {rows} 行...")
+    bulk_insert(db_manager,
+                "INSERT INTO trade_monitor (item_name, monitor_time, quantity, market_price, target_price, planned_price, break_even_price, profit, profit_rate, strategy) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                [(rng.choice(names), random_time(rng), 10, 100, 90, 120, 100, 20, 20, '') for _ in range(rows)])
+    print(f"生成 silver_monitor {rows} 行...")
+    servers = [f"服务器{i}" for i in range(40)]
+    series = ['DD373', 'UU898', '7881']
+    bulk_insert(db_manager,
+                "INSERT INTO silver_monitor (server, series, price, ma_price, timestamp) VALUES (%s, %s, %s, %s, %s)",
+                [(rng.choice(servers), rng.choice(series), 10, 10, random_time(rng)) for _ in range(rows)])
+    print(f"生成 operation_logs {rows} 行...")
+    bulk_insert(db_manager,
+                "INSERT INTO operation_logs (operation_type, operation_category, tab_name, operation_time, operation_data, reverted, can_revert) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                [('添加', '数据操作', '入库管理', random_time(rng), '{"item_name": "测试物品"}', 0, 1) for _ in range(rows)])
+
+
+def build_queries(db_manager, rng):
+    name = item_names()[rng.randint(0, 1999)]
+    sample = db_manager.fetch_one("SELECT transaction_time FROM stock_in WHERE item_name=%s LIMIT 1", (name,))
+    sample_time = sample[0] if sample else None
+    month_start = random_time(rng).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_end = month_start.replace(month=month_start.month % 12 + 1, year=month_start.year + (month_start.month == 12))
+    return [
+        ("物品价格历史 stock_in", "SELECT transaction_time, avg_cost FROM stock_in WHERE item_name=%s ORDER BY transaction_time", (name,)),
+        ("删除定位 stock_in", "SELECT id FROM stock_in WHERE item_name=%s AND transaction_time=%s", (name, sample_time)),
+        ("月度出库汇总 stock_out", "SELECT item_name, SUM(quantity) FROM stock_out WHERE transaction_time >= %s AND transaction_time < %s GROUP BY item_name", (month_start, month_end)),
+        ("最近出库 stock_out", "SELECT * FROM stock_out ORDER BY transaction_time DESC LIMIT 5", None),
+        ("监控查找 trade_monitor", "SELECT id FROM trade_monitor WHERE item_name=%s", (name,)),
+        ("监控列表 trade_monitor", "SELECT * FROM trade_monitor ORDER BY monitor_time DESC LIMIT 100", None),
+        ("银两走势 silver_monitor", "SELECT server, series, price, ma_price, timestamp FROM silver_monitor WHERE server=%s AND series=%s AND timestamp>=%s ORDER BY timestamp DESC", ("服务器1", "DD373", month_start)),
+        ("日志首页 operation_logs", "SELECT id, operation_type, tab_name, operation_data, operation_time FROM operation_logs ORDER BY operation_time DESC LIMIT 20 OFFSET 0", None),
+    ]
+
+
+def run_queries(db_manager, queries, repeat):
+    return [timed(lambda q=query, p=params: db_manager.fetch_all(q, p), repeat) for _, query, params in queries]
+
+
+def set_indexes(db_manager, enabled):
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        for table, index_name, columns in HOT_PATH_INDEXES:
+            if enabled:
+                create_index(cursor, table, index_name, columns)
+            else:
+                try:
+                    cursor.execute(f"ALTER TABLE `{table}` DROP INDEX `{index_name}`")
+                except Exception:
+                    pass
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = make_parser("热点查询索引基准测试")
+    parser.add_argument('--rows', type=int, default=1000000, help='每张表生成的行数')
+    parser.add_argument('--skip-populate', action='store_true', help='复用测试库中已有数据')
+    args = parser.parse_args()
+
+    db_manager = connect_bench_db(args)
+    rng = make_rng()
+    set_indexes(db_manager, False)
+    if not args.skip_populate:
+        populate(db_manager, args.rows, rng)
+
+    queries = build_queries(db_manager, rng)
+    print("\n测量无索引时的查询耗时...")
+    before = run_queries(db_manager, queries, args.repeat)
+    print("创建热点索引...")
+    set_indexes(db_manager, True)
+    print("测量有索引时的查询耗时...\n")
+    after = run_queries(db_manager, queries, args.repeat)
+
+    print_table(
+        ["查询", "无索引(ms)", "有索引(ms)", "加速比"],
+        [(label, f"{b:.1f}", f"{a:.1f}", f"{b / a:.1f}x" if a else "-")
+         for (label, _, _), b, a in zip(queries, before, after)]
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+并发出库基准测试
+
+多个线程同时对同一物品出库，对比旧的三次往返出库（SELECT库存 → UPDATE库存 → 另开连接INSERT）
+与 atomic_stock_out（同一事务内条件UPDATE + INSERT）的吞吐量，并检查是否出现超卖。
+
+用法:
+    python benchmarks/bench_stock_out.py --threads 8 --ops 200
+"""
+import threading
+import time
+from datetime import datetime
+
+from bench_common import make_parser, connect_bench_db, print_table
+
+ITEM = '并发出库测试物品'
+
+
+def legacy_stock_out(db_manager, item_name, quantity, price, fee):
+    """旧版add_stock_out：三次往返且没有跨语句的事务"""
+    inventory = db_manager.fetch_one("SELECT quantity, avg_price FROM inventory WHERE item_name=%s", (item_name,))
+    if not inventory:
+        return False
+    current_quantity, current_avg_price = inventory
+    if current_quantity < quantity:
+        return False
+    new_quantity = current_quantity - quantity
+    new_avg_price = current_avg_price if new_quantity > 0 else 0
+    if not db_manager.execute_query(
+        "UPDATE inventory SET quantity=%s, avg_price=%s WHERE item_name=%s",
+        (new_quantity, new_avg_price, item_name)
+    ):
+        return False
+    return db_manager.save_stock_out({
+        'item_name': item_name,
+        'transaction_time': datetime.now(),
+        'quantity': quantity,
+        'unit_price': price,
+        'fee': fee,
+        'deposit': 0
+    })
+
+
+def atomic_stock_out(db_manager, item_name, quantity, price, fee):
+    success, _ = db_manager.atomic_stock_out({
+        'item_name': item_name,
+        'transaction_time': datetime.now(),
+        'quantity': quantity,
+        'unit_price': price,
+        'fee': fee,
+        'deposit': 0
+    })
+    return success
+
+
+def reset(db_manager, initial_quantity):
+    db_manager.execute_in_transaction([
+        ("DELETE FROM inventory WHERE item_name=%s", (ITEM,)),
+        ("DELETE FROM stock_out WHERE item_name=%s", (ITEM,)),
+        ("DELETE FROM item_trade_summary WHERE item_name=%s", (ITEM,)),
+        ("""INSERT INTO inventory (item_name, quantity, avg_price, break_even_price, selling_price,
+                                   profit, profit_rate, total_profit, inventory_value)
+            VALUES (%s, %s, 100, 100, 100, 0, 0, 0, 0)""", (ITEM, initial_quantity)),
+    ])
+
+
+def run(db_manager, func, threads, ops, initial_quantity):
+    reset(db_manager, initial_quantity)
+    succeeded = [0] * threads
+    barrier = threading.Barrier(threads)
+
+    def seller(index):
+        barrier.wait()
+        for _ in range(ops):
+            if func(db_manager, ITEM, 1, 120, 1):
+                succeeded[index] += 1
+
+    workers = [threading.Thread(target=seller, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    remaining = db_manager.fetch_one("SELECT quantity FROM inventory WHERE item_name=%s", (ITEM,))[0]
+    recorded = db_manager.fetch_one("SELECT COALESCE(SUM(quantity), 0) FROM stock_out WHERE item_name=%s", (ITEM,))[0]
+    total_ops = threads * ops
+    return {
+        'ops_per_sec': total_ops / elapsed if elapsed else 0,
+        'succeeded': sum(succeeded),
+        'remaining': int(remaining),
+        # 出库记录数量 + 剩余库存应等于初始库存，否则存在丢失更新或超卖
+        'consistent': int(recorded) + int(remaining) == initial_quantity,
+    }
+
+
+def main():
+    parser = make_parser("并发出库基准测试")
+    parser.add_argument('--threads', type=int, default=8, help='并发出库线程数')
+    parser.add_argument('--ops', type=int, default=200, help='每个线程的出库次数')
+    parser.add_argument('--stock', type=int, default=None, help='初始库存，默认为总出库次数的一半以制造库存竞争')
+    args = parser.parse_args()
+
+    db_manager = connect_bench_db(args, pool_size=args.threads + 2)
+    initial_quantity = args.stock if args.stock is not None else args.threads * args.ops // 2
+
+    rows = []
+    for label, func in (("三次往返(旧)", legacy_stock_out), ("单事务条件更新", atomic_stock_out)):
+        print(f"运行: {label} ...")
+        result = run(db_manager, func, args.threads, args.ops, initial_quantity)
+        rows.append((label, f"{result['ops_per_sec']:.0f}", result['succeeded'],
+                     result['remaining'], "是" if result['consistent'] else "否"))
+
+    print(f"\n线程数 {args.threads}，每线程 {args.ops} 次，初始库存 {initial_quantity}\n")
+    print_table(["方式", "出库次数/秒", "成功出库", "剩余库存", "数据一致"], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+表格刷新基准测试
+
+对比三种刷新方式在常见数据变化下每次刷新的Tcl命令数和耗时：
+    全部重建      ttk.Treeview 清空后逐行重新插入（原有做法）
+    增量更新      ttk.Treeview + RowReconciler，按行键只修改有变化的行
+    虚拟表格      VirtualTreeview.set_rows(keys=...)，只创建并增量更新可见行
+
+交替行颜色按显示位置设置，与各标签页一致。需要图形界面环境，不连接数据库。
+
+用法:
+    python benchmarks/bench_treeview_refresh.py --rows 5000
+"""
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from bench_common import make_parser, print_table, make_rng, item_names
+from src.gui.components.row_reconciler import RowReconciler
+from src.gui.components.virtual_treeview import VirtualTreeview
+
+COLUMNS = ('物品', '数量', '单价', '总额', '备注')
+
+
+class CallCounter:
+    """包装Tcl解释器，统计控件发出的Tcl命令数"""
+
+    def __init__(self, interp):
+        self._interp = interp
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return self._interp.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._interp, name)
+
+
+def make_rows(count, rng):
+    names = item_names()
+    rows = []
+    for record_id in range(1, count + 1):
+        quantity = rng.randint(1, 500)
+        price = rng.randint(10, 5000)
+        rows.append((record_id, (rng.choice(names), f"{quantity:,}", f"{price:,}", f"{quantity * price:,}", ''), ()))
+    return rows
+
+
+def scenarios(base, rng):
+    """返回 [(场景名, 变化后的数据)]"""
+    def modify(rows, count):
+        rows = list(rows)
+        for i in rng.sample(range(len(rows)), count):
+            key, values, tags = rows[i]
+            rows[i] = (key, values[:4] + ('已修改',), tags)
+        return rows
+
+    appended = base + [(len(base) + 1, ('新物品', '1', '100', '100', ''), ())]
+    middle = len(base) // 2
+    return [
+        ('无变化', list(base)),
+        ('修改1行', modify(base, 1)),
+        ('修改1%的行', modify(base, max(1, len(base) // 100))),
+        ('末尾新增1行', appended),
+        ('删除中间1行', base[:middle] + base[middle + 1:]),
+    ]
+
+
+def with_stripes(rows):
+    return [(key, values, ('evenrow' if i % 2 == 0 else 'oddrow',) + tuple(tags))
+            for i, (key, values, tags) in enumerate(rows)]
+
+
+def make_tree(root, cls=ttk.Treeview, **kw):
+    tree = cls(root, columns=COLUMNS, show='headings', height=20, **kw)
+    tree.pack(fill='both', expand=True)
+    tree.tk = CallCounter(root.tk)
+    return tree
+
+
+def rebuild_strategy(root):
+    tree = make_tree(root)
+
+    def apply(rows):
+        for item in tree.get_children():
+            tree.delete(item)
+        for _, values, tags in with_stripes(rows):
+            tree.insert('', 'end', values=values, tags=tags)
+    return tree, apply
+
+
+def reconcile_strategy(root):
+    tree = make_tree(root)
+    reconciler = RowReconciler(tree)
+
+    def apply(rows):
+        reconciler.update(with_stripes(rows))
+    return tree, apply
+
+
+def virtual_strategy(root):
+    tree = make_tree(root, VirtualTreeview, stripe_tags=('evenrow', 'oddrow'))
+
+    def apply(rows):
+        tree.set_rows([(values, tags) for _, values, tags in rows], keys=[key for key, _, _ in rows])
+        root.update_idletasks()
+    return tree, apply
+
+
+def measure(root, strategy, base, changed, repeat):
+    """从base刷新到changed，返回 (Tcl命令数, 耗时中位数毫秒)"""
+    tree, apply = strategy(root)
+    samples = []
+    calls = 0
+    for _ in range(repeat):
+        apply(base)
+        root.update_idletasks()
+        tree.tk.calls = 0
+        start = time.perf_counter()
+        apply(changed)
+        samples.append((time.perf_counter() - start) * 1000)
+        calls = tree.tk.calls
+    tree.destroy()
+    samples.sort()
+    return calls, samples[len(samples) // 2]
+
+
+def main():
+    parser = make_parser("表格刷新基准测试")
+    parser.add_argument('--rows', type=int, default=2000, help='表格行数')
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"无法创建窗口（需要图形界面环境）: {e}")
+        sys.exit(1)
+    root.geometry("900x600")
+
+    rng = make_rng()
+    base = make_rows(args.rows, rng)
+    strategies = [('全部重建', rebuild_strategy), ('增量更新', reconcile_strategy), ('虚拟表格', virtual_strategy)]
+    table = []
+    for name, changed in scenarios(base, rng):
+        row = [name]
+        for _, strategy in strategies:
+            calls, ms = measure(root, strategy, base, changed, args.repeat)
+            row.extend([calls, f"{ms:.1f}"])
+        table.append(row)
+    root.destroy()
+
+    print(f"\n{args.rows} 行，每次刷新的Tcl命令数和耗时（毫秒）:")
+    headers = ['场景']
+    for name, _ in strategies:
+        headers.extend([f"{name}-命令数", f"{name}-耗时"])
+    print_table(headers, table)
+
+
+if __name__ == '__main__':
+    main()
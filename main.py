@@ -7,6 +7,7 @@ GameTrad - 游戏交易系统主入口文件
 import os
 import sys
 import argparse
+import multiprocessing
 from tkinter import messagebox
 
 # 添加当前目录到PATH，确保能正确导入模块
@@ -121,4 +122,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # 打包后本地OCR进程池的子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
     sys.exit(main()) 
\ No newline at end of file
@@ -18,7 +18,7 @@ def clear_all_data():
     
     try:
         # 清空库存表和交易记录表
-        tables = ['inventory', 'stock_in', 'stock_out']
+        tables = ['inventory', 'stock_in', 'stock_out', 'item_trade_summary']
         for table in tables:
             cursor.execute(f"DELETE FROM {table}")
             print(f"已清空{table}表")
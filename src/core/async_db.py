@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# 异步数据访问模块 - 在单个后台事件循环线程中并发执行数据库查询
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EventLoopThread:
+    """
+    在后台守护线程中常驻运行的asyncio事件循环
+
+    整个程序共用一个实例（见get_event_loop_thread），协程通过submit()提交，
+    返回concurrent.futures.Future，可在任意线程中等待或取消。
+    """
+
+    def __init__(self, name="AsyncLoop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._start_lock = threading.Lock()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self):
+        with self._start_lock:
+            if not self._thread.is_alive() and not self.loop.is_closed():
+                self._thread.start()
+
+    def submit(self, coro):
+        """把协程提交到事件循环中执行，返回concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout=2.0):
+        """停止事件循环并等待线程退出"""
+        if self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+
+
+_loop_thread = None
+_loop_thread_lock = threading.Lock()
+
+
+def get_event_loop_thread():
+    """返回全局共用的事件循环线程"""
+    global _loop_thread
+    with _loop_thread_lock:
+        if _loop_thread is None:
+            _loop_thread = EventLoopThread()
+        return _loop_thread
+
+
+class AsyncDatabaseManager:
+    """
+    DatabaseManager的asyncio封装
+
+    await adb.get_stock_in() 会在有界线程池中调用同名的阻塞方法，其余方法同理，
+    多个查询可以用asyncio.gather并发执行。MySQLdb没有异步接口，线程池大小默认与连接池一致，
+    并发查询不会超过可用连接数。
+
+    Args:
+        db_manager: DatabaseManager实例
+        max_workers: 最多同时执行的查询数，默认取配置中的pool_size
+        loop_thread: 事件循环线程，默认使用全局共用的实例
+    """
+
+    def __init__(self, db_manager, max_workers=None, loop_thread=None):
+        self.db_manager = db_manager
+        if max_workers is None:
+            max_workers = int(db_manager.config.get('pool_size', 8))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="AsyncDB")
+        self.loop_thread = loop_thread or get_event_loop_thread()
+
+    async def run(self, func, *args, **kwargs):
+        """在线程池中执行任意阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def gather(self, *calls):
+        """
+        并发执行多个阻塞调用，按参数顺序返回结果
+
+        Args:
+            calls: (函数, 参数...) 元组
+        """
+        return await asyncio.gather(*(self.run(func, *args) for func, *args in calls))
+
+    def submit(self, coro):
+        """把协程提交到事件循环线程"""
+        return self.loop_thread.submit(coro)
+
+    def close(self):
+        """关闭查询线程池，尚未开始的查询不再执行"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __getattr__(self, name):
+        attr = getattr(self.db_manager, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        call.__name__ = name
+        return call
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# 变更检测模块 - 轮询table_versions判断其他客户端是否修改了数据，并按id增量同步整表数据
+
+import threading
+import time
+
+
+class TableSnapshot:
+    """
+    一张表的本地全量副本
+
+    表只有新增记录时，只查询id大于已同步最大id的行追加到副本中；有修改或删除时重新全量加载。
+    并发事务可能晚于更大的id提交，增量范围内缺失的id会在gap_ttl秒内的后续同步中补查。
+
+    版本号之外的写入（没有触发器时旧版客户端、手工修改等）不会被版本号反映，因此每隔verify_interval秒
+    比对一次表的行数和最大id，不一致时全量加载；副本存在超过max_age秒也会全量加载，兜底只修改已有行的写入。
+
+    Args:
+        table: 表名，第一列必须是自增id
+        order_index: 排序列在行中的下标，行按 (排序列, id) 倒序排列
+        gap_ttl: 缺失id的补查时限（秒），超时视为已回滚
+        max_gaps: 缺失id过多时改为全量加载
+        verify_interval: 比对行数和最大id的间隔（秒）
+        max_age: 副本的最长使用时间（秒）
+    """
+
+    def __init__(self, table, order_index, gap_ttl=60.0, max_gaps=1000, verify_interval=30.0, max_age=600.0):
+        self.table = table
+        self.order_index = order_index
+        self.gap_ttl = gap_ttl
+        self.max_gaps = max_gaps
+        self.verify_interval = verify_interval
+        self.max_age = max_age
+        self.rows = []
+        self.max_id = 0
+        self.versions = None     # (version, rewrite_version)
+        self._gaps = {}          # 缺失id -> 补查截止时间
+        self._loaded_at = 0.0    # 上次全量加载的时间
+        self._verified_at = 0.0  # 上次比对行数的时间
+        self._lock = threading.Lock()
+        self._stats = {'full_loads': 0, 'delta_loads': 0, 'delta_rows': 0, 'verify_reloads': 0}
+
+    def _sort_key(self, row):
+        return (row[self.order_index] is not None, row[self.order_index], row[0])
+
+    def sync(self, fetch_all, versions):
+        """
+        同步到指定版本并返回全部行
+
+        Args:
+            fetch_all: 执行查询并返回可迭代结果的函数 fetch_all(query, params)，出错时抛出异常
+            versions: 同步前读到的 (version, rewrite_version)
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (self.versions is None or self.versions[1] != versions[1]
+                    or len(self._gaps) > self.max_gaps or now - self._loaded_at > self.max_age):
+                self._full_load(fetch_all, now)
+            else:
+                if self.versions != versions:
+                    self._delta_load(fetch_all)
+                if now - self._verified_at > self.verify_interval:
+                    self._verify(fetch_all, now)
+            self.versions = versions
+            return self.rows
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['rows'] = len(self.rows)
+            snapshot['pending_gaps'] = len(self._gaps)
+        return snapshot
+
+    def _full_load(self, fetch_all, now):
+        rows = list(fetch_all(f"SELECT * FROM {self.table}", None))
+        rows.sort(key=self._sort_key, reverse=True)
+        self.rows = rows
+        self.max_id = max((row[0] for row in rows), default=0)
+        self._gaps = {}
+        self._loaded_at = self._verified_at = now
+        self._stats['full_loads'] += 1
+
+    def _verify(self, fetch_all, now):
+        """行数或最大id与副本不一致时全量加载"""
+        self._verified_at = now
+        count, max_id = next(iter(fetch_all(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {self.table}", None)))
+        if (int(count), int(max_id)) != (len(self.rows), self.max_id):
+            self._stats['verify_reloads'] += 1
+            self._full_load(fetch_all, now)
+
+    def _delta_load(self, fetch_all):
+        now = time.monotonic()
+        self._gaps = {gap: deadline for gap, deadline in self._gaps.items() if deadline > now}
+        query = f"SELECT * FROM {self.table} WHERE id > %s"
+        params = [self.max_id]
+        if self._gaps:
+            query += f" OR id IN ({', '.join(['%s'] * len(self._gaps))})"
+            params.extend(self._gaps)
+        new_rows = list(fetch_all(query, tuple(params)))
+        self._stats['delta_loads'] += 1
+        if not new_rows:
+            return
+        self._stats['delta_rows'] += len(new_rows)
+
+        new_ids = {row[0] for row in new_rows}
+        for gap in new_ids & self._gaps.keys():
+            del self._gaps[gap]
+        new_max = max(new_ids)
+        if new_max > self.max_id:
+            deadline = now + self.gap_ttl
+            for missing in range(self.max_id + 1, new_max):
+                if missing not in new_ids:
+                    self._gaps[missing] = deadline
+            self.max_id = new_max
+        # 原有行已有序，合并后排序接近线性
+        self.rows = sorted(self.rows + new_rows, key=self._sort_key, reverse=True)
+
+
+class ChangeWatcher:
+    """
+    检测其他客户端的数据变更
+
+    每次poll()只读取table_versions中几行版本号；版本增量超出本进程自己的写入次数时，
+    说明其他客户端修改了该表，此时清除本地查询缓存并返回变更的表。
+    由触发器递增版本号的表无法区分本进程的写入，本进程写入后也会返回一次变更。
+
+    Args:
+        db_manager: DatabaseManager实例
+        tables: 需要检测的表名列表
+    """
+
+    def __init__(self, db_manager, tables):
+        self.db_manager = db_manager
+        self.tables = list(tables)
+        self._seen = None
+        self.polls = 0
+
+    def poll(self):
+        """
+        检查变更
+
+        Returns:
+            {表名: 是否只有新增记录}，没有其他客户端的变更时返回空字典
+        """
+        versions = self.db_manager.get_table_versions(self.tables)
+        own = self.db_manager.take_own_version_bumps(self.tables)
+        self.polls += 1
+        if not versions:
+            return {}
+        if self._seen is None:
+            self._seen = versions
+            return {}
+        changed = {}
+        for table, (version, rewrite_version) in versions.items():
+            seen_version, seen_rewrite = self._seen.get(table, (version, rewrite_version))
+            if version - seen_version > own.get(table, 0):
+                changed[table] = rewrite_version == seen_rewrite
+        self._seen = versions
+        if changed:
+            self.db_manager.mark_tables_changed_locally(*changed)
+        return changed
@@ -4,12 +4,54 @@ try:
 except ImportError:
     raise RuntimeError("请先安装MySQLdb模块：pip install mysqlclient")
 from MySQLdb import OperationalError, IntegrityError
+from MySQLdb.cursors import SSCursor
 from datetime import datetime
 from decimal import Decimal
 import json
 import os
+import re
+import threading
+from src.core.db_pool import get_shared_pool, discard_shared_pool
+from src.core.operation_log_writer import OperationLogWriter
+from src.core.query_cache import QueryCache, tables_in_query
+from src.core.schema_migrations import (
+    apply_migrations, create_triggers, table_exists, table_version_triggers, triggers_installed,
+    ITEM_SUMMARY_TRIGGERS, OPERATION_LOG_FULLTEXT_INDEX, VERSIONED_TABLES
+)
+from src.core.change_watcher import TableSnapshot
+
+# 从写语句中识别被修改的表名
+_WRITE_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE\s+(?:TABLE\s+)?)\s*`?(\w+)",
+    re.IGNORECASE
+)
 
 class DatabaseManager:
+    # 各表的本地数据版本号，写操作成功后递增，所有实例共享，供统计缓存判断数据是否变化
+    _data_versions = {}
+    _data_versions_lock = threading.Lock()
+
+    # 操作日志后台写入器，首次记录日志时创建，所有实例共用一个写入线程
+    _log_writer = None
+    _log_writer_lock = threading.Lock()
+
+    # 查询结果缓存，调用enable_read_cache()后启用，所有实例共享
+    _read_cache = None
+
+    # 本进程对table_versions的递增次数（变更检测据此区分自己和其他客户端的写入）及按id增量同步的整表副本
+    _own_version_bumps = {}
+    _snapshots = {}
+    _snapshots_lock = threading.Lock()
+
+    # table_versions是否存在，以及其中由数据库触发器递增版本号的表（其余表由本客户端在写入事务中递增）
+    _table_versions_ready = False
+    _trigger_versioned_tables = frozenset()
+
+    # item_trade_summary是否由数据库触发器维护；没有触发器时由本客户端在写入事务中维护，
+    # 并在校验发现偏差（其他客户端写入）后改为直接分组汇总交易记录，直到下次校验一致
+    _summary_triggers = False
+    _summary_trusted = True
+
     def __init__(self):
         # 加载数据库配置
         self.config = self.load_db_config()
@@ -100,14 +142,42 @@ class DatabaseManager:
             
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
-            # 更新当前配置
+            # 更新当前配置，旧配置的连接池不再使用
+            discard_shared_pool(self._pool_key())
             self.config = config
             return True
         except Exception as e:
             print(f"保存数据库配置失败: {e}")
             return False
 
+    def _pool_key(self):
+        return (
+            self.config['host'], int(self.config['port']), self.config['user'],
+            self.config['db'], self.config['charset']
+        )
+
+    def _get_pool(self):
+        """获取当前配置对应的共享连接池"""
+        return get_shared_pool(
+            self._pool_key(),
+            self._open_connection,
+            max_size=int(self.config.get('pool_size', 8)),
+            acquire_timeout=int(self.config.get('pool_timeout', 30)),
+            idle_timeout=int(self.config.get('pool_idle_timeout', 300)),
+            max_lifetime=int(self.config.get('pool_max_lifetime', 3600)),
+            health_check_interval=int(self.config.get('pool_health_check_interval', 30))
+        )
+
     def get_connection(self):
+        """从连接池借出一个连接，使用完毕后调用close()归还"""
+        return self._get_pool().acquire()
+
+    def get_pool_stats(self):
+        """获取连接池统计信息：hits、waits、opens、in_use、idle等"""
+        return self._get_pool().stats()
+
+    def _open_connection(self):
+        """新建一条物理MySQL连接，仅供连接池调用"""
         try:
             return MySQLdb.connect(
                 host=self.config['host'],
@@ -144,7 +214,148 @@ class DatabaseManager:
             return False, f"连接失败: {str(e)}"
 
     def close(self):
-        pass  # 不再需要全局关闭
+        pass  # 连接由共享连接池管理，无需全局关闭
+
+    def mark_tables_changed(self, *tables, inserted_only=False):
+        """
+        递增指定表的数据版本号，清除涉及这些表的查询缓存，并通知其他客户端
+
+        用于写入已在其他连接上提交之后；DatabaseManager自己的写入在提交前由_commit_changes()
+        在同一事务内递增版本号。
+
+        Args:
+            inserted_only: 写入只新增了记录，其他客户端可以只同步新行
+        """
+        self.mark_tables_changed_locally(*tables)
+        self._bump_table_versions(tables, inserted_only)
+
+    def mark_tables_changed_locally(self, *tables):
+        """只更新本进程的数据版本号和查询缓存（检测到其他客户端的写入时使用）"""
+        with self._data_versions_lock:
+            for table in tables:
+                table = table.lower()
+                self._data_versions[table] = self._data_versions.get(table, 0) + 1
+        cache = DatabaseManager._read_cache
+        if cache is not None:
+            cache.invalidate_tables(*tables)
+
+    _BUMP_VERSION_SQL = (
+        "INSERT INTO table_versions (table_name, version, rewrite_version) VALUES (%s, 1, %s) "
+        "ON DUPLICATE KEY UPDATE version = version + 1, rewrite_version = rewrite_version + VALUES(rewrite_version)"
+    )
+
+    def _version_bump_rows(self, rewritten, inserted, force=False):
+        """
+        需要由客户端递增版本号的 [(表名, 是否有修改或删除)]
+
+        有版本号触发器的表跳过（force=True时不跳过，用于不触发触发器的DDL），没有table_versions时返回空列表
+        """
+        if not self._table_versions_ready:
+            return []
+        versioned = set(VERSIONED_TABLES)
+        if not force:
+            versioned -= self._trigger_versioned_tables
+        # 按表名顺序加锁，避免两个事务以相反顺序递增同一组版本号时死锁
+        return sorted([(table, 1) for table in set(rewritten) & versioned]
+                      + [(table, 0) for table in set(inserted) & versioned])
+
+    def _count_own_bumps(self, bumps):
+        with self._data_versions_lock:
+            for table, _ in bumps:
+                self._own_version_bumps[table] = self._own_version_bumps.get(table, 0) + 1
+
+    def _bump_table_versions(self, tables, inserted_only):
+        """在单独的事务中递增table_versions，失败时丢弃本地整表副本，下次读取改为全量查询"""
+        tables = {table.lower() for table in tables}
+        bumps = self._version_bump_rows(set() if inserted_only else tables, tables if inserted_only else set())
+        if not bumps:
+            return
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.executemany(self._BUMP_VERSION_SQL, bumps)
+            conn.commit()
+            self._count_own_bumps(bumps)
+        except Exception as e:
+            print(f"递增数据版本号失败: {e}")
+            self._discard_snapshots(table for table, _ in bumps)
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def _discard_snapshots(self, tables):
+        """丢弃本进程的整表副本，下次读取时全量加载"""
+        with self._snapshots_lock:
+            for table in tables:
+                self._snapshots.pop(table, None)
+
+    def _commit_changes(self, conn, cursor, rewritten=(), inserted=(), force_bump=False):
+        """
+        提交写事务
+
+        提交前在同一事务内递增table_versions，版本号与数据一起提交：递增失败时抛出异常，
+        由调用方回滚整个写入，不会出现数据已变而版本号未变的情况。提交后更新本进程的数据版本号和查询缓存。
+
+        Args:
+            rewritten: 有修改或删除的表
+            inserted: 只新增了记录的表
+            force_bump: 有版本号触发器的表也递增（RENAME等不触发触发器的写入）
+        """
+        rewritten = {table.lower() for table in rewritten}
+        inserted = {table.lower() for table in inserted} - rewritten
+        bumps = self._version_bump_rows(rewritten, inserted, force_bump)
+        if bumps:
+            cursor.executemany(self._BUMP_VERSION_SQL, bumps)
+        conn.commit()
+        self._count_own_bumps(bumps)
+        if rewritten or inserted:
+            self.mark_tables_changed_locally(*(rewritten | inserted))
+
+    @staticmethod
+    def _classify_queries(queries):
+        """按写语句区分 (有修改或删除的表, 只新增记录的表)"""
+        inserted, rewritten = set(), set()
+        for query in queries:
+            match = _WRITE_TABLE_RE.match(query)
+            if match:
+                # 普通INSERT只新增记录，其他客户端可以按id增量同步
+                plain_insert = query.lstrip()[:6].upper() == 'INSERT' and 'ON DUPLICATE KEY' not in query.upper()
+                (inserted if plain_insert else rewritten).add(match.group(1))
+        return rewritten, inserted - rewritten
+
+    def _commit_queries(self, conn, cursor, queries, extra_rewritten=()):
+        rewritten, inserted = self._classify_queries(queries)
+        self._commit_changes(conn, cursor, rewritten | set(extra_rewritten), inserted)
+
+    def take_own_version_bumps(self, tables):
+        """取出并清零本进程对指定表的版本号递增次数"""
+        with self._data_versions_lock:
+            return {table: self._own_version_bumps.pop(table, 0) for table in tables}
+
+    def get_table_versions(self, tables):
+        """
+        读取共享版本号
+
+        Returns:
+            {表名: (version, rewrite_version)}，table_versions不存在时返回空字典
+        """
+        if not tables:
+            return {}
+        placeholders = ", ".join(["%s"] * len(tables))
+        rows = self.fetch_all(
+            f"SELECT table_name, version, rewrite_version FROM table_versions WHERE table_name IN ({placeholders})",
+            tuple(tables)
+        )
+        return {name: (int(version), int(rewrite_version)) for name, version, rewrite_version in rows}
+
+    def get_data_version(self, *tables):
+        """获取指定表的数据版本号元组，任一表有写入后返回值即发生变化"""
+        with self._data_versions_lock:
+            return tuple(self._data_versions.get(table.lower(), 0) for table in tables)
 
     def execute_query(self, query, params=None):
         conn = self.get_connection()
@@ -152,7 +363,7 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             cursor.execute(query, params or ())
-            conn.commit()
+            self._commit_queries(conn, cursor, [query])
             return True
         except (OperationalError, IntegrityError, Exception) as e:
             return False
@@ -176,6 +387,145 @@ class DatabaseManager:
                 cursor.close()
             conn.close()
 
+    # ---- 查询缓存 ----
+    def enable_read_cache(self, ttl=None, max_entries=256):
+        """
+        启用查询缓存
+
+        启用后cached_fetch_all()的结果在ttl秒内直接从内存返回；本进程内对相关表的写入会立即清除缓存，
+        其他客户端的写入最多延迟ttl秒可见。
+
+        Args:
+            ttl: 缓存有效期（秒），默认读取配置项read_cache_ttl，未配置时为5秒
+            max_entries: 最多缓存的查询数
+        """
+        if ttl is None:
+            ttl = float(self.config.get('read_cache_ttl', 5))
+        DatabaseManager._read_cache = QueryCache(ttl=ttl, max_entries=max_entries)
+
+    def disable_read_cache(self):
+        DatabaseManager._read_cache = None
+
+    def get_read_cache_stats(self):
+        """获取查询缓存统计：hits、misses、expired、invalidations、entries、hit_rate，未启用时返回None"""
+        cache = DatabaseManager._read_cache
+        return cache.stats() if cache is not None else None
+
+    def cached_fetch_all(self, query, params=None, loader=None):
+        """
+        与fetch_all相同，启用查询缓存时优先返回缓存结果（只读，不要修改）
+
+        Args:
+            loader: 可选，缓存未命中时调用loader()代替直接执行query
+        """
+        cache = DatabaseManager._read_cache
+        if cache is None:
+            return loader() if loader is not None else self.fetch_all(query, params)
+        key = cache.make_key(query, params)
+        hit, result = cache.get(key)
+        if hit:
+            return result
+        tables = tables_in_query(query)
+        version = self.get_data_version(*tables)
+        if loader is not None:
+            result = loader()
+        else:
+            conn = self.get_connection()
+            cursor = None
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, params or ())
+                result = cursor.fetchall()
+            except (OperationalError, IntegrityError, Exception) as e:
+                return []
+            finally:
+                if cursor:
+                    cursor.close()
+                conn.close()
+        # 查询期间相关表有写入时不缓存，避免把旧结果放回缓存
+        if self.get_data_version(*tables) == version:
+            cache.put(key, result, tables)
+        return result
+
+    # ---- 流式读取 ----
+    STREAM_CHUNK_SIZE = 1000
+
+    @staticmethod
+    def iter_query_chunks(conn, query, params=None, chunk_size=None):
+        """
+        在指定连接上用服务器端游标(SSCursor)执行查询，按块返回结果
+
+        结果集不会一次性读入内存；遍历结束前该连接不能执行其他查询。
+
+        Args:
+            conn: MySQLdb连接或连接池借出的连接
+            chunk_size: 每块行数，默认STREAM_CHUNK_SIZE
+
+        Yields:
+            行元组的列表，最多chunk_size行
+        """
+        chunk_size = chunk_size or DatabaseManager.STREAM_CHUNK_SIZE
+        cursor = conn.cursor(SSCursor)
+        try:
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # 提前结束遍历时close()会读完并丢弃剩余结果，保证连接可以继续使用
+            cursor.close()
+
+    def stream_chunks(self, query, params=None, chunk_size=None):
+        """从连接池借出连接流式执行查询，按块返回结果，遍历结束或生成器关闭时归还连接"""
+        conn = self.get_connection()
+        try:
+            yield from self.iter_query_chunks(conn, query, params, chunk_size)
+        except Exception:
+            # 读取中途出错的连接可能残留未读完的结果，不再放回连接池
+            conn.invalidate()
+            raise
+        finally:
+            conn.close()
+
+    def stream_rows(self, query, params=None, chunk_size=None):
+        """流式执行查询，逐行返回结果，内存占用与结果集大小无关"""
+        for rows in self.stream_chunks(query, params, chunk_size):
+            yield from rows
+
+    # ---- 按id增量同步的整表读取 ----
+    def fetch_table_rows(self, table, order_index, query):
+        """
+        读取整张表，按 (排序列, id) 倒序返回
+
+        有table_versions时使用进程内共享的TableSnapshot：版本号未变化直接返回副本，
+        只有新增记录时只查询新行；否则直接执行query。
+
+        Args:
+            table: 表名
+            order_index: 排序列在行中的下标
+            query: 没有版本号时使用的完整查询
+        """
+        versions = self.get_table_versions([table]).get(table)
+        if versions is None:
+            return self.fetch_all(query)
+        with self._snapshots_lock:
+            snapshot = self._snapshots.get(table)
+            if snapshot is None:
+                snapshot = self._snapshots[table] = TableSnapshot(table, order_index)
+        try:
+            return tuple(snapshot.sync(self.stream_rows, versions))
+        except Exception as e:
+            print(f"同步{table}数据失败: {e}")
+            return self.fetch_all(query)
+
+    def get_snapshot_stats(self):
+        """获取各表增量同步的统计：全量加载次数、增量加载次数、增量行数、副本行数"""
+        with self._snapshots_lock:
+            snapshots = dict(self._snapshots)
+        return {table: snapshot.stats() for table, snapshot in snapshots.items()}
+
     def fetch_one(self, query, params=None):
         conn = self.get_connection()
         cursor = None
@@ -191,9 +541,36 @@ class DatabaseManager:
                 cursor.close()
             conn.close()
 
+    def execute_in_transaction(self, statements):
+        """在同一连接、同一事务中依次执行多条语句，全部成功才提交
+
+        Args:
+            statements: [(query, params), ...]
+
+        Returns:
+            全部成功返回True，任一失败则回滚并返回False
+        """
+        conn = self.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            for query, params in statements:
+                cursor.execute(query, params or ())
+            self._commit_queries(conn, cursor, [query for query, _ in statements])
+            return True
+        except (OperationalError, IntegrityError, Exception) as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
     # 库存相关方法
-    def save_inventory(self, item_data):
-        query = """
+    _INVENTORY_UPSERT_SQL = """
             INSERT INTO inventory (
                 item_name, quantity, avg_price, break_even_price,
                 selling_price, profit, profit_rate, total_profit,
@@ -209,6 +586,9 @@ class DatabaseManager:
                 total_profit = VALUES(total_profit),
                 inventory_value = VALUES(inventory_value)
         """
+
+    def save_inventory(self, item_data):
+        query = self._INVENTORY_UPSERT_SQL
         params = (
             item_data['item_name'],
             item_data['quantity'],
@@ -222,6 +602,101 @@ class DatabaseManager:
         )
         return self.execute_query(query, params)
 
+    def replace_inventory(self, rows):
+        """用重算结果替换整张库存表（单个事务）
+
+        批量upsert计算出的物品，并删除已不在结果中的物品；事务提交前其他连接看到的仍是旧数据，
+        不会出现库存表被清空的中间状态。
+
+        Args:
+            rows: [(item_name, quantity, avg_price, break_even_price, selling_price,
+                    profit, profit_rate, total_profit, inventory_value), ...]
+
+        Returns:
+            成功返回None，失败返回错误信息
+        """
+        names = {row[0] for row in rows}
+
+        def delete_stale(cursor):
+            cursor.execute("SELECT item_name FROM inventory FOR UPDATE")
+            stale = [(name,) for (name,) in cursor.fetchall() if name not in names]
+            return [("DELETE FROM inventory WHERE item_name=%s", stale)]
+
+        return self._execute_many_in_transaction([(self._INVENTORY_UPSERT_SQL, list(rows))], prepare=delete_stale)
+
+    # 库存重建使用的影子表、旧表和命名锁
+    INVENTORY_SHADOW_TABLE = 'inventory_shadow'
+    INVENTORY_OLD_TABLE = 'inventory_old'
+    INVENTORY_REBUILD_LOCK = 'gametrad_inventory_rebuild'
+
+    def swap_inventory(self, rows, lock_timeout=10):
+        """用影子表重建库存表
+
+        先把重算结果写入与inventory结构相同的影子表，再用一条RENAME TABLE原子地替换，
+        重建期间其他客户端读到的始终是完整的旧库存表。多个客户端同时重建时通过MySQL命名锁串行执行。
+
+        注意：从读取交易汇总到完成替换之间，其他客户端对inventory的直接修改会被重建结果覆盖，
+        与重算前清空库存表的行为一致。
+
+        Args:
+            rows: 与replace_inventory相同格式的行列表
+            lock_timeout: 等待其他客户端重建完成的秒数
+
+        Returns:
+            成功返回None，失败返回错误信息
+        """
+        shadow, old = self.INVENTORY_SHADOW_TABLE, self.INVENTORY_OLD_TABLE
+        insert_sql = f"""
+            INSERT INTO {shadow} (
+                item_name, quantity, avg_price, break_even_price,
+                selling_price, profit, profit_rate, total_profit,
+                inventory_value
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        conn = self.get_connection()
+        cursor = None
+        locked = False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (self.INVENTORY_REBUILD_LOCK, lock_timeout))
+            locked = cursor.fetchone()[0] == 1
+            if not locked:
+                return "其他客户端正在重建库存表"
+            cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+            cursor.execute(f"CREATE TABLE {shadow} LIKE inventory")
+            rows = list(rows)
+            for start in range(0, len(rows), self.BULK_CHUNK_SIZE):
+                cursor.executemany(insert_sql, rows[start:start + self.BULK_CHUNK_SIZE])
+            conn.commit()
+            cursor.execute(f"DROP TABLE IF EXISTS {old}")
+            cursor.execute(f"RENAME TABLE inventory TO {old}, {shadow} TO inventory")
+            if 'inventory' in self._trigger_versioned_tables:
+                # RENAME会把触发器带到旧表上，影子表没有触发器，需要在新的inventory上重新创建
+                if not create_triggers(cursor, table_version_triggers('inventory')):
+                    DatabaseManager._trigger_versioned_tables = self._trigger_versioned_tables - {'inventory'}
+            cursor.execute(f"DROP TABLE {old}")
+            # 影子表的写入和RENAME都不经过inventory的触发器，由本客户端递增版本号
+            self._commit_changes(conn, cursor, rewritten=('inventory',), force_bump=True)
+            return None
+        except Exception as e:
+            try:
+                conn.rollback()
+                cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+            except Exception:
+                pass
+            print(f"影子表重建库存失败: {e}")
+            return str(e)
+        finally:
+            if cursor:
+                if locked:
+                    try:
+                        cursor.execute("SELECT RELEASE_LOCK(%s)", (self.INVENTORY_REBUILD_LOCK,))
+                        cursor.fetchall()
+                    except Exception:
+                        pass
+                cursor.close()
+            conn.close()
+
     def get_inventory(self):
         query = "SELECT * FROM inventory"
         return self.fetch_all(query)
@@ -240,65 +715,83 @@ class DatabaseManager:
         return self.fetch_one(query, (item_name,))
 
     # 入库记录相关方法
+    _STOCK_IN_INSERT_SQL = """
+        INSERT INTO stock_in (
+            item_name, transaction_time, quantity,
+            cost, avg_cost, note
+        ) VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    @staticmethod
+    def _stock_in_params(stock_in_data):
+        """校验入库数据并转换为INSERT参数，数据不合法时抛出ValueError"""
+        if not isinstance(stock_in_data, dict):
+            raise ValueError("数据格式错误")
+        if not stock_in_data.get('item_name'):
+            raise ValueError("缺少物品名称")
+        if not isinstance(stock_in_data.get('quantity'), (int, float)) or stock_in_data.get('quantity', 0) <= 0:
+            raise ValueError("数量必须大于0")
+        if not isinstance(stock_in_data.get('cost'), (int, float)) or stock_in_data.get('cost', 0) <= 0:
+            raise ValueError("花费必须大于0")
+        if not isinstance(stock_in_data.get('avg_cost'), (int, float)) or stock_in_data.get('avg_cost', 0) <= 0:
+            raise ValueError("均价必须大于0")
+
+        # 确保数值类型正确且为整数
+        return (
+            str(stock_in_data['item_name']),
+            stock_in_data['transaction_time'],
+            int(stock_in_data['quantity']),
+            int(stock_in_data['cost']),
+            int(stock_in_data['avg_cost']),
+            str(stock_in_data.get('note', ''))
+        )
+
     def save_stock_in(self, stock_in_data):
         """保存入库记录"""
         try:
-            # 数据验证
-            if not isinstance(stock_in_data.get('quantity'), (int, float)) or stock_in_data.get('quantity', 0) <= 0:
-                return False
-                
-            if not isinstance(stock_in_data.get('cost'), (int, float)) or stock_in_data.get('cost', 0) <= 0:
-                return False
-                
-            if not isinstance(stock_in_data.get('avg_cost'), (int, float)) or stock_in_data.get('avg_cost', 0) <= 0:
-                return False
-
-            # 确保数值类型正确且为整数
-            quantity = int(stock_in_data['quantity'])
-            cost = int(stock_in_data['cost'])
-            avg_cost = int(stock_in_data['avg_cost'])
-            
-            query = """
-                INSERT INTO stock_in (
-                    item_name, transaction_time, quantity,
-                    cost, avg_cost, note
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            params = (
-                str(stock_in_data['item_name']),
-                stock_in_data['transaction_time'],
-                quantity,
-                cost,
-                avg_cost,
-                str(stock_in_data.get('note', ''))
+            params = self._stock_in_params(stock_in_data)
+            return self.execute_in_transaction(
+                [(self._STOCK_IN_INSERT_SQL, params)]
+                + self._summary_statements(self._summary_add_stock_in(params[0], params[2], params[3], params[1]))
             )
-            return self.execute_query(query, params)
-            
         except Exception:
             return False
 
     def get_stock_in(self):
         query = "SELECT * FROM stock_in ORDER BY transaction_time DESC"
-        return self.fetch_all(query)
+        return self.cached_fetch_all(query, loader=lambda: self.fetch_table_rows('stock_in', 2, query))
 
     def delete_stock_in(self, item_name, transaction_time):
         query = "DELETE FROM stock_in WHERE item_name=%s AND transaction_time=%s"
-        return self.execute_query(query, (item_name, transaction_time))
+        return self.execute_in_transaction(
+            self._summary_statements(self._summary_remove_stock_in(item_name, transaction_time))
+            + [(query, (item_name, transaction_time))]
+            + self._summary_statements(*self._summary_refresh_item(item_name))
+        )
 
     # 出库记录相关方法
-    def save_stock_out(self, stock_out_data):
-        # 数据验证
+    _STOCK_OUT_INSERT_SQL = """
+        INSERT INTO stock_out (
+            item_name, transaction_time, quantity,
+            unit_price, fee, deposit, total_amount, note
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
+    @staticmethod
+    def _stock_out_params(stock_out_data):
+        """校验出库数据并转换为INSERT参数，数据不合法时抛出ValueError"""
+        if not isinstance(stock_out_data, dict):
+            raise ValueError("数据格式错误")
+        if not stock_out_data.get('item_name'):
+            raise ValueError("缺少物品名称")
         if not isinstance(stock_out_data.get('quantity'), (int, float)) or stock_out_data.get('quantity', 0) <= 0:
-            return False
-            
+            raise ValueError("数量必须大于0")
         if not isinstance(stock_out_data.get('unit_price'), (int, float)) or stock_out_data.get('unit_price', 0) <= 0:
-            return False
-            
+            raise ValueError("单价必须大于0")
         if not isinstance(stock_out_data.get('fee'), (int, float)) or stock_out_data.get('fee', 0) < 0:
-            return False
-            
+            raise ValueError("手续费不能为负数")
         if not isinstance(stock_out_data.get('deposit', 0), (int, float)) or stock_out_data.get('deposit', 0) < 0:
-            return False
+            raise ValueError("押金不能为负数")
 
         # 计算总金额
         quantity = float(stock_out_data['quantity'])
@@ -307,13 +800,7 @@ class DatabaseManager:
         deposit = float(stock_out_data.get('deposit', 0))
         total_amount = quantity * unit_price - fee + deposit
 
-        query = """
-            INSERT INTO stock_out (
-                item_name, transaction_time, quantity,
-                unit_price, fee, deposit, total_amount, note
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        params = (
+        return (
             stock_out_data['item_name'],
             stock_out_data['transaction_time'],
             quantity,
@@ -323,66 +810,481 @@ class DatabaseManager:
             total_amount,
             stock_out_data.get('note', '')
         )
-        return self.execute_query(query, params)
+
+    def _summary_add_stock_out_params(self, params):
+        """由出库INSERT参数生成汇总表增量参数"""
+        item_name, transaction_time, quantity, unit_price, fee, _, total_amount, _ = params
+        return self._summary_add_stock_out(
+            item_name, quantity, quantity * unit_price - fee, total_amount, transaction_time
+        )
+
+    def save_stock_out(self, stock_out_data):
+        try:
+            params = self._stock_out_params(stock_out_data)
+        except (ValueError, TypeError, KeyError):
+            return False
+        return self.execute_in_transaction(
+            [(self._STOCK_OUT_INSERT_SQL, params)]
+            + self._summary_statements(self._summary_add_stock_out_params(params))
+        )
 
     def get_stock_out(self):
         query = "SELECT * FROM stock_out ORDER BY transaction_time DESC"
-        return self.fetch_all(query)
+        return self.cached_fetch_all(query, loader=lambda: self.fetch_table_rows('stock_out', 2, query))
 
     def delete_stock_out(self, item_name, transaction_time):
         query = "DELETE FROM stock_out WHERE item_name=%s AND transaction_time=%s"
-        return self.execute_query(query, (item_name, transaction_time))
+        return self.execute_in_transaction(
+            self._summary_statements(self._summary_remove_stock_out(item_name, transaction_time))
+            + [(query, (item_name, transaction_time))]
+            + self._summary_statements(*self._summary_refresh_item(item_name))
+        )
 
-    def add_stock_out(self, item_name, quantity, price, fee, deposit=0.00, note=''):
-        """添加出库记录"""
-        # 数据验证
-        if not isinstance(quantity, (int, float)) or quantity <= 0:
-            return False
-            
-        if not isinstance(price, (int, float)) or price <= 0:
-            return False
-            
-        if not isinstance(fee, (int, float)) or fee < 0:
-            return False
-            
-        if not isinstance(deposit, (int, float)) or deposit < 0:
-            return False
+    # 批量写入相关方法
+    # OCR导入和CSV导入一次提交成百上千条记录。先逐行校验，校验通过的行用executemany
+    # （MySQLdb会合并为多行INSERT）在同一连接、同一事务内写入，返回与输入一一对应的
+    # 结果列表 [(是否成功, 错误信息), ...]。
+    BULK_CHUNK_SIZE = 1000
 
-        now = datetime.now()
-        total_amount = float(quantity) * float(price) - float(fee) + float(deposit)
-        
-        # 获取当前库存总量和总金额
-        inventory = self.fetch_one("SELECT quantity, avg_price FROM inventory WHERE item_name=%s", (item_name,))
-        if not inventory:
-            return False
-        
-        current_quantity, current_avg_price = inventory
-        if current_quantity < quantity:
-            return False
-        
-        # 计算新的库存数量和平均价格
-        new_quantity = current_quantity - quantity
-        new_avg_price = current_avg_price if new_quantity > 0 else 0
-        
-        # 更新库存
-        if not self.execute_query(
-            "UPDATE inventory SET quantity=%s, avg_price=%s WHERE item_name=%s",
-            (new_quantity, new_avg_price, item_name)
-        ):
-            return False
-        
-        # 添加出库记录
-        stock_out_data = {
+    def _execute_many_in_transaction(self, batches, prepare=None, prepare_tables=()):
+        """在同一事务中按批次执行executemany
+
+        Args:
+            batches: [(query, [params, ...]), ...]
+            prepare: 可选，prepare(cursor)在同一事务内最先执行，返回值为追加执行的批次
+            prepare_tables: prepare中直接修改的表
+
+        Returns:
+            成功返回None，失败回滚并返回错误信息
+        """
+        conn = self.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            if prepare is not None:
+                batches = list(batches) + list(prepare(cursor))
+            for query, rows in batches:
+                for start in range(0, len(rows), self.BULK_CHUNK_SIZE):
+                    cursor.executemany(query, rows[start:start + self.BULK_CHUNK_SIZE])
+            self._commit_queries(conn, cursor, [query for query, rows in batches if rows], prepare_tables)
+            return None
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            print(f"批量写入失败: {e}")
+            return str(e)
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _bulk_results(results, error):
+        """事务失败时把所有校验通过的行标记为失败"""
+        if error is None:
+            return results
+        return [(False, f"写入数据库失败: {error}") if ok else (ok, message) for ok, message in results]
+
+    # 入库增加库存：物品不存在时按入库均价新建，存在时累加数量并以最新均价为准
+    # （ON DUPLICATE KEY UPDATE按从左到右的顺序使用新值计算库存价值）
+    _INCREASE_INVENTORY_SQL = """
+        INSERT INTO inventory (
+            item_name, quantity, avg_price, break_even_price,
+            selling_price, profit, profit_rate, total_profit, inventory_value
+        ) VALUES (%s, %s, %s, %s, %s, 0, 0, 0, %s)
+        ON DUPLICATE KEY UPDATE
+            quantity = quantity + VALUES(quantity),
+            avg_price = VALUES(avg_price),
+            break_even_price = VALUES(break_even_price),
+            inventory_value = quantity * avg_price
+    """
+
+    def bulk_save_stock_in(self, records, increase_inventory=False):
+        """批量保存入库记录（单个事务）
+
+        Args:
+            records: 与save_stock_in参数格式相同的字典列表
+            increase_inventory: 为True时在同一事务内增加库存，同一物品数量累加、均价取最后一条
+
+        Returns:
+            [(是否成功, 错误信息), ...]，与records一一对应
+        """
+        results = []
+        rows = []
+        summary_rows = []
+        summary_query = None
+        inventory_updates = {}
+        for data in records:
+            try:
+                params = self._stock_in_params(data)
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                results.append((False, str(e) or "数据格式错误"))
+                continue
+            summary_query, summary_params = self._summary_add_stock_in(params[0], params[2], params[3], params[1])
+            rows.append(params)
+            summary_rows.append(summary_params)
+            results.append((True, None))
+            if increase_inventory:
+                quantity, _ = inventory_updates.get(params[0], (0, 0))
+                inventory_updates[params[0]] = (quantity + data['quantity'], data['avg_cost'])
+
+        if not rows:
+            return results
+        inventory_rows = [
+            (item_name, quantity, avg_cost, avg_cost, avg_cost, quantity * avg_cost)
+            for item_name, (quantity, avg_cost) in inventory_updates.items()
+        ]
+        error = self._execute_many_in_transaction(
+            [(self._STOCK_IN_INSERT_SQL, rows), (self._INCREASE_INVENTORY_SQL, inventory_rows)]
+            + self._summary_statements((summary_query, summary_rows))
+        )
+        if error is None:
+            for item_name, (quantity, avg_cost) in inventory_updates.items():
+                self.log_operation("库存管理", "增加库存", f"物品:{item_name},数量:{quantity},均价:{avg_cost}")
+        return self._bulk_results(results, error)
+
+    def bulk_save_stock_out(self, records, decrease_inventory=False):
+        """批量保存出库记录（单个事务）
+
+        Args:
+            records: 与save_stock_out参数格式相同的字典列表
+            decrease_inventory: 为True时在同一事务内逐条扣减库存，库存不足的记录不写入
+
+        Returns:
+            [(是否成功, 错误信息), ...]，与records一一对应
+        """
+        results = []
+        rows = []
+        for data in records:
+            try:
+                rows.append((len(results), self._stock_out_params(data)))
+                results.append((True, None))
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                results.append((False, str(e) or "数据格式错误"))
+
+        if not rows:
+            return results
+
+        def build_batches(cursor):
+            saved = []
+            for index, params in rows:
+                if decrease_inventory:
+                    # 条件UPDATE在同一语句内完成库存检查和扣减，并发出库时不会超卖
+                    cursor.execute(self._DECREASE_INVENTORY_SQL, (params[2], params[0], params[2]))
+                    if cursor.rowcount <= 0:
+                        # 条件UPDATE未命中：区分物品不在库存中和库存数量不够
+                        cursor.execute("SELECT quantity FROM inventory WHERE item_name=%s", (params[0],))
+                        row = cursor.fetchone()
+                        if row is None:
+                            results[index] = (False, "库存中没有该物品，无法出库")
+                        else:
+                            results[index] = (False, f"库存不足，当前库存 {row[0]}，无法出库数量 {params[2]:g}")
+                        continue
+                saved.append(params)
+            if not saved:
+                return []
+            summary_query = self._summary_add_stock_out_params(saved[0])[0]
+            return [(self._STOCK_OUT_INSERT_SQL, saved)] + self._summary_statements(
+                (summary_query, [self._summary_add_stock_out_params(params)[1] for params in saved])
+            )
+
+        error = self._execute_many_in_transaction(
+            [], prepare=build_batches, prepare_tables=('inventory',) if decrease_inventory else ()
+        )
+        return self._bulk_results(results, error)
+
+    def atomic_stock_out(self, stock_out_data):
+        """出库并扣减库存，在同一连接、同一事务内完成
+
+        库存扣减使用 UPDATE ... WHERE quantity>=%s 条件更新，库存不足时不写入出库记录。
+
+        Returns:
+            (是否成功, 错误信息)
+        """
+        return self.bulk_save_stock_out([stock_out_data], decrease_inventory=True)[0]
+
+    # 物品交易汇总（增量维护的物化库存）相关方法
+    # item_trade_summary 每个物品一行，由stock_in/stock_out上的触发器增量更新（迁移3）；
+    # 数据库账号无法创建触发器时，由本客户端在入库/出库的保存和删除事务内增量更新，
+    # 并在启动时和定时校验（其他客户端的写入不会计入汇总表）。
+    # 读取库存统计时只需扫描物品数量级的数据，而不必重新汇总全部交易记录。
+    _ITEM_SUMS_SQL = """
+        SELECT item_name,
+               SUM(in_qty), SUM(in_amount),
+               SUM(out_qty), SUM(out_amount), SUM(out_total),
+               MAX(last_time)
+        FROM (
+            SELECT item_name,
+                   SUM(quantity) AS in_qty, SUM(cost) AS in_amount,
+                   0 AS out_qty, 0 AS out_amount, 0 AS out_total,
+                   MAX(transaction_time) AS last_time
+            FROM stock_in GROUP BY item_name
+            UNION ALL
+            SELECT item_name,
+                   0, 0,
+                   SUM(quantity), SUM(unit_price * quantity - fee), SUM(total_amount),
+                   MAX(transaction_time)
+            FROM stock_out GROUP BY item_name
+        ) t
+        GROUP BY item_name
+    """
+
+    def _summary_statements(self, *statements):
+        """客户端维护汇总表时返回需要在写入事务中执行的语句，已有触发器时返回空列表"""
+        return [] if self._summary_triggers else list(statements)
+
+    def _summary_add_stock_in(self, item_name, quantity, cost, transaction_time):
+        return ("""
+            INSERT INTO item_trade_summary (item_name, in_qty, in_amount, last_trade_time)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                in_qty = in_qty + VALUES(in_qty),
+                in_amount = in_amount + VALUES(in_amount),
+                last_trade_time = GREATEST(COALESCE(last_trade_time, VALUES(last_trade_time)), VALUES(last_trade_time))
+        """, (item_name, quantity, cost, transaction_time))
+
+    def _summary_add_stock_out(self, item_name, quantity, amount, total_amount, transaction_time):
+        return ("""
+            INSERT INTO item_trade_summary (item_name, out_qty, out_amount, out_total, last_trade_time)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                out_qty = out_qty + VALUES(out_qty),
+                out_amount = out_amount + VALUES(out_amount),
+                out_total = out_total + VALUES(out_total),
+                last_trade_time = GREATEST(COALESCE(last_trade_time, VALUES(last_trade_time)), VALUES(last_trade_time))
+        """, (item_name, quantity, amount, total_amount, transaction_time))
+
+    def _summary_remove_stock_in(self, item_name, transaction_time):
+        """在删除入库记录之前执行，扣减将被删除的记录"""
+        return ("""
+            UPDATE item_trade_summary s
+            JOIN (
+                SELECT COALESCE(SUM(quantity), 0) AS q, COALESCE(SUM(cost), 0) AS c
+                FROM stock_in WHERE item_name=%s AND transaction_time=%s
+            ) d
+            SET s.in_qty = s.in_qty - d.q, s.in_amount = s.in_amount - d.c
+            WHERE s.item_name=%s
+        """, (item_name, transaction_time, item_name))
+
+    def _summary_remove_stock_out(self, item_name, transaction_time):
+        """在删除出库记录之前执行，扣减将被删除的记录"""
+        return ("""
+            UPDATE item_trade_summary s
+            JOIN (
+                SELECT COALESCE(SUM(quantity), 0) AS q,
+                       COALESCE(SUM(unit_price * quantity - fee), 0) AS a,
+                       COALESCE(SUM(total_amount), 0) AS t
+                FROM stock_out WHERE item_name=%s AND transaction_time=%s
+            ) d
+            SET s.out_qty = s.out_qty - d.q, s.out_amount = s.out_amount - d.a, s.out_total = s.out_total - d.t
+            WHERE s.item_name=%s
+        """, (item_name, transaction_time, item_name))
+
+    def _summary_refresh_item(self, item_name):
+        """删除记录后修正最后交易时间，并移除已无任何交易的物品"""
+        return [
+            ("""
+                UPDATE item_trade_summary SET last_trade_time = (
+                    SELECT MAX(t) FROM (
+                        SELECT MAX(transaction_time) AS t FROM stock_in WHERE item_name=%s
+                        UNION ALL
+                        SELECT MAX(transaction_time) FROM stock_out WHERE item_name=%s
+                    ) x
+                )
+                WHERE item_name=%s
+            """, (item_name, item_name, item_name)),
+            ("DELETE FROM item_trade_summary WHERE item_name=%s AND in_qty=0 AND out_qty=0", (item_name,))
+        ]
+
+    @staticmethod
+    def _summary_row_to_dict(row):
+        _, in_qty, in_amount, out_qty, out_amount, out_total, last_trade_time = row
+        return {
+            'in_qty': int(in_qty or 0),
+            'in_amount': float(in_amount or 0),
+            'out_qty': int(out_qty or 0),
+            'out_amount': float(out_amount or 0),
+            'out_total': float(out_total or 0),
+            'last_trade_time': last_trade_time
+        }
+
+    def get_item_summary(self):
+        """读取每个物品的交易汇总
+
+        汇总表最近一次校验存在偏差且无法修复时，直接从交易记录分组汇总。
+
+        Returns:
+            {物品名: {'in_qty', 'in_amount', 'out_qty', 'out_amount', 'out_total', 'last_trade_time'}}
+            其中out_amount为 单价*数量-手续费，out_total为出库记录的总金额（含押金）
+        """
+        if not DatabaseManager._summary_trusted:
+            return self.get_item_trade_sums()
+        return self._read_item_summary()
+
+    def _read_item_summary(self):
+        rows = self.fetch_all(
+            "SELECT item_name, in_qty, in_amount, out_qty, out_amount, out_total, last_trade_time "
+            "FROM item_trade_summary"
+        )
+        return {row[0]: self._summary_row_to_dict(row) for row in rows}
+
+    def rebuild_item_summary(self):
+        """从入库/出库记录完整重建物品交易汇总表"""
+        return self.execute_in_transaction([
+            ("DELETE FROM item_trade_summary", None),
+            ("""
+                INSERT INTO item_trade_summary
+                    (item_name, in_qty, in_amount, out_qty, out_amount, out_total, last_trade_time)
+            """ + self._ITEM_SUMS_SQL, None)
+        ])
+
+    # 分组汇总查询：由数据库按物品GROUP BY求和，传输量只与物品数有关，与交易记录数无关
+    @staticmethod
+    def _time_range_clause(start_time, end_time, params):
+        clause = ""
+        if start_time is not None:
+            clause += " AND transaction_time >= %s"
+            params.append(start_time)
+        if end_time is not None:
+            clause += " AND transaction_time < %s"
+            params.append(end_time)
+        return clause
+
+    def get_stock_in_sums(self, start_time=None, end_time=None):
+        """按物品汇总入库记录
+
+        Returns:
+            {物品名: {'in_qty': SUM(quantity), 'in_amount': SUM(cost)}}
+        """
+        params = []
+        query = ("SELECT item_name, SUM(quantity), SUM(cost) FROM stock_in WHERE 1=1"
+                 + self._time_range_clause(start_time, end_time, params)
+                 + " GROUP BY item_name")
+        return {
+            item_name: {'in_qty': int(qty or 0), 'in_amount': float(amount or 0)}
+            for item_name, qty, amount in self.fetch_all(query, tuple(params))
+        }
+
+    def get_stock_out_sums(self, start_time=None, end_time=None):
+        """按物品汇总出库记录
+
+        Returns:
+            {物品名: {'out_qty': SUM(quantity), 'out_amount': SUM(unit_price*quantity-fee),
+                      'out_total': SUM(total_amount)}}
+        """
+        params = []
+        query = ("SELECT item_name, SUM(quantity), SUM(unit_price * quantity - fee), SUM(total_amount) "
+                 "FROM stock_out WHERE 1=1"
+                 + self._time_range_clause(start_time, end_time, params)
+                 + " GROUP BY item_name")
+        return {
+            item_name: {'out_qty': int(qty or 0), 'out_amount': float(amount or 0), 'out_total': float(total or 0)}
+            for item_name, qty, amount, total in self.fetch_all(query, tuple(params))
+        }
+
+    def get_item_trade_sums(self):
+        """直接从入库/出库记录分组汇总每个物品的交易数据
+
+        返回结构与get_item_summary()相同，但不依赖汇总表，用于库存重算和汇总表校验。
+        """
+        try:
+            return {row[0]: self._summary_row_to_dict(row) for row in self.stream_rows(self._ITEM_SUMS_SQL)}
+        except Exception as e:
+            print(f"汇总交易记录失败: {e}")
+            return {}
+
+    def get_item_quantities_by_note(self, notes):
+        """按备注和物品汇总入库/出库数量
+
+        Args:
+            notes: 需要统计的备注值列表（与去除首尾空格后的备注比较）
+
+        Returns:
+            {(备注, 物品名): {'in': 入库数量, 'out': 出库数量}}
+        """
+        notes = [str(note).strip() for note in notes if str(note).strip()]
+        if not notes:
+            return {}
+        placeholders = ", ".join(["%s"] * len(notes))
+        result = {}
+        for table, key in (('stock_in', 'in'), ('stock_out', 'out')):
+            rows = self.fetch_all(
+                f"SELECT TRIM(note), item_name, SUM(quantity) FROM {table} "
+                f"WHERE TRIM(note) IN ({placeholders}) GROUP BY TRIM(note), item_name",
+                tuple(notes)
+            )
+            for note, item_name, qty in rows:
+                entry = result.setdefault((note, item_name), {'in': 0, 'out': 0})
+                entry[key] += int(qty or 0)
+        return result
+
+    def verify_item_summary(self, repair=False, tolerance=0.01, actual=None):
+        """校验物品交易汇总表与交易记录是否一致
+
+        Args:
+            repair: 发现偏差时是否重建汇总表
+            tolerance: 金额比较允许的误差
+            actual: 已经算好的get_item_trade_sums()结果，为None时重新查询
+
+        Returns:
+            {'checked': 物品数, 'drift': [{'item_name', 'field', 'stored', 'actual'}],
+             'missing': 汇总表缺失的物品, 'extra': 汇总表多余的物品, 'repaired': 是否已重建}
+        """
+        if actual is None:
+            actual = self.get_item_trade_sums()
+        stored = self._read_item_summary()
+
+        report = {
+            'checked': len(actual),
+            'drift': [],
+            'missing': sorted(name for name in actual if name not in stored),
+            'extra': sorted(name for name in stored if name not in actual),
+            'repaired': False
+        }
+        for name, expected in actual.items():
+            current = stored.get(name)
+            if current is None:
+                continue
+            for field in ('in_qty', 'in_amount', 'out_qty', 'out_amount', 'out_total'):
+                if abs(current[field] - expected[field]) > tolerance:
+                    report['drift'].append({
+                        'item_name': name,
+                        'field': field,
+                        'stored': current[field],
+                        'actual': expected[field]
+                    })
+
+        drifted = bool(report['drift'] or report['missing'] or report['extra'])
+        if repair and drifted:
+            report['repaired'] = self.rebuild_item_summary()
+        # 有触发器时偏差只来自触发器创建之前，修复后即可信；没有触发器时偏差说明有其他客户端写入，
+        # 在下次校验一致之前改为直接分组汇总
+        trusted = not drifted or (self._summary_triggers and report['repaired'])
+        if trusted != DatabaseManager._summary_trusted:
+            DatabaseManager._summary_trusted = trusted
+            self.mark_tables_changed_locally('item_trade_summary')
+            print("物品交易汇总表" + ("校验一致，恢复使用汇总表" if trusted else "与交易记录不一致，改为直接汇总交易记录"))
+        return report
+
+    def check_item_summary(self):
+        """校验并修复物品交易汇总表（启动时和定时调用），返回偏差处数"""
+        report = self.verify_item_summary(repair=True)
+        return len(report['drift']) + len(report['missing']) + len(report['extra'])
+
+    def add_stock_out(self, item_name, quantity, price, fee, deposit=0.00, note=''):
+        """添加出库记录并扣减库存（单个事务）"""
+        success, _ = self.atomic_stock_out({
             'item_name': item_name,
-            'transaction_time': now,
+            'transaction_time': datetime.now(),
             'quantity': quantity,
             'unit_price': price,
             'fee': fee,
             'deposit': deposit,
             'note': note
-        }
-        
-        return self.save_stock_out(stock_out_data)
+        })
+        return success
 
     # 交易监控相关方法
     def save_trade_monitor(self, data):
@@ -416,25 +1318,106 @@ class DatabaseManager:
                         data['strategy']
                     )
                 )
-            conn.commit()
+            self._commit_changes(conn, cursor, rewritten=('trade_monitor',) if row else (),
+                                 inserted=() if row else ('trade_monitor',))
         finally:
             cursor.close()
             conn.close()
 
-    def get_trade_monitor(self):
-        query = '''
-        SELECT * FROM trade_monitor ORDER BY monitor_time DESC
-        '''
+    def bulk_upsert_trade_monitor(self, records):
+        """批量保存交易监控记录（单个事务），规则与save_trade_monitor相同：
+        物品已存在时只更新时间、数量、一口价，不存在时插入新记录。
+        同一批中重复的物品以最后一条为准。
+
+        Args:
+            records: 与save_trade_monitor参数格式相同的字典列表
+
+        Returns:
+            [(是否成功, 错误信息), ...]，与records一一对应
+        """
+        results = []
+        latest = {}
+        for data in records:
+            try:
+                item_name = str(data.get('item_name') or '').strip()
+                if not item_name:
+                    raise ValueError("缺少物品名称")
+                row = {
+                    'item_name': item_name,
+                    'monitor_time': data['monitor_time'],
+                    'quantity': int(data.get('quantity') or 0),
+                    'market_price': float(data.get('market_price') or 0),
+                    'target_price': float(data.get('target_price') or 0),
+                    'planned_price': float(data.get('planned_price') or 0),
+                    'break_even_price': float(data.get('break_even_price') or 0),
+                    'profit': float(data.get('profit') or 0),
+                    'profit_rate': float(data.get('profit_rate') or 0),
+                    'strategy': str(data.get('strategy') or '')
+                }
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                results.append((False, str(e) or "数据格式错误"))
+                continue
+            latest[item_name] = row
+            results.append((True, None))
+
+        if not latest:
+            return results
+
         conn = self.get_connection()
-        cursor = conn.cursor()
+        cursor = None
         try:
-            cursor.execute(query)
-            results = cursor.fetchall()
+            cursor = conn.cursor()
+            names = list(latest)
+            existing = set()
+            for start in range(0, len(names), self.BULK_CHUNK_SIZE):
+                chunk = names[start:start + self.BULK_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT item_name FROM trade_monitor WHERE item_name IN ({', '.join(['%s'] * len(chunk))})",
+                    chunk
+                )
+                existing.update(row[0] for row in cursor.fetchall())
+
+            updates = [
+                (row['monitor_time'], row['quantity'], row['market_price'], name)
+                for name, row in latest.items() if name in existing
+            ]
+            inserts = [
+                (name, row['monitor_time'], row['quantity'], row['market_price'], row['target_price'],
+                 row['planned_price'], row['break_even_price'], row['profit'], row['profit_rate'], row['strategy'])
+                for name, row in latest.items() if name not in existing
+            ]
+            if updates:
+                cursor.executemany(
+                    "UPDATE trade_monitor SET monitor_time=%s, quantity=%s, market_price=%s WHERE item_name=%s",
+                    updates
+                )
+            for start in range(0, len(inserts), self.BULK_CHUNK_SIZE):
+                cursor.executemany(
+                    '''INSERT INTO trade_monitor (item_name, monitor_time, quantity, market_price, target_price, planned_price, break_even_price, profit, profit_rate, strategy)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)''',
+                    inserts[start:start + self.BULK_CHUNK_SIZE]
+                )
+            self._commit_changes(conn, cursor, rewritten=('trade_monitor',) if updates else (),
+                                 inserted=('trade_monitor',) if inserts else ())
             return results
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            print(f"批量保存交易监控失败: {e}")
+            return self._bulk_results(results, str(e))
         finally:
-            cursor.close()
+            if cursor:
+                cursor.close()
             conn.close()
 
+    def get_trade_monitor(self):
+        query = '''
+        SELECT * FROM trade_monitor ORDER BY monitor_time DESC
+        '''
+        return self.cached_fetch_all(query)
+
     def delete_trade_monitor(self, item_name, monitor_time):
         query = '''
         DELETE FROM trade_monitor WHERE item_name = %s AND monitor_time = %s
@@ -443,7 +1426,7 @@ class DatabaseManager:
         cursor = conn.cursor()
         try:
             cursor.execute(query, (item_name, monitor_time))
-            conn.commit()
+            self._commit_changes(conn, cursor, rewritten=('trade_monitor',))
         finally:
             cursor.close()
             conn.close()
@@ -485,7 +1468,8 @@ class DatabaseManager:
                     avg_price, 0, 0, 0, inventory_value
                 ))
             
-            conn.commit()
+            self._commit_changes(conn, cursor, rewritten=('inventory',) if exists else (),
+                                 inserted=() if exists else ('inventory',))
             # 记录操作日志
             self.log_operation("库存管理", "增加库存", f"物品:{item_name},数量:{quantity},均价:{avg_price}")
             return True
@@ -498,6 +1482,12 @@ class DatabaseManager:
             cursor.close()
             conn.close()
 
+    # 库存扣减：数量充足时才更新，扣完后均价归零（单表UPDATE按从左到右的顺序使用新值）
+    _DECREASE_INVENTORY_SQL = """
+        UPDATE inventory SET quantity=quantity-%s, avg_price=IF(quantity>0, avg_price, 0)
+        WHERE item_name=%s AND quantity>=%s
+    """
+
     def decrease_inventory(self, item_name, quantity):
         query = """
             UPDATE inventory SET quantity=quantity-%s WHERE item_name=%s AND quantity>=%s
@@ -519,7 +1509,7 @@ class DatabaseManager:
                 )
                 cursor = conn.cursor()
                 cursor.execute(query, params)
-            conn.commit()
+            self._commit_changes(conn, cursor, inserted=('silver_monitor',))
             return True
         except Exception:
             return False
@@ -617,31 +1607,30 @@ class DatabaseManager:
                 operation_data TEXT,
                 reverted BOOLEAN DEFAULT FALSE,
                 update_time DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )''',
+            '''CREATE TABLE IF NOT EXISTS item_trade_summary (
+                item_name VARCHAR(128) NOT NULL PRIMARY KEY,
+                in_qty BIGINT NOT NULL DEFAULT 0,
+                in_amount DECIMAL(20,2) NOT NULL DEFAULT 0,
+                out_qty BIGINT NOT NULL DEFAULT 0,
+                out_amount DECIMAL(20,2) NOT NULL DEFAULT 0,
+                out_total DECIMAL(20,2) NOT NULL DEFAULT 0,
+                last_trade_time DATETIME NULL,
+                update_time DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
             )'''
         ]
         for sql in table_sqls:
             cursor.execute(sql)
-            
-        # 检查是否需要升级operation_logs表
-        try:
-            # 检查是否有操作类别字段
-            cursor.execute("SHOW COLUMNS FROM operation_logs LIKE 'operation_category'")
-            has_category = cursor.fetchone() is not None
-            
-            # 检查是否有可回退字段
-            cursor.execute("SHOW COLUMNS FROM operation_logs LIKE 'can_revert'")
-            has_can_revert = cursor.fetchone() is not None
-            
-            # 如果没有这些字段，添加它们
-            if not has_category:
-                cursor.execute("ALTER TABLE operation_logs ADD COLUMN operation_category VARCHAR(50) AFTER operation_type")
-                print("已添加operation_category字段到operation_logs表")
-                
-            if not has_can_revert:
-                cursor.execute("ALTER TABLE operation_logs ADD COLUMN can_revert BOOLEAN DEFAULT TRUE AFTER reverted")
-                print("已添加can_revert字段到operation_logs表")
-        except Exception as e:
-            print(f"升级数据库表结构时出错: {e}")
+
+        conn.commit()
+
+        # 按版本执行数据库结构迁移（字段升级、索引等），已执行的版本不再检查
+        apply_migrations(conn)
+        DatabaseManager._summary_triggers = triggers_installed(cursor, ITEM_SUMMARY_TRIGGERS)
+        DatabaseManager._table_versions_ready = table_exists(cursor, 'table_versions')
+        DatabaseManager._trigger_versioned_tables = frozenset(
+            table for table in VERSIONED_TABLES if triggers_installed(cursor, table_version_triggers(table))
+        )
         
         # 初始化item_dict表数据（如不存在）
         cursor.execute("SELECT COUNT(*) FROM item_dict")
@@ -655,87 +1644,184 @@ class DatabaseManager:
         cursor.close()
         conn.close()
 
+    _OPERATION_LOG_COLUMNS = """
+        id, operation_type, tab_name, operation_data,
+        operation_time, reverted,
+        IFNULL(operation_category, '') as operation_category,
+        IFNULL(can_revert, TRUE) as can_revert
+    """
+
+    def _log_fulltext_token_size(self):
+        """
+        operation_logs全文索引的ngram分词长度（结果按实例缓存）
+
+        Returns:
+            服务器的ngram_token_size；没有全文索引时返回0
+        """
+        token_size = self.__dict__.get('_log_fulltext')
+        if token_size is None:
+            token_size = 0
+            row = self.fetch_one(
+                "SELECT COUNT(*) FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_logs' AND INDEX_NAME = %s",
+                (OPERATION_LOG_FULLTEXT_INDEX,)
+            )
+            if row and row[0]:
+                row = self.fetch_one("SELECT @@ngram_token_size")
+                token_size = int(row[0]) if row and row[0] else 0
+            self._log_fulltext = token_size
+        return token_size
+
+    @staticmethod
+    def _fulltext_phrase(keyword, token_size):
+        """
+        把关键词转换为全文索引的短语查询，无法用全文索引准确表示时返回None
+
+        ngram按空白切分后为每段生成token_size长的词元，短于token_size的片段不在索引中；
+        含LIKE通配符（%、_）或转义符的关键词在LIKE中不是字面匹配。对这类关键词只用LIKE，
+        避免全文预筛选漏掉LIKE能找到的记录。
+        """
+        if not token_size or any(char in keyword for char in '"%_\\'):
+            return None
+        segments = keyword.split()
+        if not segments or any(len(segment) < token_size for segment in segments):
+            return None
+        return '"' + ' '.join(segments) + '"'
+
+    def _operation_log_filters(self, tab_name=None, op_type=None, keyword=None, reverted=None):
+        """生成操作日志筛选条件，返回(WHERE子句, 参数列表)"""
+        clause = " WHERE 1=1"
+        params = []
+        if tab_name:
+            clause += " AND tab_name LIKE %s"
+            params.append(f"%{tab_name}%")
+        if op_type:
+            clause += " AND operation_type LIKE %s"
+            params.append(f"%{op_type}%")
+        if keyword:
+            # 先用全文索引按短语缩小范围，再用LIKE精确匹配，结果与单独LIKE一致
+            phrase = self._fulltext_phrase(keyword, self._log_fulltext_token_size())
+            if phrase is not None:
+                clause += " AND MATCH(operation_data) AGAINST (%s IN BOOLEAN MODE)"
+                params.append(phrase)
+            clause += " AND operation_data LIKE %s"
+            params.append(f"%{keyword}%")
+        if reverted is not None:
+            clause += " AND reverted=%s"
+            params.append(reverted)
+        return clause, params
+
+    @staticmethod
+    def _operation_log_rows_to_dicts(rows):
+        results = []
+        for row in rows:
+            try:
+                # 解包查询结果
+                id, operation_type, tab_name, operation_data, operation_time, reverted = row[:6]
+                # 获取额外的新字段（如果存在）
+                operation_category = row[6] if len(row) > 6 else ""
+                can_revert = bool(row[7]) if len(row) > 7 else True
+
+                # 解析JSON数据
+                try:
+                    operation_data = json.loads(operation_data)
+                except Exception:
+                    pass
+
+                results.append({
+                    'id': id,
+                    '操作类型': operation_type,
+                    '标签页': tab_name,
+                    '操作时间': operation_time.strftime("%Y-%m-%d %H:%M:%S") if hasattr(operation_time, 'strftime') else str(operation_time),
+                    '数据': operation_data,
+                    '已回退': bool(reverted),
+                    '操作类别': operation_category,
+                    '可回退': can_revert,
+                    # 分页游标：(operation_time, id)
+                    'cursor': (operation_time, id)
+                })
+            except Exception as e:
+                print(f"解析操作日志记录时出错: {e}")
+                continue
+        return results
+
     def get_operation_logs(self, tab_name=None, op_type=None, keyword=None, reverted=None, page=1, page_size=20):
+        # 先写完队列中的日志，保证刚记录的操作能被查到
+        self.flush_operation_logs()
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
-            query = """
-                SELECT 
-                    id, operation_type, tab_name, operation_data, 
-                    operation_time, reverted, 
-                    IFNULL(operation_category, '') as operation_category,
-                    IFNULL(can_revert, TRUE) as can_revert
-                FROM operation_logs 
-                WHERE 1=1
-            """
-            params = []
-            if tab_name:
-                query += " AND tab_name LIKE %s"
-                params.append(f"%{tab_name}%")
-            if op_type:
-                query += " AND operation_type LIKE %s"
-                params.append(f"%{op_type}%")
-            if keyword:
-                query += " AND operation_data LIKE %s"
-                params.append(f"%{keyword}%")
-            if reverted is not None:
-                query += " AND reverted=%s"
-                params.append(reverted)
-            query += " ORDER BY operation_time DESC LIMIT %s OFFSET %s"
+            where, params = self._operation_log_filters(tab_name, op_type, keyword, reverted)
+            query = "SELECT" + self._OPERATION_LOG_COLUMNS + "FROM operation_logs" + where
+            query += " ORDER BY operation_time DESC, id DESC LIMIT %s OFFSET %s"
             params.extend([page_size, (page-1)*page_size])
             cursor.execute(query, tuple(params))
-            results = []
-            for row in cursor.fetchall():
-                try:
-                    # 解包查询结果
-                    id, operation_type, tab_name, operation_data, operation_time, reverted = row[:6]
-                    # 获取额外的新字段（如果存在）
-                    operation_category = row[6] if len(row) > 6 else ""
-                    can_revert = bool(row[7]) if len(row) > 7 else True
-                    
-                    # 解析JSON数据
-                    try:
-                        operation_data = json.loads(operation_data)
-                    except Exception:
-                        pass
-                        
-                    results.append({
-                        'id': id,
-                        '操作类型': operation_type,
-                        '标签页': tab_name,
-                        '操作时间': operation_time.strftime("%Y-%m-%d %H:%M:%S") if hasattr(operation_time, 'strftime') else str(operation_time),
-                        '数据': operation_data,
-                        '已回退': bool(reverted),
-                        '操作类别': operation_category,
-                        '可回退': can_revert
-                    })
-                except Exception as e:
-                    print(f"解析操作日志记录时出错: {e}")
-                    continue
-            return results
+            return self._operation_log_rows_to_dicts(cursor.fetchall())
         finally:
             cursor.close()
             conn.close()
 
-    def count_operation_logs(self, tab_name=None, op_type=None, keyword=None, reverted=None):
+    def iter_operation_logs(self, tab_name=None, op_type=None, keyword=None, reverted=None, chunk_size=None):
+        """流式读取全部符合条件的操作日志（用于导出），按(operation_time, id)倒序逐条返回字典"""
+        self.flush_operation_logs()
+        where, params = self._operation_log_filters(tab_name, op_type, keyword, reverted)
+        query = "SELECT" + self._OPERATION_LOG_COLUMNS + "FROM operation_logs" + where
+        query += " ORDER BY operation_time DESC, id DESC"
+        for rows in self.stream_chunks(query, tuple(params), chunk_size):
+            yield from self._operation_log_rows_to_dicts(rows)
+
+    def get_operation_logs_page(self, tab_name=None, op_type=None, keyword=None, reverted=None,
+                                after=None, before=None, page_size=20):
+        """
+        按游标（键集）分页获取操作日志，按(operation_time, id)倒序
+
+        与LIMIT/OFFSET不同，翻到很深的页时也只需在索引上定位一次，不必扫描并丢弃前面的行。
+        operation_time上的二级索引隐含主键id，因此(operation_time, id)的范围条件可直接走索引。
+
+        Args:
+            after: 上一页最后一行的cursor，获取其后的一页（下一页）
+            before: 当前页第一行的cursor，获取其前的一页（上一页）
+            都不传时返回第一页
+
+        Returns:
+            日志字典列表，每项的'cursor'字段可作为下一次调用的after/before
+        """
+        self.flush_operation_logs()
+        where, params = self._operation_log_filters(tab_name, op_type, keyword, reverted)
+        if after is not None:
+            where += " AND (operation_time < %s OR (operation_time = %s AND id < %s))"
+            params.extend([after[0], after[0], after[1]])
+            order = "DESC"
+        elif before is not None:
+            where += " AND (operation_time > %s OR (operation_time = %s AND id > %s))"
+            params.extend([before[0], before[0], before[1]])
+            order = "ASC"
+        else:
+            order = "DESC"
+        query = ("SELECT" + self._OPERATION_LOG_COLUMNS + "FROM operation_logs" + where
+                 + f" ORDER BY operation_time {order}, id {order} LIMIT %s")
+        params.append(page_size)
+
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
-            query = "SELECT COUNT(*) FROM operation_logs WHERE 1=1"
-            params = []
-            if tab_name:
-                query += " AND tab_name LIKE %s"
-                params.append(f"%{tab_name}%")
-            if op_type:
-                query += " AND operation_type LIKE %s"
-                params.append(f"%{op_type}%")
-            if keyword:
-                query += " AND operation_data LIKE %s"
-                params.append(f"%{keyword}%")
-            if reverted is not None:
-                query += " AND reverted=%s"
-                params.append(reverted)
             cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        if order == "ASC":
+            rows = list(reversed(rows))
+        return self._operation_log_rows_to_dicts(rows)
+
+    def count_operation_logs(self, tab_name=None, op_type=None, keyword=None, reverted=None):
+        # 先写完队列中的日志，保证刚记录的操作能被查到
+        self.flush_operation_logs()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            where, params = self._operation_log_filters(tab_name, op_type, keyword, reverted)
+            cursor.execute("SELECT COUNT(*) FROM operation_logs" + where, tuple(params))
             return cursor.fetchone()[0]
         except Exception:
             return 0
@@ -743,7 +1829,71 @@ class DatabaseManager:
             cursor.close()
             conn.close()
 
+    def count_operation_logs_cached(self, tab_name=None, op_type=None, keyword=None, reverted=None):
+        """
+        带缓存的操作日志计数
+
+        结果按筛选条件缓存，operation_logs的数据版本号变化（后台写入器写入新日志、
+        修改回退状态、删除日志）后自动失效，翻页时不再重复COUNT(*)。
+        """
+        self.flush_operation_logs()
+        key = (tab_name, op_type, keyword, reverted)
+        version = self.get_data_version('operation_logs')
+        cache = self.__dict__.setdefault('_log_count_cache', {})
+        cached = cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        total = self.count_operation_logs(tab_name, op_type, keyword, reverted)
+        if len(cache) > 64:
+            cache.clear()
+        cache[key] = (version, total)
+        return total
+
+    _OPERATION_LOG_INSERT_SQL = """
+        INSERT INTO operation_logs
+            (operation_type, operation_category, tab_name, operation_time, operation_data, reverted, can_revert)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+
+    def get_operation_log_writer(self):
+        """获取（必要时创建）所有实例共用的操作日志后台写入器，日志写入创建它的实例所连接的数据库"""
+        with self._log_writer_lock:
+            if DatabaseManager._log_writer is None:
+                DatabaseManager._log_writer = OperationLogWriter(
+                    self.insert_operation_logs,
+                    batch_size=int(self.config.get('log_batch_size', 100)),
+                    flush_interval=float(self.config.get('log_flush_interval', 1.0))
+                )
+            return DatabaseManager._log_writer
+
+    def insert_operation_logs(self, rows):
+        """多行INSERT写入一批操作日志（单个事务），成功返回None，失败返回错误信息"""
+        return self._execute_many_in_transaction([(self._OPERATION_LOG_INSERT_SQL, list(rows))])
+
+    def flush_operation_logs(self, timeout=5.0):
+        """等待已提交的操作日志全部写入数据库，写入器中没有待写入的日志时立即返回"""
+        writer = DatabaseManager._log_writer
+        return writer.flush(timeout) if writer is not None else True
+
+    def close_operation_log_writer(self, timeout=5.0):
+        """写完剩余的操作日志并停止后台写入线程（程序退出时调用）"""
+        with self._log_writer_lock:
+            writer = DatabaseManager._log_writer
+            DatabaseManager._log_writer = None
+        return writer.close(timeout) if writer is not None else True
+
+    def get_operation_log_stats(self):
+        """获取操作日志写入统计：queue_depth、written、last_flush_latency、avg_flush_latency等"""
+        writer = DatabaseManager._log_writer
+        return writer.stats() if writer is not None else {'queue_depth': 0}
+
     def save_operation_log(self, op_type, tab_name, data=None, reverted=False):
+        """
+        记录操作日志，放入后台写入队列后立即返回
+
+        Returns:
+            入队成功返回True，写入器已关闭返回False（日志尚未写入，不再返回日志id）
+        """
         # 导入操作类型模块
         try:
             from src.utils.operation_types import OperationType
@@ -754,40 +1904,12 @@ class DatabaseManager:
             # 如果模块不存在，使用默认值
             category = ""
             can_revert = True
-        
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            # 检查是否有新字段
-            cursor.execute("SHOW COLUMNS FROM operation_logs LIKE 'operation_category'")
-            has_category = cursor.fetchone() is not None
-            
-            cursor.execute("SHOW COLUMNS FROM operation_logs LIKE 'can_revert'")
-            has_can_revert = cursor.fetchone() is not None
-            
-            if has_category and has_can_revert:
-                # 使用新表结构
-                cursor.execute(
-                    """INSERT INTO operation_logs 
-                       (operation_type, operation_category, tab_name, operation_data, reverted, can_revert) 
-                       VALUES (%s, %s, %s, %s, %s, %s)""",
-                    (op_type, category, tab_name, json.dumps(data, ensure_ascii=False), int(bool(reverted)), int(bool(can_revert)))
-                )
-            else:
-                # 使用旧表结构
-                cursor.execute(
-                    "INSERT INTO operation_logs (operation_type, tab_name, operation_data, reverted) VALUES (%s, %s, %s, %s)",
-                    (op_type, tab_name, json.dumps(data, ensure_ascii=False), int(bool(reverted)))
-                )
-            conn.commit()
-            log_id = cursor.lastrowid
-            return log_id
-        except Exception as e:
-            print(f"保存操作日志失败: {e}")
-            return None
-        finally:
-            cursor.close()
-            conn.close()
+
+        # 操作时间在入队时确定，保证日志时间与实际操作一致
+        return self.get_operation_log_writer().submit((
+            op_type, category, tab_name, datetime.now().replace(microsecond=0),
+            json.dumps(data, ensure_ascii=False), int(bool(reverted)), int(bool(can_revert))
+        ))
 
     def update_operation_log_reverted(self, log_id, reverted=True):
         conn = self.get_connection()
@@ -797,7 +1919,7 @@ class DatabaseManager:
                 "UPDATE operation_logs SET reverted=%s WHERE id=%s",
                 (int(bool(reverted)), log_id)
             )
-            conn.commit()
+            self._commit_changes(conn, cursor, rewritten=('operation_logs',))
         except Exception:
             pass
         finally:
@@ -806,37 +1928,26 @@ class DatabaseManager:
 
     def _load_operation_logs(self):
         """加载操作日志"""
-        try:
-            cursor = self.get_connection().cursor()
-            cursor.execute("SELECT * FROM operation_logs ORDER BY operation_time DESC")
-            logs = cursor.fetchall()
-            cursor.close()
-            return logs
-        except Exception:
-            return [] 
-
-    def log_operation(self, tab_name, op_type, data=None, reverted=False):
-        """记录操作日志"""
+        self.flush_operation_logs()
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
             try:
-                cursor.execute(
-                    "INSERT INTO operation_logs (operation_type, tab_name, operation_data, reverted) VALUES (%s, %s, %s, %s)",
-                    (op_type, tab_name, json.dumps(data, ensure_ascii=False) if data else None, int(bool(reverted)))
-                )
-                conn.commit()
-                log_id = cursor.lastrowid
-                return log_id
-            except Exception as e:
-                print(f"记录操作日志失败: {e}")
-                return None
-            finally:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM operation_logs ORDER BY operation_time DESC")
+                logs = cursor.fetchall()
                 cursor.close()
+                return logs
+            finally:
                 conn.close()
-        except Exception as e:
-            print(f"创建数据库连接失败: {e}")
-            return None
+        except Exception:
+            return [] 
+
+    def log_operation(self, tab_name, op_type, data=None, reverted=False):
+        """记录操作日志（旧接口，不含操作类别），放入后台写入队列；返回值同save_operation_log"""
+        return self.get_operation_log_writer().submit((
+            op_type, None, tab_name, datetime.now().replace(microsecond=0),
+            json.dumps(data, ensure_ascii=False) if data else None, int(bool(reverted)), 1
+        ))
 
     def get_inventory_stats(self):
         """获取库存统计数据：总物品数、总数量、总价值、低库存物品数"""
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# 数据库连接池模块 - 为DatabaseManager及后台线程提供线程安全的MySQL连接复用
+
+import threading
+import time
+from collections import deque
+
+
+class _PoolEntry:
+    """连接池中的一条物理连接及其时间戳"""
+
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledCursor:
+    """游标包装，持有所属连接的引用，避免连接在游标使用期间被提前归还"""
+
+    def __init__(self, cursor, owner):
+        self._cursor = cursor
+        self._owner = owner
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        try:
+            self._cursor.close()
+        except Exception:
+            pass
+
+
+class PooledConnection:
+    """
+    连接池借出的连接代理
+
+    用法与MySQLdb连接一致，调用close()时不会断开物理连接，而是回滚未提交的事务后归还连接池。
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise RuntimeError("数据库连接已归还连接池，不能继续使用")
+        return getattr(entry.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # 兜底：调用方忘记close()时也把连接还给连接池
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def raw(self):
+        """底层MySQLdb连接，仅在需要特殊游标类型等场景使用"""
+        if self._entry is None:
+            raise RuntimeError("数据库连接已归还连接池，不能继续使用")
+        return self._entry.raw
+
+    def cursor(self, *args, **kwargs):
+        return PooledCursor(self.raw.cursor(*args, **kwargs), self)
+
+    def close(self):
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+    def invalidate(self):
+        """标记连接已损坏，归还时直接关闭而不是放回连接池"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry, broken=True)
+
+
+class ConnectionPool:
+    """
+    线程安全的有界MySQL连接池
+
+    Args:
+        connect_func: 创建物理连接的无参函数
+        max_size: 最大连接数（含借出和空闲）
+        acquire_timeout: 连接全部借出时的最长等待秒数
+        idle_timeout: 空闲超过该秒数的连接会被回收
+        max_lifetime: 连接存活超过该秒数后不再复用
+        health_check_interval: 空闲超过该秒数的连接在借出前先ping检查
+    """
+
+    def __init__(self, connect_func, max_size=8, acquire_timeout=30,
+                 idle_timeout=300, max_lifetime=3600, health_check_interval=30):
+        self._connect = connect_func
+        self.max_size = max(1, int(max_size))
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._in_use = 0
+        self._opening = 0
+        self._closed = False
+        self._stats = {
+            'hits': 0,             # 直接复用空闲连接的次数
+            'waits': 0,            # 因连接耗尽而等待的次数
+            'wait_time': 0.0,      # 累计等待秒数
+            'timeouts': 0,         # 等待超时次数
+            'opens': 0,            # 新建物理连接次数
+            'closes': 0,           # 关闭物理连接次数
+            'evictions': 0,        # 因空闲/寿命到期被回收的次数
+            'health_check_failures': 0,  # ping失败后被替换的次数
+        }
+
+    # ---- 借出与归还 ----
+    def acquire(self):
+        """借出一个连接，返回PooledConnection"""
+        deadline = time.monotonic() + self.acquire_timeout
+        waited = False
+        wait_start = None
+        to_close = []
+        entry = None
+        need_open = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("数据库连接池已关闭")
+                to_close.extend(self._evict_expired_locked())
+                if self._idle:
+                    entry = self._idle.pop()
+                    self._in_use += 1
+                    self._stats['hits'] += 1
+                    break
+                if self._in_use + self._opening < self.max_size:
+                    self._opening += 1
+                    need_open = True
+                    break
+                if not waited:
+                    waited = True
+                    wait_start = time.monotonic()
+                    self._stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    self._stats['wait_time'] += time.monotonic() - wait_start
+                    raise RuntimeError(f"获取数据库连接超时（连接池上限 {self.max_size}）")
+                self._cond.wait(remaining)
+            if wait_start is not None:
+                self._stats['wait_time'] += time.monotonic() - wait_start
+
+        self._close_raw_all(to_close)
+
+        if need_open:
+            entry = self._open_entry()
+        else:
+            entry = self._check_health(entry)
+        return PooledConnection(self, entry)
+
+    def release(self, entry, broken=False):
+        """归还连接；broken为True或连接异常时直接关闭"""
+        if not broken:
+            try:
+                # 结束借出期间可能遗留的事务，保证下一个使用者看到最新数据
+                entry.raw.rollback()
+            except Exception:
+                broken = True
+
+        discard = broken
+        with self._cond:
+            self._in_use -= 1
+            now = time.monotonic()
+            if not discard and (self._closed or self._expired(entry, now)):
+                discard = True
+                if not self._closed:
+                    self._stats['evictions'] += 1
+            if not discard:
+                entry.last_used = now
+                self._idle.append(entry)
+            self._cond.notify()
+
+        if discard:
+            self._close_raw_all([entry])
+
+    # ---- 统计与维护 ----
+    def stats(self):
+        """返回连接池统计信息的快照"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+            })
+        return snapshot
+
+    def evict_idle(self):
+        """立即回收所有到期的空闲连接，返回回收数量"""
+        with self._cond:
+            expired = self._evict_expired_locked()
+        self._close_raw_all(expired)
+        return len(expired)
+
+    def close_all(self):
+        """关闭连接池：关闭所有空闲连接，借出中的连接归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_raw_all(idle)
+
+    # ---- 内部方法 ----
+    def _open_entry(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._opening -= 1
+            self._in_use += 1
+            self._stats['opens'] += 1
+        return _PoolEntry(raw)
+
+    def _check_health(self, entry):
+        """对空闲较久的连接做ping检查，失败则换一条新连接"""
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return entry
+        try:
+            entry.raw.ping()
+            return entry
+        except Exception:
+            pass
+        with self._cond:
+            self._in_use -= 1
+            self._opening += 1
+            self._stats['health_check_failures'] += 1
+        self._close_raw_all([entry])
+        return self._open_entry()
+
+    def _expired(self, entry, now):
+        return self.max_lifetime and now - entry.created_at >= self.max_lifetime
+
+    def _evict_expired_locked(self):
+        now = time.monotonic()
+        kept = deque()
+        expired = []
+        for entry in self._idle:
+            if self._expired(entry, now) or (self.idle_timeout and now - entry.last_used >= self.idle_timeout):
+                expired.append(entry)
+            else:
+                kept.append(entry)
+        if expired:
+            self._idle = kept
+            self._stats['evictions'] += len(expired)
+        return expired
+
+    def _close_raw_all(self, entries):
+        for entry in entries:
+            try:
+                entry.raw.close()
+            except Exception:
+                pass
+        if entries:
+            with self._cond:
+                self._stats['closes'] += len(entries)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_shared_pool(key, connect_func, **options):
+    """
+    按连接参数获取进程内共享的连接池
+
+    同一数据库配置下创建的多个DatabaseManager实例（主窗口、库存计算、备份等）共用一个连接池。
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(connect_func, **options)
+            _pools[key] = pool
+        return pool
+
+
+def discard_shared_pool(key):
+    """移除并关闭指定的共享连接池（例如数据库配置变更后）"""
+    with _pools_lock:
+        pool = _pools.pop(key, None)
+    if pool is not None:
+        pool.close_all()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# 公式引擎模块 - 校验并编译自定义字段公式，支持逐行求值和按列（NumPy数组）批量求值
+
+import ast
+import json
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+FORMULA_FILE = "field_formulas.json"
+
+
+class FormulaError(ValueError):
+    """公式语法错误或包含不允许的写法"""
+
+
+# 允许出现在公式中的语法节点：算术、比较、逻辑、条件表达式、变量、常量和白名单函数调用
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Name, ast.Load, ast.Constant, ast.Call,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+# 公式可调用的函数：逐行求值版本
+_SCALAR_FUNCS = {
+    'abs': abs,
+    'round': round,
+    'min': min,
+    'max': max,
+    'int': int,
+    'float': float,
+}
+
+
+def _vec_min(*args):
+    result = args[0]
+    for arg in args[1:]:
+        result = np.minimum(result, arg)
+    return result
+
+
+def _vec_max(*args):
+    result = args[0]
+    for arg in args[1:]:
+        result = np.maximum(result, arg)
+    return result
+
+
+# 公式可调用的函数：按列求值版本
+_VECTOR_FUNCS = {
+    'abs': np.abs,
+    'round': np.round,
+    'min': _vec_min,
+    'max': _vec_max,
+    'int': np.trunc,
+    'float': lambda x: np.asarray(x, dtype=float),
+}
+
+
+def _as_bool(value):
+    value = np.asarray(value)
+    return value if value.dtype == bool else value != 0
+
+
+def _vec_where(test, body, orelse):
+    return np.where(_as_bool(test), body, orelse)
+
+
+# and/or与Python语义一致：返回参与运算的值而不只是真假
+def _vec_and(*values):
+    result = values[0]
+    for value in values[1:]:
+        result = np.where(_as_bool(result), value, result)
+    return result
+
+
+def _vec_or(*values):
+    result = values[0]
+    for value in values[1:]:
+        result = np.where(_as_bool(result), result, value)
+    return result
+
+
+def _vec_not(value):
+    return np.logical_not(_as_bool(value))
+
+
+_VECTOR_HELPERS = {
+    '_where': _vec_where,
+    '_and': _vec_and,
+    '_or': _vec_or,
+    '_not': _vec_not,
+}
+
+
+def _parse(text):
+    """解析公式并检查只包含允许的语法"""
+    if not isinstance(text, str) or not text.strip():
+        raise FormulaError("公式为空")
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as e:
+        raise FormulaError(f"公式语法错误: {e.msg}")
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise FormulaError(f"公式中不允许使用 {type(node).__name__}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _SCALAR_FUNCS or node.keywords:
+                raise FormulaError("公式中只能调用 " + "、".join(_SCALAR_FUNCS))
+        if isinstance(node, ast.Name) and node.id.startswith('_'):
+            raise FormulaError(f"不允许的变量名: {node.id}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, str)):
+            raise FormulaError(f"不允许的常量: {node.value!r}")
+    return tree
+
+
+class _Vectorizer(ast.NodeTransformer):
+    """把条件表达式、逻辑运算和连续比较改写为逐元素的NumPy辅助函数调用"""
+
+    def _call(self, name, args):
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        return self._call('_where', [node.test, node.body, node.orelse])
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        return self._call('_and' if isinstance(node.op, ast.And) else '_or', node.values)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self._call('_not', [node.operand])
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        # a < b < c  ->  _and(a < b, b < c)
+        parts = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            left = right
+        return self._call('_and', parts)
+
+
+@lru_cache(maxsize=256)
+def compile_formula(text):
+    """校验并编译为逐行求值的代码对象，按公式文本缓存"""
+    return compile(_parse(text), '<formula>', 'eval')
+
+
+@lru_cache(maxsize=256)
+def compile_vector_formula(text):
+    """校验并编译为按列求值的代码对象，按公式文本缓存"""
+    tree = ast.fix_missing_locations(_Vectorizer().visit(_parse(text)))
+    return compile(tree, '<formula>', 'eval')
+
+
+def validate_formula(text):
+    """检查公式是否合法，合法返回None，否则返回错误信息"""
+    try:
+        compile_formula(text)
+        return None
+    except FormulaError as e:
+        return str(e)
+
+
+def evaluate(text, ctx, default=0):
+    """逐行求值，公式不合法或计算出错时返回default"""
+    try:
+        code = compile_formula(text)
+        scope = dict(_SCALAR_FUNCS)
+        scope.update(ctx)
+        return eval(code, {'__builtins__': {}}, scope)
+    except Exception:
+        return default
+
+
+def evaluate_columns(text, columns, default=0):
+    """
+    按列求值：columns为 {变量名: 等长数组}，一次计算出所有行的结果
+
+    与逐行求值的结果一致：某一行计算出错（如除以0）时该行取default。
+    公式不合法或整列计算失败时返回全为default的数组。
+    """
+    size = len(next(iter(columns.values()))) if columns else 0
+    try:
+        code = compile_vector_formula(text)
+        scope = dict(_VECTOR_FUNCS)
+        scope.update(_VECTOR_HELPERS)
+        scope.update({name: np.asarray(values) for name, values in columns.items()})
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = np.asarray(eval(code, {'__builtins__': {}}, scope), dtype=float)
+        result = np.broadcast_to(result, (size,)).copy()
+        result[~np.isfinite(result)] = default
+        return result
+    except Exception:
+        return np.full(size, default, dtype=float)
+
+
+class FormulaStore:
+    """
+    自定义公式存储
+
+    field_formulas.json只在首次使用或公式管理窗口保存后读取一次，
+    编译结果按公式文本缓存，刷新表格时不再重复读文件和解析公式。
+    """
+
+    def __init__(self, path=FORMULA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._formulas = None
+
+    def invalidate(self):
+        """公式文件已修改，下次读取时重新加载"""
+        with self._lock:
+            self._formulas = None
+
+    def _load(self):
+        with self._lock:
+            if self._formulas is None:
+                formulas = {}
+                try:
+                    if os.path.exists(self.path):
+                        with open(self.path, "r", encoding="utf-8") as f:
+                            formulas = json.load(f)
+                except Exception as e:
+                    print(f"加载自定义公式失败: {e}")
+                    formulas = {}
+                self._formulas = formulas
+            return self._formulas
+
+    def get_formula(self, page, field):
+        """获取页面字段的自定义公式，未设置时返回None"""
+        formulas = self._load().get(page, {}).get(field)
+        if formulas:
+            return list(formulas.values())[0] or None
+        return None
+
+
+_store = FormulaStore()
+
+
+def get_formula_store():
+    """进程内共享的公式存储"""
+    return _store
@@ -3,6 +3,7 @@ from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox
 import json
 import os
+from src.core.formula_engine import validate_formula, get_formula_store
 
 PAGE_FIELDS = {
     "库存管理": ["物品", "库存数", "总入库均价", "保本均价", "总出库均价", "利润", "利润率", "成交利润额", "库存价值"],
@@ -275,6 +276,14 @@ class FormulaManagerWindow(tb.Toplevel):
             self.destroy()
             return
             
+        # 保存前检查公式，避免刷新表格时才发现公式无效
+        for field, entry in self.entries.items():
+            formula = entry.get().strip()
+            if formula:
+                error = validate_formula(formula)
+                if error:
+                    messagebox.showerror("公式错误", f"字段 {field} 的公式无效: {error}")
+                    return
         # 保存公式
         if page not in self.formula_dict:
             self.formula_dict[page] = {}
@@ -287,6 +296,8 @@ class FormulaManagerWindow(tb.Toplevel):
         try:
             with open("field_formulas.json", "w", encoding="utf-8") as f:
                 json.dump(self.formula_dict, f, ensure_ascii=False, indent=2)
+            # 通知公式引擎重新加载
+            get_formula_store().invalidate()
             messagebox.showinfo("成功", "公式已保存！")
             self.destroy()
         except Exception as e:
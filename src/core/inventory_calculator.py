@@ -1,173 +1,154 @@
 #!/usr/bin/env python
 # 库存计算模块 - 提供库存数据计算功能
 
+import numpy as np
+
 from src.core.db_manager import DatabaseManager
 
+
+def load_trade_columns(trade_sums):
+    """
+    把每个物品的交易汇总转换为按列存放的数组
+
+    Args:
+        trade_sums: get_item_trade_sums()的结果
+
+    Returns:
+        (物品名列表, {'in_qty', 'in_amount', 'out_qty', 'out_amount'}数组字典)
+    """
+    names = list(trade_sums.keys())
+    sums = list(trade_sums.values())
+    count = len(names)
+    columns = {
+        'in_qty': np.fromiter((s['in_qty'] for s in sums), dtype=np.int64, count=count),
+        'in_amount': np.fromiter((s['in_amount'] for s in sums), dtype=np.float64, count=count),
+        'out_qty': np.fromiter((s['out_qty'] for s in sums), dtype=np.int64, count=count),
+        # 出库金额沿用出库记录的总金额（含押金）
+        'out_amount': np.fromiter((s['out_total'] for s in sums), dtype=np.float64, count=count),
+    }
+    return names, columns
+
+
+def compute_inventory_columns(columns):
+    """
+    按列计算所有物品的库存指标
+
+    Args:
+        columns: load_trade_columns()返回的数组字典
+
+    Returns:
+        {'quantity', 'avg_price', 'selling_price', 'profit', 'profit_rate', 'inventory_value'}数组字典
+    """
+    in_qty = columns['in_qty']
+    out_qty = columns['out_qty']
+    has_in = in_qty > 0
+    has_out = out_qty > 0
+
+    # 计算库存数量
+    remain_qty = in_qty - out_qty
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 计算入库均价和出库均价
+        avg_price = np.where(has_in, columns['in_amount'] / np.where(has_in, in_qty, 1), 0.0)
+        out_avg = np.where(has_out, columns['out_amount'] / np.where(has_out, out_qty, 1), 0.0)
+
+        # 计算利润和利润率
+        diff = out_avg - avg_price
+        profit = np.where(has_out, diff * out_qty, 0.0)
+        profit_rate = np.where(has_out & (avg_price > 0), diff / np.where(avg_price > 0, avg_price, 1) * 100, 0.0)
+
+    return {
+        'quantity': remain_qty,
+        'avg_price': avg_price,
+        # 如果未出库，就用入库均价
+        'selling_price': np.where(out_avg > 0, out_avg, avg_price),
+        'profit': profit,
+        'profit_rate': profit_rate,
+        # 计算库存价值
+        'inventory_value': np.where(remain_qty > 0, remain_qty * avg_price, 0.0),
+    }
+
+
 def calculate_inventory(db_manager=None, update_db=True, silent=False):
     """
     计算库存数据，可选择是否更新数据库
-    
+
     Args:
         db_manager: 数据库管理器实例，如果为None则创建新实例
         update_db: 是否更新数据库中的库存表
         silent: 是否静默执行（不打印日志）
-    
+
     Returns:
         计算后的库存数据字典
     """
     if not db_manager:
         db_manager = DatabaseManager()
-    
+
     if not silent:
         print("开始计算库存数据...")
-    
-    # 如果需要更新数据库，先清空现有库存表
-    if update_db:
-        conn = db_manager.get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("TRUNCATE TABLE inventory")
-            conn.commit()
-            if not silent:
-                print("已清空库存表")
-        except Exception as e:
-            if not silent:
-                print(f"清空库存表失败: {e}")
-            return {}
-        finally:
-            cursor.close()
-            conn.close()
-    
-    # 获取所有入库数据
-    stock_in_data = db_manager.get_stock_in()
-    if not silent:
-        print(f"获取到 {len(stock_in_data)} 条入库记录")
-    
-    # 获取所有出库数据
-    stock_out_data = db_manager.get_stock_out()
+
+    # 由数据库按物品分组汇总入库/出库记录，只传输每个物品一行
+    trade_sums = db_manager.get_item_trade_sums()
     if not silent:
-        print(f"获取到 {len(stock_out_data)} 条出库记录")
-    
-    # 计算库存情况
-    inventory = {}
-    
-    # 处理入库数据
-    for record in stock_in_data:
-        try:
-            _, item_name, _, quantity, cost, avg_cost, *_ = record
-            if item_name not in inventory:
-                inventory[item_name] = {
-                    'in_qty': 0, 
-                    'in_amount': 0, 
-                    'out_qty': 0, 
-                    'out_amount': 0
-                }
-            
-            inventory[item_name]['in_qty'] += int(quantity)
-            inventory[item_name]['in_amount'] += float(cost)
-        except Exception as e:
-            if not silent:
-                print(f"处理入库记录时出错: {e}")
-            continue
-    
-    # 处理出库数据
-    for record in stock_out_data:
-        try:
-            _, item_name, _, quantity, unit_price, fee, deposit, total_amount, *_ = record
-            if item_name not in inventory:
-                inventory[item_name] = {
-                    'in_qty': 0, 
-                    'in_amount': 0, 
-                    'out_qty': 0, 
-                    'out_amount': 0
-                }
-            
-            inventory[item_name]['out_qty'] += int(quantity)
-            inventory[item_name]['out_amount'] += float(total_amount)
-        except Exception as e:
-            if not silent:
-                print(f"处理出库记录时出错: {e}")
-            continue
-    
-    # 计算最终库存数据
+        print(f"获取到 {len(trade_sums)} 个物品的交易汇总")
+
+    # 重新计算时顺带校验物品交易汇总表，如有偏差则重建
+    if update_db:
+        report = db_manager.verify_item_summary(repair=True, actual=trade_sums)
+        if not silent:
+            drift_count = len(report['drift']) + len(report['missing']) + len(report['extra'])
+            if drift_count:
+                print(f"交易汇总表存在 {drift_count} 处偏差，重建{'成功' if report['repaired'] else '失败'}")
+
+    # 按列计算所有物品的库存指标
+    names, columns = load_trade_columns(trade_sums)
+    result = compute_inventory_columns(columns)
+
+    # 转换为Python原生类型，便于写库和调用方使用
+    quantity = result['quantity'].tolist()
+    avg_price = result['avg_price'].tolist()
+    selling_price = result['selling_price'].tolist()
+    profit = result['profit'].tolist()
+    profit_rate = result['profit_rate'].tolist()
+    inventory_value = result['inventory_value'].tolist()
+
     result_inventory = {}
-    success_count = 0
-    error_count = 0
-    
-    for item_name, data in inventory.items():
-        try:
-            # 计算库存数量
-            remain_qty = data['in_qty'] - data['out_qty']
-            
-            # 计算均价
-            avg_price = data['in_amount'] / data['in_qty'] if data['in_qty'] > 0 else 0
-            
-            # 计算出库均价
-            out_avg = data['out_amount'] / data['out_qty'] if data['out_qty'] > 0 else 0
-            
-            # 计算利润和利润率
-            profit = (out_avg - avg_price) * data['out_qty'] if data['out_qty'] > 0 else 0
-            profit_rate = ((out_avg - avg_price) / avg_price * 100) if avg_price > 0 and data['out_qty'] > 0 else 0
-            
-            # 计算库存价值
-            inventory_value = remain_qty * avg_price if remain_qty > 0 else 0
-            
-            # 构建库存数据
-            inventory_record = {
-                'item_name': item_name,
-                'quantity': remain_qty,
-                'avg_price': avg_price,
-                'break_even_price': avg_price,  # 保本价等于入库均价
-                'selling_price': out_avg if out_avg > 0 else avg_price,  # 如果未出库，就用入库均价
-                'profit': profit,
-                'profit_rate': profit_rate,
-                'total_profit': profit,  # 成交利润等于利润
-                'inventory_value': inventory_value
-            }
-            
-            # 保存结果
-            result_inventory[item_name] = inventory_record
-            
-            # 如果需要更新数据库，保存库存记录
-            if update_db:
-                conn = db_manager.get_connection()
-                cursor = conn.cursor()
-                try:
-                    cursor.execute("""
-                        INSERT INTO inventory (
-                            item_name, quantity, avg_price, break_even_price, 
-                            selling_price, profit, profit_rate, total_profit, inventory_value
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        item_name, remain_qty, avg_price, avg_price,
-                        out_avg if out_avg > 0 else avg_price, profit, profit_rate, profit, inventory_value
-                    ))
-                    conn.commit()
-                    success_count += 1
-                    if not silent:
-                        print(f"物品 '{item_name}' 库存计算成功: {remain_qty} 个, 均价 {avg_price:.2f}")
-                except Exception as e:
-                    error_count += 1
-                    if not silent:
-                        print(f"物品 '{item_name}' 库存保存失败: {e}")
-                finally:
-                    cursor.close()
-                    conn.close()
-                
-        except Exception as e:
-            error_count += 1
+    rows = []
+    for i, item_name in enumerate(names):
+        result_inventory[item_name] = {
+            'item_name': item_name,
+            'quantity': quantity[i],
+            'avg_price': avg_price[i],
+            'break_even_price': avg_price[i],  # 保本价等于入库均价
+            'selling_price': selling_price[i],
+            'profit': profit[i],
+            'profit_rate': profit_rate[i],
+            'total_profit': profit[i],  # 成交利润等于利润
+            'inventory_value': inventory_value[i]
+        }
+        rows.append((
+            item_name, quantity[i], avg_price[i], avg_price[i], selling_price[i],
+            profit[i], profit_rate[i], profit[i], inventory_value[i]
+        ))
+
+    # 写入影子表后原子替换库存表，重建期间其他客户端仍读到完整的旧数据；
+    # 没有建表/改名权限等情况下退回单事务批量upsert
+    if update_db:
+        error = db_manager.swap_inventory(rows)
+        if error is not None:
+            error = db_manager.replace_inventory(rows)
+        if error is not None:
             if not silent:
-                print(f"处理物品 '{item_name}' 库存时出错: {e}")
-    
+                print(f"保存库存数据失败: {error}")
+            return {}
+
     # 输出结果
     if not silent:
         print(f"\n库存计算完成!")
-        print(f"成功: {success_count} 个物品")
-        print(f"失败: {error_count} 个物品")
-        print(f"库存记录总数: {success_count}")
-    
+        print(f"库存记录总数: {len(result_inventory)}")
+
     return result_inventory
 
 if __name__ == "__main__":
     # 如果直接运行此模块，则执行库存计算并更新数据库
-    calculate_inventory(update_db=True, silent=False) 
\ No newline at end of file
+    calculate_inventory(update_db=True, silent=False)
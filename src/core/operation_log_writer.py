@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# 操作日志写入模块 - 在后台线程中批量写入操作日志，不阻塞界面线程
+
+import atexit
+import queue
+import threading
+import time
+
+
+class _FlushRequest:
+    """插入队列的刷新请求，后台线程写完其之前的所有日志后置位"""
+
+    __slots__ = ('done',)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class OperationLogWriter:
+    """
+    操作日志后台写入器
+
+    调用方只把日志放入队列；后台线程在攒够batch_size条或距上次写入超过flush_interval秒时，
+    用一条多行INSERT在一个事务内写入。写入失败的批次会在下次刷新时重试，超过max_retries次后丢弃；
+    刷新/关闭时的重试按retry_backoff秒起步指数退避，单次等待不超过max_retry_backoff秒。
+
+    Args:
+        write_batch: 写入函数 write_batch(rows)，成功返回None，失败返回错误信息
+        batch_size: 单次写入的最大条数
+        flush_interval: 最长攒批时间（秒）
+        max_retries: 单个批次的最大重试次数
+        retry_backoff: 首次重试前的等待时间（秒）
+        max_retry_backoff: 单次重试等待时间上限（秒）
+    """
+
+    def __init__(self, write_batch, batch_size=100, flush_interval=1.0, max_retries=3,
+                 retry_backoff=0.1, max_retry_backoff=1.0):
+        self._write_batch = write_batch
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        # 已入队但尚未写入或丢弃的日志条数
+        self._pending = 0
+        self._stats = {
+            'enqueued': 0,           # 累计入队条数
+            'written': 0,            # 累计写入成功条数
+            'dropped': 0,            # 重试失败后丢弃的条数
+            'flushes': 0,            # 写入批次数
+            'failures': 0,           # 写入失败次数
+            'last_batch_size': 0,
+            'last_flush_latency': 0.0,   # 最近一次写入耗时（秒）
+            'max_flush_latency': 0.0,
+            'total_flush_latency': 0.0,
+        }
+
+    # ---- 对外接口 ----
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="OperationLogWriter", daemon=True)
+                self._thread.start()
+                # 非GUI脚本退出时也把队列中的日志写完
+                atexit.register(self.close)
+
+    def submit(self, row):
+        """
+        日志入队
+
+        Args:
+            row: (operation_type, operation_category, tab_name, operation_time, operation_data, reverted, can_revert)
+
+        Returns:
+            入队成功返回True，写入器已关闭返回False
+        """
+        if self._closed:
+            return False
+        self.start()
+        with self._lock:
+            self._stats['enqueued'] += 1
+            self._pending += 1
+        self._queue.put(row)
+        return True
+
+    def flush(self, timeout=5.0):
+        """等待当前已入队的日志全部写入，超时返回False；没有待写入的日志时立即返回True"""
+        if not self.pending():
+            return True
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """写完队列中的日志并停止后台线程"""
+        with self._lock:
+            if self._closed:
+                return True
+            self._closed = True
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return True
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def pending(self):
+        """已入队但尚未写入（或丢弃）的日志条数"""
+        with self._lock:
+            return self._pending
+
+    def stats(self):
+        """返回写入统计：队列深度、写入条数、写入耗时等"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['pending'] = self._pending
+        snapshot['queue_depth'] = self._queue.qsize()
+        snapshot['avg_flush_latency'] = (
+            snapshot['total_flush_latency'] / snapshot['flushes'] if snapshot['flushes'] else 0.0
+        )
+        return snapshot
+
+    # ---- 后台线程 ----
+    def _run(self):
+        batch = []
+        retries = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._drain(batch)
+                return
+            if isinstance(item, _FlushRequest):
+                stopping = self._drain(batch)
+                batch, retries, deadline = [], 0, None
+                item.done.set()
+                if stopping:
+                    return
+                continue
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                if self._write(batch):
+                    batch, retries, deadline = [], 0, None
+                else:
+                    retries += 1
+                    if retries > self.max_retries:
+                        self._drop(batch)
+                        batch, retries, deadline = [], 0, None
+                    else:
+                        deadline = time.monotonic() + self.flush_interval
+
+    def _drain(self, batch):
+        """
+        写入batch及队列中剩余的日志（刷新/关闭时调用），失败的部分按重试次数处理
+
+        Returns:
+            队列中有停止标记（close()已在等待）时返回True，后台线程应随即退出
+        """
+        stopping = False
+        flushes = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                flushes.append(item)
+            elif item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    time.sleep(min(self.retry_backoff * 2 ** (attempt - 1), self.max_retry_backoff))
+                if self._write(chunk):
+                    break
+            else:
+                self._drop(chunk)
+        # 队列中的其他刷新请求同样要等这些日志写完才返回
+        for request in flushes:
+            request.done.set()
+        return stopping
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        try:
+            error = self._write_batch(batch)
+        except Exception as e:
+            error = str(e)
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._stats['flushes'] += 1
+            self._stats['last_batch_size'] = len(batch)
+            self._stats['last_flush_latency'] = latency
+            self._stats['total_flush_latency'] += latency
+            self._stats['max_flush_latency'] = max(self._stats['max_flush_latency'], latency)
+            if error is None:
+                self._stats['written'] += len(batch)
+                self._pending -= len(batch)
+            else:
+                self._stats['failures'] += 1
+        if error is not None:
+            print(f"写入操作日志失败: {error}")
+        return error is None
+
+    def _drop(self, batch):
+        with self._lock:
+            self._stats['dropped'] += len(batch)
+            self._pending -= len(batch)
+        print(f"操作日志写入多次失败，已丢弃 {len(batch)} 条")
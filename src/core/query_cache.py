@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# 查询缓存模块 - 按SQL和参数缓存查询结果，支持过期时间和按表失效
+
+import re
+import threading
+import time
+
+# 从查询语句中识别读取的表名
+_READ_TABLES_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)", re.IGNORECASE)
+
+
+def tables_in_query(query):
+    """返回查询语句中FROM/JOIN后的表名集合（小写）"""
+    return {name.lower() for name in _READ_TABLES_RE.findall(query)}
+
+
+class QueryCache:
+    """
+    查询结果缓存
+
+    以 (query, params) 为键保存fetchall结果，超过ttl秒或涉及的表有写入后失效。
+    结果为MySQLdb返回的元组，调用方只读使用，可以在多个标签页之间共享。
+
+    Args:
+        ttl: 缓存有效期（秒），用于兜底其他客户端的写入
+        max_entries: 最多缓存的查询数，超出时淘汰最早写入的一条
+    """
+
+    def __init__(self, ttl=5.0, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries = {}       # key -> (过期时间, 结果, 涉及的表)
+        self._by_table = {}      # 表名 -> {key, ...}
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,          # 因超时失效的次数
+            'invalidations': 0,    # 因表写入而删除的条目数
+        }
+
+    @staticmethod
+    def make_key(query, params):
+        return (' '.join(query.split()), tuple(params) if params else ())
+
+    def get(self, key):
+        """返回 (是否命中, 结果)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return False, None
+            self._stats['hits'] += 1
+            return True, entry[1]
+
+    def put(self, key, result, tables):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, result, tables)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+
+    def invalidate_tables(self, *tables):
+        """删除涉及指定表的所有缓存结果"""
+        with self._lock:
+            for table in tables:
+                for key in list(self._by_table.get(table.lower(), ())):
+                    self._remove(key)
+                    self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+
+    def stats(self):
+        """返回命中、未命中、失效次数和当前条目数"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = len(self._entries)
+        total = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / total if total else 0.0
+        return snapshot
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry[2]:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
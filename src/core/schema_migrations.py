@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# 数据库结构迁移模块 - 按版本号依次执行结构变更，已执行的版本记录在schema_version表中
+
+SCHEMA_VERSION_SQL = '''CREATE TABLE IF NOT EXISTS schema_version (
+    version INT NOT NULL PRIMARY KEY,
+    description VARCHAR(255),
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)'''
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _index_exists(cursor, table, index_name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index_name)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _trigger_exists(cursor, trigger_name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TRIGGERS "
+        "WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = %s",
+        (trigger_name,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def triggers_installed(cursor, triggers):
+    """指定的触发器是否全部存在"""
+    return all(_trigger_exists(cursor, name) for name in triggers)
+
+
+def create_triggers(cursor, triggers):
+    """
+    创建（或替换）触发器
+
+    任一触发器创建失败（常见原因是账号没有TRIGGER权限，或开启binlog时未设置log_bin_trust_function_creators）
+    时删除本组已创建的触发器并返回False，调用方改用客户端维护的方式。
+
+    Args:
+        triggers: {触发器名: CREATE TRIGGER语句}
+    """
+    try:
+        for name, sql in triggers.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS `{name}`")
+            cursor.execute(sql)
+        return True
+    except Exception as e:
+        print(f"创建触发器失败: {e}")
+        for name in triggers:
+            try:
+                cursor.execute(f"DROP TRIGGER IF EXISTS `{name}`")
+            except Exception:
+                pass
+        return False
+
+
+def create_index(cursor, table, index_name, columns, unique=False):
+    """创建索引，已存在时跳过"""
+    if _index_exists(cursor, table, index_name):
+        return False
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    cursor.execute(f"ALTER TABLE `{table}` ADD {kind} `{index_name}` ({columns})")
+    return True
+
+
+# 热点查询使用的索引：(表, 索引名, 列)
+HOT_PATH_INDEXES = [
+    # 按物品筛选并按时间排序、按时间范围统计
+    ('stock_in', 'idx_stock_in_item_time', 'item_name, transaction_time'),
+    ('stock_in', 'idx_stock_in_time', 'transaction_time'),
+    ('stock_out', 'idx_stock_out_item_time', 'item_name, transaction_time'),
+    ('stock_out', 'idx_stock_out_time', 'transaction_time'),
+    # 交易监控按物品查找、按监控时间排序
+    ('trade_monitor', 'idx_trade_monitor_item_time', 'item_name, monitor_time'),
+    ('trade_monitor', 'idx_trade_monitor_time', 'monitor_time'),
+    # 银两行情按服务器+系列筛选并按时间排序
+    ('silver_monitor', 'idx_silver_monitor_server_series_time', 'server, series, timestamp'),
+    ('silver_monitor', 'idx_silver_monitor_time', 'timestamp'),
+    # 操作日志按时间倒序分页
+    ('operation_logs', 'idx_operation_logs_time', 'operation_time'),
+]
+
+
+def _add_operation_log_columns(cursor):
+    """operation_logs增加操作类别和可回退字段（旧版本在每次启动时检查）"""
+    if not _column_exists(cursor, 'operation_logs', 'operation_category'):
+        cursor.execute("ALTER TABLE operation_logs ADD COLUMN operation_category VARCHAR(50) AFTER operation_type")
+        print("已添加operation_category字段到operation_logs表")
+    if not _column_exists(cursor, 'operation_logs', 'can_revert'):
+        cursor.execute("ALTER TABLE operation_logs ADD COLUMN can_revert BOOLEAN DEFAULT TRUE AFTER reverted")
+        print("已添加can_revert字段到operation_logs表")
+
+
+def _create_hot_path_indexes(cursor):
+    for table, index_name, columns in HOT_PATH_INDEXES:
+        if create_index(cursor, table, index_name, columns):
+            print(f"已创建索引 {table}.{index_name}")
+
+
+# 操作日志内容的全文索引名
+OPERATION_LOG_FULLTEXT_INDEX = 'ft_operation_logs_data'
+
+
+def add_operation_log_fulltext(cursor):
+    """
+    为操作日志内容创建ngram全文索引（支持中文）
+
+    建索引时关闭停用词：InnoDB默认停用词表中的词（如in、to、at）会使包含它们的ngram词元不进入索引，
+    短语匹配就会漏掉LIKE能找到的记录。innodb_ft_enable_stopword只在当前会话中关闭，建完恢复。
+    """
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    try:
+        cursor.execute(
+            f"ALTER TABLE operation_logs ADD FULLTEXT INDEX `{OPERATION_LOG_FULLTEXT_INDEX}` "
+            "(operation_data) WITH PARSER ngram"
+        )
+    finally:
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = DEFAULT")
+
+
+def _create_operation_log_fulltext(cursor):
+    """创建操作日志全文索引，服务器不支持时跳过，关键词搜索退回LIKE"""
+    if _index_exists(cursor, 'operation_logs', OPERATION_LOG_FULLTEXT_INDEX):
+        return
+    try:
+        add_operation_log_fulltext(cursor)
+        print(f"已创建全文索引 operation_logs.{OPERATION_LOG_FULLTEXT_INDEX}")
+    except Exception as e:
+        print(f"创建操作日志全文索引失败，关键词搜索将使用LIKE: {e}")
+
+
+def _seed_item_trade_summary(cursor):
+    """从已有交易记录初始化物品交易汇总表"""
+    from src.core.db_manager import DatabaseManager
+    cursor.execute("DELETE FROM item_trade_summary")
+    cursor.execute(
+        "INSERT INTO item_trade_summary "
+        "(item_name, in_qty, in_amount, out_qty, out_amount, out_total, last_trade_time)"
+        + DatabaseManager._ITEM_SUMS_SQL
+    )
+
+
+# 物品交易汇总表由stock_in/stock_out上的触发器维护，Node服务端、旧版客户端和数据恢复写入的记录同样计入汇总
+_SUMMARY_LAST_TIME = """
+    UPDATE item_trade_summary SET last_trade_time = (
+        SELECT MAX(t) FROM (
+            SELECT MAX(transaction_time) AS t FROM stock_in WHERE item_name = {name}
+            UNION ALL
+            SELECT MAX(transaction_time) FROM stock_out WHERE item_name = {name}
+        ) x
+    )
+    WHERE item_name = {name};
+    DELETE FROM item_trade_summary WHERE item_name = {name} AND in_qty = 0 AND out_qty = 0;
+"""
+
+_SUMMARY_ADD_IN = """
+    INSERT INTO item_trade_summary (item_name, in_qty, in_amount, last_trade_time)
+    VALUES (NEW.item_name, NEW.quantity, NEW.cost, NEW.transaction_time)
+    ON DUPLICATE KEY UPDATE
+        in_qty = in_qty + VALUES(in_qty),
+        in_amount = in_amount + VALUES(in_amount),
+        last_trade_time = GREATEST(COALESCE(last_trade_time, VALUES(last_trade_time)), VALUES(last_trade_time));
+"""
+
+_SUMMARY_REMOVE_IN = """
+    UPDATE item_trade_summary SET in_qty = in_qty - OLD.quantity, in_amount = in_amount - OLD.cost
+    WHERE item_name = OLD.item_name;
+"""
+
+_SUMMARY_ADD_OUT = """
+    INSERT INTO item_trade_summary (item_name, out_qty, out_amount, out_total, last_trade_time)
+    VALUES (NEW.item_name, NEW.quantity, NEW.unit_price * NEW.quantity - NEW.fee, NEW.total_amount, NEW.transaction_time)
+    ON DUPLICATE KEY UPDATE
+        out_qty = out_qty + VALUES(out_qty),
+        out_amount = out_amount + VALUES(out_amount),
+        out_total = out_total + VALUES(out_total),
+        last_trade_time = GREATEST(COALESCE(last_trade_time, VALUES(last_trade_time)), VALUES(last_trade_time));
+"""
+
+_SUMMARY_REMOVE_OUT = """
+    UPDATE item_trade_summary SET
+        out_qty = out_qty - OLD.quantity,
+        out_amount = out_amount - (OLD.unit_price * OLD.quantity - OLD.fee),
+        out_total = out_total - OLD.total_amount
+    WHERE item_name = OLD.item_name;
+"""
+
+
+def _after_row_trigger(name, table, event, body):
+    return f"CREATE TRIGGER `{name}` AFTER {event} ON {table} FOR EACH ROW BEGIN {body} END"
+
+
+ITEM_SUMMARY_TRIGGERS = {
+    'trg_stock_in_summary_insert': _after_row_trigger(
+        'trg_stock_in_summary_insert', 'stock_in', 'INSERT', _SUMMARY_ADD_IN),
+    'trg_stock_in_summary_update': _after_row_trigger(
+        'trg_stock_in_summary_update', 'stock_in', 'UPDATE',
+        _SUMMARY_REMOVE_IN + _SUMMARY_ADD_IN
+        + _SUMMARY_LAST_TIME.format(name='OLD.item_name') + _SUMMARY_LAST_TIME.format(name='NEW.item_name')),
+    'trg_stock_in_summary_delete': _after_row_trigger(
+        'trg_stock_in_summary_delete', 'stock_in', 'DELETE',
+        _SUMMARY_REMOVE_IN + _SUMMARY_LAST_TIME.format(name='OLD.item_name')),
+    'trg_stock_out_summary_insert': _after_row_trigger(
+        'trg_stock_out_summary_insert', 'stock_out', 'INSERT', _SUMMARY_ADD_OUT),
+    'trg_stock_out_summary_update': _after_row_trigger(
+        'trg_stock_out_summary_update', 'stock_out', 'UPDATE',
+        _SUMMARY_REMOVE_OUT + _SUMMARY_ADD_OUT
+        + _SUMMARY_LAST_TIME.format(name='OLD.item_name') + _SUMMARY_LAST_TIME.format(name='NEW.item_name')),
+    'trg_stock_out_summary_delete': _after_row_trigger(
+        'trg_stock_out_summary_delete', 'stock_out', 'DELETE',
+        _SUMMARY_REMOVE_OUT + _SUMMARY_LAST_TIME.format(name='OLD.item_name')),
+}
+
+
+def _create_item_summary_triggers(cursor):
+    """创建物品交易汇总触发器后从交易记录初始化汇总表；没有权限时保留客户端维护方式（启动时和定时校验）"""
+    if create_triggers(cursor, ITEM_SUMMARY_TRIGGERS):
+        print("已创建物品交易汇总触发器")
+    else:
+        print("无法创建物品交易汇总触发器，汇总表由本客户端维护并定时校验")
+    _seed_item_trade_summary(cursor)
+
+
+# 库存表按物品名唯一，库存重算可以直接批量upsert
+INVENTORY_ITEM_UNIQUE_INDEX = 'uk_inventory_item'
+
+
+def _unique_inventory_item(cursor):
+    """库存表去重（同名物品保留最新一行）后为item_name添加唯一索引"""
+    cursor.execute(
+        "DELETE i1 FROM inventory i1 JOIN inventory i2 "
+        "ON i1.item_name = i2.item_name AND i1.id < i2.id"
+    )
+    if cursor.rowcount:
+        print(f"已删除库存表中 {cursor.rowcount} 条重复物品记录")
+    create_index(cursor, 'inventory', INVENTORY_ITEM_UNIQUE_INDEX, 'item_name', unique=True)
+
+
+# 多客户端变更检测：每张表一行版本号，由触发器或写入方在写入事务内递增，其他客户端轮询这张小表判断是否需要刷新
+TABLE_VERSIONS_SQL = '''CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    rewrite_version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+)'''
+
+# 记录版本号的表
+VERSIONED_TABLES = ['stock_in', 'stock_out', 'trade_monitor', 'inventory', 'operation_logs', 'silver_monitor']
+
+
+def _create_table_versions(cursor):
+    cursor.execute(TABLE_VERSIONS_SQL)
+    cursor.executemany(
+        "INSERT IGNORE INTO table_versions (table_name, version, rewrite_version) VALUES (%s, 0, 0)",
+        [(table,) for table in VERSIONED_TABLES]
+    )
+
+
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+# 版本号触发器：Node服务端、旧版客户端和数据恢复对这些表的写入同样在写入事务内递增版本号。
+# 触发器按行执行，批量写入时版本号按行数递增，变更检测只关心是否递增
+def table_version_triggers(table):
+    """指定表的版本号触发器 {触发器名: CREATE TRIGGER语句}"""
+    triggers = {}
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        name = f"trg_{table}_version_{event.lower()}"
+        rewrite = 0 if event == 'INSERT' else 1
+        triggers[name] = _after_row_trigger(name, table, event, f"""
+    INSERT INTO table_versions (table_name, version, rewrite_version) VALUES ('{table}', 1, {rewrite})
+    ON DUPLICATE KEY UPDATE version = version + 1, rewrite_version = rewrite_version + {rewrite};
+""")
+    return triggers
+
+
+def _create_version_triggers(cursor):
+    """为各表创建版本号触发器；没有权限的表由本客户端在写入事务中递增版本号"""
+    for table in VERSIONED_TABLES:
+        if create_triggers(cursor, table_version_triggers(table)):
+            print(f"已创建{table}的版本号触发器")
+        else:
+            print(f"无法创建{table}的版本号触发器，版本号由本客户端在写入事务中递增")
+
+
+# 迁移列表：(版本号, 说明, 迁移函数)，版本号只增不改，新的结构变更追加在末尾
+MIGRATIONS = [
+    (1, "operation_logs增加operation_category和can_revert字段", _add_operation_log_columns),
+    (2, "为热点查询列创建索引", _create_hot_path_indexes),
+    (3, "创建维护item_trade_summary的触发器并从交易记录初始化", _create_item_summary_triggers),
+    (4, "operation_logs.operation_data增加ngram全文索引", _create_operation_log_fulltext),
+    (5, "inventory.item_name去重并增加唯一索引", _unique_inventory_item),
+    (6, "创建table_versions表用于多客户端变更检测", _create_table_versions),
+    (7, "为table_versions中的表增加递增版本号的触发器", _create_version_triggers),
+]
+
+
+def get_schema_version(cursor):
+    """获取当前数据库已执行到的迁移版本号"""
+    cursor.execute(SCHEMA_VERSION_SQL)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def apply_migrations(conn, migrations=None):
+    """
+    执行所有未执行的迁移
+
+    每个迁移执行成功后立即记录版本号并提交，失败时停止，后续迁移留到下次启动重试。
+
+    Args:
+        conn: 数据库连接
+        migrations: 迁移列表，默认使用MIGRATIONS
+
+    Returns:
+        执行后的版本号
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    cursor = conn.cursor()
+    try:
+        current = get_schema_version(cursor)
+        conn.commit()
+        for version, description, migrate in sorted(migrations, key=lambda m: m[0]):
+            if version <= current:
+                continue
+            try:
+                migrate(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                conn.commit()
+                current = version
+                print(f"数据库结构已升级到版本 {version}: {description}")
+            except Exception as e:
+                conn.rollback()
+                print(f"数据库结构迁移到版本 {version} 失败: {e}")
+                break
+        return current
+    finally:
+        cursor.close()
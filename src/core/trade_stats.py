@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# 交易统计模块 - 一次遍历物品交易汇总，生成仪表盘和库存表格所需的统计数据
+
+import threading
+
+# 统计结果依赖的数据表，任一表写入后缓存失效
+STATS_TABLES = ('stock_in', 'stock_out', 'item_trade_summary')
+
+# 仪表盘库存详情最多显示的物品数
+TOP_INVENTORY_LIMIT = 7
+
+
+class TradeStatsService:
+    """
+    交易统计服务
+
+    每个刷新周期只读取一次物品交易汇总，在一次遍历中算出各物品指标、总利润、总库存价值
+    和仪表盘库存排行。结果按数据版本号缓存，数据未变化时切换标签页不会重复计算。
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._lock = threading.Lock()
+        self._cache_version = None
+        self._cache = None
+
+    def invalidate(self):
+        """丢弃缓存，下次读取时重新计算"""
+        with self._lock:
+            self._cache_version = None
+            self._cache = None
+
+    def get_snapshot(self, force=False):
+        """
+        获取统计快照
+
+        Returns:
+            {
+                'items': {物品名: {in_qty, in_amount, out_qty, out_amount, out_total, last_trade_time,
+                                   remain_qty, in_avg, out_avg, profit, profit_rate, inventory_value}},
+                'total_profit': 所有有出库物品的成交利润额之和,
+                'total_inventory_value': 库存为正的物品库存价值之和,
+                'top_inventory': [(物品, 格式化库存数, 格式化利润率, 利润率), ...] 最多7项,
+                'version': 计算时的数据版本号
+            }
+        """
+        version = self.db_manager.get_data_version(*STATS_TABLES)
+        with self._lock:
+            if not force and self._cache is not None and self._cache_version == version:
+                return self._cache
+            snapshot = self._compute(self.db_manager.get_item_summary())
+            snapshot['version'] = version
+            self._cache_version = version
+            self._cache = snapshot
+            return snapshot
+
+    # ---- 便捷访问 ----
+    def get_total_profit(self):
+        return self.get_snapshot()['total_profit']
+
+    def get_total_inventory_value(self):
+        return self.get_snapshot()['total_inventory_value']
+
+    def get_top_inventory(self):
+        return self.get_snapshot()['top_inventory']
+
+    # ---- 计算 ----
+    @staticmethod
+    def _compute(summary):
+        items = {}
+        total_profit = 0.0
+        total_value = 0.0
+        ranking = []
+
+        for item_name, data in summary.items():
+            in_qty = data['in_qty']
+            out_qty = data['out_qty']
+            remain_qty = in_qty - out_qty
+            in_avg = data['in_amount'] / in_qty if in_qty else 0
+            out_avg = data['out_amount'] / out_qty if out_qty else 0
+            profit = (out_avg - in_avg) * out_qty if out_qty else 0
+            profit_rate = ((out_avg - in_avg) / in_avg * 100) if in_avg else 0
+            inventory_value = remain_qty * in_avg
+
+            item = dict(data)
+            item.update({
+                'remain_qty': remain_qty,
+                'in_avg': in_avg,
+                'out_avg': out_avg,
+                'profit': profit,
+                'profit_rate': profit_rate,
+                'inventory_value': inventory_value
+            })
+            items[item_name] = item
+
+            # 总成交利润额只计算有出库记录的物品，总库存价值只计算库存为正的物品
+            if out_qty > 0:
+                total_profit += profit
+            if remain_qty > 0:
+                total_value += inventory_value
+
+            # 仪表盘库存排行的利润率只在同时有入库和出库均价时计算
+            rank_rate = (out_avg - in_avg) / in_avg * 100 if in_avg > 0 and out_avg > 0 else 0
+            formatted_qty = f"{int(remain_qty):d}" if abs(remain_qty) < 1000 else f"{int(remain_qty):,d}"
+            ranking.append((item_name, formatted_qty, f"{rank_rate:+.1f}%", rank_rate, remain_qty))
+
+        # 先按库存是否为正排序，再按库存数量绝对值从高到低排序
+        ranking.sort(key=lambda x: (-1 if x[4] > 0 else 1, -abs(int(x[4]))))
+        top_inventory = [row[:4] for row in ranking[:TOP_INVENTORY_LIMIT]]
+
+        return {
+            'items': items,
+            'total_profit': total_profit,
+            'total_inventory_value': total_value,
+            'top_inventory': top_inventory
+        }
@@ -1,4 +1,5 @@
 from src.gui.components.ocr_preview import OCRPreview
 from src.gui.components.ocr_preview_dialog import OCRPreviewDialog
+from src.gui.components.virtual_treeview import VirtualTreeview
 
-__all__ = ['OCRPreview', 'OCRPreviewDialog'] 
\ No newline at end of file
+__all__ = ['OCRPreview', 'OCRPreviewDialog', 'VirtualTreeview'] 
\ No newline at end of file
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# 表格行增量更新模块 - 按行键对比新旧数据，只插入、删除、移动或修改有变化的行
+
+import bisect
+
+
+def _stable_positions(positions):
+    """返回最长递增子序列中元素的下标集合，这些行保持不动，其余行移动到位"""
+    tails = []       # tails[k]: 长度为k+1的递增子序列的最小结尾在positions中的下标
+    tail_values = []
+    prev = [-1] * len(positions)
+    for i, value in enumerate(positions):
+        k = bisect.bisect_left(tail_values, value)
+        if k > 0:
+            prev[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+    stable = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        stable.add(i)
+        i = prev[i]
+    return stable
+
+
+class RowReconciler:
+    """
+    按键增量更新Treeview的行
+
+    每一行用记录的键作为iid，update()时与上次写入的内容对比：
+    新增的行插入、消失的行一次性删除、内容或标签变化的行调用item()修改、顺序变化的行调用move()，
+    未变化的行不产生任何Tk调用，选中、焦点和滚动位置也随之保留。
+
+    直接用tree.item()修改过某行内容后，应调用forget(iid)，下次update()时会重新写入该行。
+
+    Args:
+        tree: ttk.Treeview，或提供get_children/insert/delete/item/move方法的对象
+        parent: 父节点，默认顶层
+    """
+
+    def __init__(self, tree, parent=''):
+        self.tree = tree
+        self.parent = parent
+        self._written = {}       # iid -> 最后一次写入的 (values, tags)
+        self.last_stats = None
+
+    def update(self, rows):
+        """
+        把表格更新为rows
+
+        Args:
+            rows: [(键, values, tags), ...]，按显示顺序排列；键相同的行视为同一条记录
+
+        Returns:
+            本次更新的统计 {'inserted', 'deleted', 'updated', 'moved', 'unchanged', 'tk_calls'}
+        """
+        tree = self.tree
+        desired = []
+        seen = set()
+        for key, values, tags in rows:
+            iid = str(key)
+            if iid in seen:
+                # 键重复时追加序号，保证iid唯一
+                n = 2
+                while f"{iid}#{n}" in seen:
+                    n += 1
+                iid = f"{iid}#{n}"
+            seen.add(iid)
+            desired.append((iid, tuple(values), tuple(tags or ())))
+
+        current = tree.get_children(self.parent)
+        # 表格可能被其他代码修改过，以实际存在的行为准
+        self._written = {iid: row for iid, row in self._written.items() if iid in seen}
+        removed = [iid for iid in current if iid not in seen]
+        if removed:
+            tree.delete(*removed)
+        order = [iid for iid in current if iid in seen]
+        existing = set(order)
+
+        position = {iid: i for i, (iid, _, _) in enumerate(desired)}
+        stable = {order[i] for i in _stable_positions([position[iid] for iid in order])}
+
+        stats = {'inserted': 0, 'deleted': len(removed), 'updated': 0, 'moved': 0, 'unchanged': 0}
+        prev = None
+        for iid, values, tags in desired:
+            if iid not in existing:
+                index = order.index(prev) + 1 if prev is not None else 0
+                tree.insert(self.parent, index, iid=iid, values=values, tags=tags)
+                order.insert(index, iid)
+                stats['inserted'] += 1
+            else:
+                changed = False
+                if iid not in stable:
+                    # 放到上一行之后；上一行此时已在正确位置
+                    order.remove(iid)
+                    index = order.index(prev) + 1 if prev is not None else 0
+                    tree.move(iid, self.parent, index)
+                    order.insert(index, iid)
+                    stats['moved'] += 1
+                    changed = True
+                if self._written.get(iid) != (values, tags):
+                    tree.item(iid, values=values, tags=tags)
+                    stats['updated'] += 1
+                    changed = True
+                if not changed:
+                    stats['unchanged'] += 1
+            self._written[iid] = (values, tags)
+            prev = iid
+
+        stats['tk_calls'] = (1 + (1 if removed else 0) + stats['inserted']
+                             + stats['updated'] + stats['moved'])
+        self.last_stats = stats
+        return stats
+
+    def forget(self, iid=None):
+        """忘记某行（或全部行）上次写入的内容，下次update()时重新写入"""
+        if iid is None:
+            self._written.clear()
+        else:
+            self._written.pop(iid, None)
+
+    def clear(self):
+        """删除全部行"""
+        children = self.tree.get_children(self.parent)
+        if children:
+            self.tree.delete(*children)
+        self._written.clear()
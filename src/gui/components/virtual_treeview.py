@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+# 虚拟表格组件 - 全部行保存在内存模型中，Treeview里只创建可见区域的行
+
+import itertools
+import tkinter as tk
+from tkinter import ttk
+import ttkbootstrap as tb
+from src.gui.components.row_reconciler import RowReconciler
+
+
+def _convert_value(value):
+    """与ttk.Treeview读取values时一致：能转换为整数的值返回int，其余返回字符串"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    text = str(value)
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def _as_tags(tags):
+    if not tags:
+        return ()
+    if isinstance(tags, str):
+        return tuple(tags.split())
+    return tuple(tags)
+
+
+def _sort_key(value):
+    """数字列（含千位分隔符、百分号、货币符号）按数值排序，其余按文本排序"""
+    text = str(value).replace(',', '').replace('%', '').replace('¥', '').strip()
+    try:
+        return (0, float(text), '')
+    except ValueError:
+        return (1, 0.0, str(value))
+
+
+class _NativeRows:
+    """直接调用ttk.Treeview的原生方法，绕过VirtualTreeview的模型接口"""
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def get_children(self, item=''):
+        return ttk.Treeview.get_children(self.tree, item)
+
+    def insert(self, parent, index, iid=None, **kw):
+        return ttk.Treeview.insert(self.tree, parent, index, iid=iid, **kw)
+
+    def delete(self, *items):
+        ttk.Treeview.delete(self.tree, *items)
+
+    def move(self, item, parent, index):
+        ttk.Treeview.move(self.tree, item, parent, index)
+
+    def item(self, item, option=None, **kw):
+        return ttk.Treeview.item(self.tree, item, option, **kw)
+
+
+class VirtualTreeview(tb.Treeview):
+    """
+    虚拟表格
+
+    与ttk.Treeview的常用接口兼容（insert/delete/item/get_children/selection/see/yview等），
+    但所有行只保存在内存模型中，Treeview里只创建当前可见的几十行，滚动时替换可见行。
+    数万行数据刷新时调用一次set_rows()即可，排序(sort_by)和过滤(set_filter)也不需要重新插入。
+    可见行按行id增量更新，滚动或刷新时只修改有变化的行。
+
+    Args:
+        master: 父控件
+        stripe_tags: 交替行标签 (偶数行, 奇数行)，按显示位置添加，排序/过滤后仍然交替
+        pinned_tags: 带有这些标签的行（如合计行）始终显示在最后，不参与排序和过滤
+        其余参数与ttk.Treeview相同
+    """
+
+    def __init__(self, master=None, stripe_tags=None, pinned_tags=('total',), **kw):
+        self._yscrollcommand = kw.pop('yscrollcommand', None)
+        super().__init__(master, **kw)
+        self._rows = {}              # 行id -> [values, tags]，按插入顺序
+        self._ids = itertools.count(1)
+        self._key_ids = {}           # set_rows(keys=...)的行键 -> 行id
+        self._view = None            # 过滤、排序后的行id列表，None表示需要重新计算
+        self._filter = None
+        self._sort = None            # (列下标, 是否倒序)
+        self._offset = 0             # 第一行可见行在_view中的位置
+        self._capacity = max(1, int(kw.get('height', 10)))
+        self._measured = False       # 可见行数是否已按实际行高测量
+        self._window = []            # 当前创建在Treeview中的行id
+        self._native = RowReconciler(_NativeRows(self))
+        self._selected = {}          # 选中的行id（有序集合）
+        self._render_pending = False
+        self._stripe_tags = tuple(stripe_tags) if stripe_tags else None
+        self._pinned_tags = frozenset(pinned_tags or ())
+
+        # 内部事件绑定在单独的bindtag上，不会被调用方的bind()覆盖
+        tag = f"VirtualTreeview{id(self)}"
+        self.bindtags((str(self), tag) + tuple(self.bindtags()[1:]))
+        self.bind_class(tag, '<Configure>', self._on_configure)
+        self.bind_class(tag, '<<TreeviewSelect>>', self._on_native_select)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.bind_class(tag, sequence, self._on_mousewheel)
+        for sequence in ('<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+            self.bind_class(tag, sequence, self._on_key)
+
+    # ---------- 数据模型 ----------
+
+    def set_rows(self, rows, keys=None):
+        """
+        用新数据替换全部行
+
+        Args:
+            rows: [(values, tags), ...]
+            keys: 与rows一一对应的行键（如记录id）。指定后同一键的行保持原来的行id，
+                  选中状态保留，可见行中只有内容变化的行会被修改
+
+        Returns:
+            行id列表
+        """
+        if keys is None:
+            self._rows = {f"R{next(self._ids)}": [values, _as_tags(tags)] for values, tags in rows}
+            self._key_ids = {}
+            self._selected.clear()
+        else:
+            new_rows = {}
+            key_ids = {}
+            for (values, tags), key in zip(rows, keys):
+                vid = self._key_ids.get(key)
+                if vid is None or vid in new_rows:
+                    vid = f"R{next(self._ids)}"
+                key_ids[key] = vid
+                new_rows[vid] = [values, _as_tags(tags)]
+            self._rows = new_rows
+            self._key_ids = key_ids
+            self._selected = {vid: None for vid in self._selected if vid in new_rows}
+        self._invalidate()
+        return list(self._rows)
+
+    def insert(self, parent, index, iid=None, **kw):
+        vid = iid if iid is not None else f"R{next(self._ids)}"
+        row = [kw.get('values', ()), _as_tags(kw.get('tags'))]
+        if index == 'end' or int(index) >= len(self._rows):
+            self._rows.pop(vid, None)
+            self._rows[vid] = row
+        else:
+            items = [(k, v) for k, v in self._rows.items() if k != vid]
+            items.insert(max(0, int(index)), (vid, row))
+            self._rows = dict(items)
+        self._invalidate()
+        return vid
+
+    def delete(self, *items):
+        for vid in items:
+            self._rows.pop(vid, None)
+            self._selected.pop(vid, None)
+        self._invalidate()
+
+    def get_children(self, item=None):
+        if item:
+            return ()
+        return tuple(self._get_view())
+
+    def exists(self, item):
+        return item in self._rows
+
+    def index(self, item):
+        return self._get_view().index(item)
+
+    def item(self, item, option=None, **kw):
+        row = self._rows.get(item)
+        if row is None:
+            raise tk.TclError(f'Item {item} not found')
+        if kw:
+            if 'values' in kw:
+                row[0] = kw['values']
+            if 'tags' in kw:
+                row[1] = _as_tags(kw['tags'])
+            if item in self._window:
+                position = self._offset + self._window.index(item)
+                super().item(item, values=row[0], tags=self._display_tags(position, row[1]))
+                self._native.forget(item)
+            return ''
+        info = {
+            'text': '',
+            'image': '',
+            'values': tuple(_convert_value(v) for v in row[0]),
+            'open': 0,
+            'tags': row[1],
+        }
+        return info[option] if option else info
+
+    def row_count(self):
+        """过滤后的行数"""
+        return len(self._get_view())
+
+    # ---------- 排序和过滤 ----------
+
+    def set_filter(self, predicate):
+        """只显示 predicate(values) 为True的行，None表示不过滤"""
+        self._filter = predicate
+        self._offset = 0
+        self._invalidate()
+
+    def sort_by(self, column, reverse=False):
+        """按列排序，column为列名或列下标，None表示恢复插入顺序"""
+        if column is None:
+            self._sort = None
+        else:
+            if not isinstance(column, int):
+                column = list(self['columns']).index(column)
+            self._sort = (column, reverse)
+        self._invalidate()
+
+    def enable_heading_sort(self):
+        """点击列标题按该列排序，再次点击倒序"""
+        for column in self['columns']:
+            super().heading(column, command=lambda c=column: self._toggle_sort(c))
+
+    def _toggle_sort(self, column):
+        index = list(self['columns']).index(column)
+        self.sort_by(index, reverse=self._sort == (index, False))
+
+    def _get_view(self):
+        if self._view is None:
+            rows = self._rows
+            normal = []
+            pinned = []
+            for vid, (values, tags) in rows.items():
+                if self._pinned_tags and not self._pinned_tags.isdisjoint(tags):
+                    pinned.append(vid)
+                elif self._filter is None or self._filter(values):
+                    normal.append(vid)
+            if self._sort is not None:
+                column, reverse = self._sort
+                normal.sort(
+                    key=lambda vid: _sort_key(rows[vid][0][column] if column < len(rows[vid][0]) else ''),
+                    reverse=reverse
+                )
+            self._view = normal + pinned
+        return self._view
+
+    # ---------- 选择 ----------
+
+    @staticmethod
+    def _flatten(items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            return items[0]
+        return items
+
+    def selection(self):
+        return tuple(vid for vid in self._selected if vid in self._rows)
+
+    def selection_set(self, *items):
+        self._selected = dict.fromkeys(vid for vid in self._flatten(items) if vid in self._rows)
+        self._apply_native_selection()
+
+    def selection_add(self, *items):
+        self._selected.update(dict.fromkeys(vid for vid in self._flatten(items) if vid in self._rows))
+        self._apply_native_selection()
+
+    def selection_remove(self, *items):
+        for vid in self._flatten(items):
+            self._selected.pop(vid, None)
+        self._apply_native_selection()
+
+    def _apply_native_selection(self):
+        super().selection_set([vid for vid in self._window if vid in self._selected])
+
+    def _on_native_select(self, event):
+        # 鼠标点击只能选中可见行，据此更新可见范围内的选中状态
+        native = set(super().selection())
+        for vid in self._window:
+            if vid in native:
+                self._selected[vid] = None
+            else:
+                self._selected.pop(vid, None)
+
+    # ---------- 滚动 ----------
+
+    def yview(self, *args):
+        total = len(self._get_view())
+        if not args:
+            return self._fractions(total)
+        if args[0] == 'moveto':
+            self._offset = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = self._capacity if str(args[2]).startswith('page') else 1
+            self._offset += int(args[1]) * step
+        self._render()
+
+    def yview_moveto(self, fraction):
+        self.yview('moveto', fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview('scroll', number, what)
+
+    def see(self, item):
+        view = self._get_view()
+        try:
+            position = view.index(item)
+        except ValueError:
+            return
+        if position < self._offset:
+            self._offset = position
+        elif position >= self._offset + self._capacity:
+            self._offset = position - self._capacity + 1
+        self._render()
+
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, dict):
+            kw = {**cnf, **kw}
+            cnf = None
+        if 'yscrollcommand' in kw:
+            self._yscrollcommand = kw.pop('yscrollcommand')
+            self._update_scrollbar()
+            if not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def _fractions(self, total):
+        if total == 0:
+            return (0.0, 1.0)
+        return (self._offset / total, min(1.0, (self._offset + len(self._window)) / total))
+
+    def _update_scrollbar(self):
+        if self._yscrollcommand is not None:
+            first, last = self._fractions(len(self._get_view()))
+            self._yscrollcommand(first, last)
+
+    def _on_mousewheel(self, event):
+        if event.num == 4:
+            units = -3
+        elif event.num == 5:
+            units = 3
+        else:
+            units = -3 if event.delta > 0 else 3
+        self.yview('scroll', units, 'units')
+        return 'break'
+
+    def _on_key(self, event):
+        view = self._get_view()
+        if not view:
+            return 'break'
+        focus = super().focus()
+        position = view.index(focus) if focus in self._rows and focus in view else self._offset
+        moves = {'Up': -1, 'Down': 1, 'Prior': -self._capacity, 'Next': self._capacity}
+        if event.keysym == 'Home':
+            position = 0
+        elif event.keysym == 'End':
+            position = len(view) - 1
+        else:
+            position = max(0, min(len(view) - 1, position + moves[event.keysym]))
+        vid = view[position]
+        self._selected = {vid: None}
+        self.see(vid)
+        super().focus(vid)
+        return 'break'
+
+    # ---------- 渲染 ----------
+
+    def _invalidate(self):
+        self._view = None
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _display_tags(self, position, tags):
+        if self._stripe_tags and self._pinned_tags.isdisjoint(tags):
+            return (self._stripe_tags[position % 2],) + tags
+        return tags
+
+    def _render(self):
+        self._render_pending = False
+        if not self.winfo_exists():
+            return
+        view = self._get_view()
+        self._offset = max(0, min(self._offset, len(view) - self._capacity))
+        window = view[self._offset:self._offset + self._capacity]
+
+        # 按行id增量更新可见行，未变化的行不产生Tk调用
+        self._native.update(
+            (vid, self._rows[vid][0], self._display_tags(self._offset + i, self._rows[vid][1]))
+            for i, vid in enumerate(window)
+        )
+        self._window = window
+        self._apply_native_selection()
+        super().yview_moveto(0)
+        self._update_scrollbar()
+        if not self._measured and window:
+            self._measure()
+
+    def _on_configure(self, event):
+        self._measure()
+
+    def _measure(self):
+        """按实际行高计算能完整显示的行数"""
+        children = super().get_children()
+        bbox = super().bbox(children[0]) if children else ''
+        if bbox:
+            top, row_height = bbox[1], bbox[3]
+            self._measured = True
+        else:
+            style = self.cget('style') or 'Treeview'
+            row_height = int(ttk.Style().lookup(style, 'rowheight') or 20)
+            top = row_height  # 表头高度按一行估算
+        capacity = max(1, (self.winfo_height() - top - 2) // max(1, row_height))
+        if self.winfo_height() > 1 and capacity != self._capacity:
+            self._capacity = capacity
+            if not self._render_pending:
+                self._render_pending = True
+                self.after_idle(self._render)
@@ -8,6 +8,7 @@ from src.core.trade_analyzer import TradeAnalyzer
 from datetime import datetime, timedelta
 import json
 from src.core.db_manager import DatabaseManager
+from src.core.trade_stats import TradeStatsService
 import os
 import requests
 import re
@@ -25,6 +26,14 @@ import numpy as np  # 用于统计区
 import time
 import threading
 from src.core.formula_manager import FormulaManagerWindow
+from src.core.formula_engine import get_formula_store, evaluate, evaluate_columns
+from src.core.change_watcher import ChangeWatcher
+from src.core.async_db import AsyncDatabaseManager
+from src.utils.tk_async import TkAsyncBridge
+from src.utils.task_scheduler import TaskScheduler, PRIORITY_LOW
+from src.utils.ocr_batch import OCRBatchService
+from src.utils import ocr
+from src.utils.ocr_backends import create_backend
 from PIL import ImageGrab, ImageTk
 import io, base64
 import tkinter.filedialog as fd
@@ -101,6 +110,34 @@ class GameTradingSystemGUI:
         
         # 初始化数据库管理器（移到这里）
         self.db_manager = DatabaseManager()
+        # 一次刷新中多个标签页重复读取的入库/出库/监控数据走查询缓存
+        self.db_manager.enable_read_cache()
+        # 交易统计服务，仪表盘、库存表格和导出共用一份按数据版本缓存的统计结果
+        self.trade_stats = TradeStatsService(self.db_manager)
+        # 异步数据访问层：多个独立查询在同一个事件循环线程中并发执行，结果经Tk定时器交回主线程
+        self.async_db = AsyncDatabaseManager(self.db_manager)
+        self.tk_async = TkAsyncBridge(self.root, self.async_db.loop_thread)
+        # 各标签页的后台刷新和定时器统一交给调度器，工作线程数取配置项task_workers
+        self.task_scheduler = TaskScheduler(self.root, max_workers=int(self.db_manager.config.get('task_workers', 4)))
+        # OCR后端按部署选择：配置项ocr_backend为http（远程服务，默认）或tesseract（本地识别），
+        # ocr_options为传给后端的参数，如 {"tesseract_cmd": "...", "max_workers": 4}
+        ocr_workers = self.db_manager.config.get('ocr_workers')
+        ocr_backend_name = self.db_manager.config.get('ocr_backend', 'http')
+        if ocr_backend_name != 'http':
+            try:
+                backend = create_backend(ocr_backend_name, **self.db_manager.config.get('ocr_options', {}))
+                ocr.set_backend(backend)
+                # 本地识别时批量并发数默认与识别进程数一致，使所有进程都能用上
+                ocr_workers = ocr_workers or getattr(backend, 'max_workers', None)
+            except Exception as e:
+                print(f"OCR后端 {ocr_backend_name} 不可用，改用远程OCR服务: {e}")
+        # 识别前的图片预处理，默认只灰度化和缩放；配置项ocr_preprocess为false时关闭，为字典时作为预处理参数（可开启裁剪、二值化）
+        try:
+            ocr.set_preprocessor(self.db_manager.config.get('ocr_preprocess', True))
+        except Exception as e:
+            print(f"OCR预处理配置无效，使用默认设置: {e}")
+        # 批量OCR服务，同时识别的图片数取配置项ocr_workers
+        self.ocr_batch = OCRBatchService(max_workers=int(ocr_workers or 4))
         
         # 显示当前数据库名称
         self.root.title(f"GameTrad交易管理系统 v{self.version} - {self.db_manager.config['db']}")
@@ -649,8 +686,11 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
     
     def create_main_interface(self):
         # 创建现代化侧边栏
+        # 隐藏的标签页收到数据变更时推迟到切换回来再刷新
+        self._deferred_refreshes = {}
         self.sidebar = ModernSidebar(self.root, self.ui_manager, callbacks={
-            'on_tab_changed': self._on_tab_changed_ocr
+            'on_tab_changed': self._on_tab_changed_ocr,
+            'on_tab_shown': self._run_deferred_refresh
         })
         
         # 添加标签页到侧边栏
@@ -687,6 +727,11 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
         
         # 启动后自动刷新所有标签页数据
         self.refresh_all()
+
+        # 定时检测其他客户端的数据变更
+        self._start_change_polling()
+        # 校验物品交易汇总表
+        self._start_item_summary_checks()
         
         # 日志持久化
         self.operation_logs = list(self._load_operation_logs())
@@ -791,6 +836,75 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
         # 新增：强制刷新入库表格，确保显示最新数据
         self.refresh_stock_in()
 
+    # 变更检测的表及数据变化时需要刷新的标签页
+    CHANGE_WATCH_TABLES = ['stock_in', 'stock_out', 'inventory', 'trade_monitor', 'operation_logs']
+
+    def _start_change_polling(self):
+        """定时读取table_versions，只在其他客户端修改了数据时刷新对应标签页"""
+        interval = float(self.db_manager.config.get('change_poll_interval', 5))
+        self._change_poll_ms = int(interval * 1000)
+        self._change_watcher = ChangeWatcher(self.db_manager, self.CHANGE_WATCH_TABLES)
+        if self._change_poll_ms > 0:
+            self.task_scheduler.every('change_watcher.poll', self._change_poll_ms, self._poll_changes)
+
+    def _start_item_summary_checks(self):
+        """启动时校验物品交易汇总表；汇总表不由触发器维护时按配置项summary_check_interval（秒）定时校验"""
+        self._check_item_summary()
+        interval = float(self.db_manager.config.get('summary_check_interval', 600))
+        if not self.db_manager._summary_triggers and interval > 0:
+            self.task_scheduler.every('item_summary.check', int(interval * 1000), self._check_item_summary)
+
+    def _check_item_summary(self):
+        self.task_scheduler.submit(
+            'item_summary.check', self.db_manager.check_item_summary,
+            priority=PRIORITY_LOW,
+            on_done=self._on_item_summary_checked,
+            on_error=lambda e: print(f"校验物品交易汇总表失败: {e}")
+        )
+
+    def _on_item_summary_checked(self, drift_count):
+        if drift_count and hasattr(self, 'inventory_tab'):
+            self._refresh_when_visible(self.inventory_tab,
+                                       lambda: self.inventory_tab.refresh_inventory(show_dialog=False))
+
+    def _poll_changes(self):
+        self.task_scheduler.submit(
+            'change_watcher.poll', self._change_watcher.poll,
+            priority=PRIORITY_LOW,
+            on_done=self._on_remote_changes,
+            on_error=lambda e: print(f"检测数据变更失败: {e}")
+        )
+
+    def _on_remote_changes(self, changed):
+        try:
+            if changed:
+                # 入库/出库列表只有新增记录时，get_stock_in/get_stock_out只会查询新行
+                if 'stock_in' in changed and hasattr(self, 'stock_in_tab'):
+                    self._refresh_when_visible(self.stock_in_tab, self.stock_in_tab.refresh_stock_in)
+                if 'stock_out' in changed and hasattr(self, 'stock_out_tab'):
+                    self._refresh_when_visible(self.stock_out_tab, self.stock_out_tab.refresh_stock_out)
+                if changed.keys() & {'stock_in', 'stock_out', 'inventory'} and hasattr(self, 'inventory_tab'):
+                    self._refresh_when_visible(self.inventory_tab,
+                                               lambda: self.inventory_tab.refresh_inventory(show_dialog=False))
+                if 'trade_monitor' in changed and hasattr(self, 'trade_monitor_tab'):
+                    self._refresh_when_visible(self.trade_monitor_tab, self.trade_monitor_tab.refresh_monitor)
+                if 'operation_logs' in changed and hasattr(self, 'log_tab'):
+                    self._refresh_when_visible(self.log_tab, self.log_tab.refresh_log_tab)
+        except Exception as e:
+            print(f"刷新变更数据失败: {e}")
+
+    def _refresh_when_visible(self, tab, refresh):
+        """标签页可见时立即刷新，隐藏时推迟到切换回该标签页时刷新一次"""
+        if self.sidebar.is_tab_visible(tab):
+            refresh()
+        else:
+            self._deferred_refreshes[tab] = refresh
+
+    def _run_deferred_refresh(self, tab):
+        refresh = self._deferred_refreshes.pop(tab, None)
+        if refresh is not None:
+            refresh()
+
     def refresh_all(self):
         """刷新所有数据"""
         # 使用Tab类中的刷新方法，防止重复刷新
@@ -817,82 +931,79 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
         if hasattr(self, 'trade_monitor_tab'):
             self.trade_monitor_tab.refresh_monitor()
     
+    # 库存管理页各字段的默认公式
+    INVENTORY_DEFAULT_FORMULAS = {
+        '利润': '(out_avg - in_avg) * out_qty if out_qty else 0',
+        '利润率': '((out_avg - in_avg) / in_avg * 100) if in_avg else 0',
+        '成交利润额': '(out_avg - in_avg) * out_qty if out_qty else 0',
+        '库存价值': 'remain_qty * in_avg'
+    }
+
+    def _compute_inventory_rows(self, inventory_dict):
+        """
+        按列计算库存表各字段：公式只编译一次，对所有物品一次性求值
+
+        Returns:
+            [(物品, 库存数, 入库均价, 出库均价, 利润, 利润率, 成交利润额, 库存价值), ...]
+        """
+        items = list(inventory_dict.keys())
+        if not items:
+            return []
+        values = list(inventory_dict.values())
+        in_qty = np.array([float(d['in_qty']) for d in values])
+        in_amount = np.array([float(d['in_amount']) for d in values])
+        out_qty = np.array([float(d['out_qty']) for d in values])
+        out_amount = np.array([float(d['out_amount']) for d in values])
+        remain_qty = in_qty - out_qty
+        with np.errstate(divide='ignore', invalid='ignore'):
+            in_avg = np.where(in_qty != 0, in_amount / in_qty, 0.0)
+            out_avg = np.where(out_qty != 0, out_amount / out_qty, 0.0)
+        columns = {
+            'in_qty': in_qty,
+            'in_amount': in_amount,
+            'out_qty': out_qty,
+            'out_amount': out_amount,
+            'remain_qty': remain_qty,
+            'in_avg': in_avg,
+            'out_avg': out_avg,
+            # 公式管理窗口中的中文字段名
+            '库存数': remain_qty,
+            '总入库均价': in_avg,
+            '保本均价': in_avg,
+            '总出库均价': out_avg,
+        }
+        store = get_formula_store()
+        results = {}
+        for field, default in self.INVENTORY_DEFAULT_FORMULAS.items():
+            formula = store.get_formula('库存管理', field) or default
+            results[field] = evaluate_columns(formula, columns)
+        return list(zip(items, remain_qty, in_avg, out_avg, results['利润'], results['利润率'],
+                        results['成交利润额'], results['库存价值']))
+
+    def _inventory_export_rows(self):
+        """导出用的库存数据，与库存表使用相同的自定义公式"""
+        inventory_dict = self.trade_stats.get_snapshot()['items']
+        rows = []
+        for item, remain_qty, in_avg, out_avg, profit, profit_rate, total_profit, value in self._compute_inventory_rows(inventory_dict):
+            rows.append((
+                item,
+                int(remain_qty),
+                int(round(in_avg)),
+                int(round(in_avg)),  # 保本均价=入库均价
+                int(round(out_avg)),
+                int(round(profit)),
+                f"{profit_rate:.2f}%",
+                int(round(total_profit)),
+                int(round(value))
+            ))
+        return rows
+
     def refresh_inventory(self):
-        for item in self.inventory_tab.inventory_tree.get_children():
-            self.inventory_tab.inventory_tree.delete(item)
-        stock_in_data = self.db_manager.get_stock_in()
-        stock_out_data = self.db_manager.get_stock_out()
-        inventory_dict = {}
-        for row in stock_in_data:
-            try:
-                _, item_name, _, qty, cost, *_ = row
-            except Exception as e:
-                messagebox.showerror("数据结构异常", f"入库数据结构异常: {e}\n请检查表结构与代码字段一致性。\nrow={row}")
-                continue
-            if item_name not in inventory_dict:
-                inventory_dict[item_name] = {
-                    'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                }
-            inventory_dict[item_name]['in_qty'] += qty
-            inventory_dict[item_name]['in_amount'] += cost
-        for row in stock_out_data:
-            try:
-                _, item_name, _, qty, unit_price, fee, deposit, total_amount, note, *_ = row
-            except Exception as e:
-                messagebox.showerror("数据结构异常", f"出库数据结构异常: {e}\n请检查表结构与代码字段一致性。\nrow={row}")
-                continue
-            amount = unit_price * qty - fee
-            if item_name not in inventory_dict:
-                inventory_dict[item_name] = {
-                    'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                }
-            inventory_dict[item_name]['out_qty'] += qty
-            inventory_dict[item_name]['out_amount'] += amount
-        formula_dict = {}
-        try:
-            import json
-            if os.path.exists("field_formulas.json"):
-                with open("field_formulas.json", "r", encoding="utf-8") as f:
-                    formula_json = json.load(f)
-                    formula_dict = formula_json.get("库存管理", {})
-        except Exception as e:
-            formula_dict = {}
-        for item, data in inventory_dict.items():
-            remain_qty = data['in_qty'] - data['out_qty']
-            in_avg = data['in_amount'] / data['in_qty'] if data['in_qty'] else 0
-            out_avg = data['out_amount'] / data['out_qty'] if data['out_qty'] else 0
-            default_formula = {
-                '利润': '(out_avg - in_avg) * out_qty if out_qty else 0',
-                '利润率': '((out_avg - in_avg) / in_avg * 100) if in_avg else 0',
-                '成交利润额': '(out_avg - in_avg) * out_qty if out_qty else 0',
-                '库存价值': 'remain_qty * in_avg'
-            }
-            ctx = {
-                'in_qty': data['in_qty'],
-                'in_amount': data['in_amount'],
-                'out_qty': data['out_qty'],
-                'out_amount': data['out_amount'],
-                'remain_qty': remain_qty,
-                'in_avg': in_avg,
-                'out_avg': out_avg
-            }
-            def calc_field(field):
-                formula = None
-                if field in formula_dict:
-                    formulas = formula_dict[field]
-                    if formulas:
-                        formula = list(formulas.values())[0]
-                if not formula:
-                    formula = default_formula.get(field, '0')
-                try:
-                    return eval(formula, {}, ctx)
-                except Exception:
-                    return 0
-            profit = calc_field('利润')
-            profit_rate = calc_field('利润率')
-            total_profit = calc_field('成交利润额')
-            value = calc_field('库存价值')
-            self.inventory_tab.inventory_tree.insert('', 'end', values=(
+        # 使用交易统计服务的物品指标，数据未变化时直接复用缓存
+        inventory_dict = self.trade_stats.get_snapshot()['items']
+        table_data = []
+        for item, remain_qty, in_avg, out_avg, profit, profit_rate, total_profit, value in self._compute_inventory_rows(inventory_dict):
+            table_data.append((
                 item,
                 int(remain_qty),
                 str(int(round(in_avg))),
@@ -903,92 +1014,19 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
                 f"{int(total_profit/10000)}万",  # 成交利润额以万为单位整数
                 f"{value/10000:.2f}万"  # 库存价值以万为单位保留两位小数
             ))
+        self._draw_inventory(table_data)
 
     def _fetch_and_draw_inventory(self):
         # 数据库操作放到后台线程
         try:
-            stock_in_data = self.db_manager.get_stock_in()
-            stock_out_data = self.db_manager.get_stock_out()
-            inventory_dict = {}
-            # 统计入库
-            for row in stock_in_data:
-                try:
-                    _, item_name, _, qty, cost, *_ = row
-                except Exception as e:
-                    # 在后台线程中记录错误，不弹出对话框
-                    print(f"入库数据结构异常: {e}\n请检查表结构与代码字段一致性。\nrow={row}")
-                    continue
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['in_qty'] += qty
-                inventory_dict[item_name]['in_amount'] += cost
-            # 统计出库
-            for row in stock_out_data:
-                try:
-                    _, item_name, _, qty, unit_price, fee, deposit, total_amount, note, *_ = row
-                except Exception as e:
-                    # 在后台线程中记录错误，不弹出对话框
-                    print(f"出库数据结构异常: {e}\n请检查表结构与代码字段一致性。\nrow={row}")
-                    continue
-                amount = unit_price * qty - fee
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['out_qty'] += qty
-                inventory_dict[item_name]['out_amount'] += amount
-            # 加载自定义公式
-            formula_dict = {}
-            try:
-                import json
-                if os.path.exists("field_formulas.json"):
-                    with open("field_formulas.json", "r", encoding="utf-8") as f:
-                        formula_json = json.load(f)
-                        formula_dict = formula_json.get("库存管理", {})
-            except Exception as e:
-                formula_dict = {}
-            # 生成库存表数据
+            # 使用交易统计服务的物品指标，数据未变化时直接复用缓存
+            inventory_dict = self.trade_stats.get_snapshot()['items']
+            # 生成库存表数据（自定义公式按列批量求值）
             table_data = []
-            for item, data in inventory_dict.items():
-                remain_qty = data['in_qty'] - data['out_qty']
-                in_avg = data['in_amount'] / data['in_qty'] if data['in_qty'] else 0
-                out_avg = data['out_amount'] / data['out_qty'] if data['out_qty'] else 0
-                default_formula = {
-                    '利润': '(out_avg - in_avg) * out_qty if out_qty else 0',
-                    '利润率': '((out_avg - in_avg) / in_avg * 100) if in_avg else 0',
-                    '成交利润额': '(out_avg - in_avg) * out_qty if out_qty else 0',
-                    '库存价值': 'remain_qty * in_avg'
-                }
-                ctx = {
-                    'in_qty': data['in_qty'],
-                    'in_amount': data['in_amount'],
-                    'out_qty': data['out_qty'],
-                    'out_amount': data['out_amount'],
-                    'remain_qty': remain_qty,
-                    'in_avg': in_avg,
-                    'out_avg': out_avg
-                }
-                def calc_field(field):
-                    formula = None
-                    if field in formula_dict:
-                        formulas = formula_dict[field]
-                        if formulas:
-                            formula = list(formulas.values())[0]
-                    if not formula:
-                        formula = default_formula.get(field, '0')
-                    try:
-                        return eval(formula, {}, ctx)
-                    except Exception:
-                        return 0
-                profit = calc_field('利润')
-                profit_rate = calc_field('利润率')
-                total_profit = calc_field('成交利润额')
-                value = calc_field('库存价值')
+            for item, remain_qty, in_avg, out_avg, profit, profit_rate, total_profit, value in self._compute_inventory_rows(inventory_dict):
                 table_data.append((
                     item,
-                    remain_qty,
+                    int(remain_qty),
                     f"{in_avg:.2f}",
                     f"{in_avg:.2f}",
                     f"{out_avg:.2f}",
@@ -1006,25 +1044,24 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
             self.root.after(0, lambda e=e: print(f"获取库存数据失败: {e}"))
 
     def _draw_inventory(self, table_data):
-        for item in self.inventory_tab.inventory_tree.get_children():
-            self.inventory_tab.inventory_tree.delete(item)
-        for row in table_data:
-            self.inventory_tab.inventory_tree.insert('', 'end', values=row)
+        # 按物品名保持行id，只更新有变化的行
+        self.inventory_tab.inventory_tree.set_rows(
+            [(row, ()) for row in table_data], keys=[row[0] for row in table_data]
+        )
 
     def refresh_stock_in(self):
         """刷新入库记录"""
         self.stock_in_tab.refresh_stock_in()
 
     def refresh_stock_out(self):
-        for item in self.stock_out_tab.stock_out_tree.get_children():
-            self.stock_out_tab.stock_out_tree.delete(item)
         records = self.db_manager.get_stock_out()
         filter_text = self.stock_out_filter_var.get().strip().lower() if hasattr(self, 'stock_out_filter_var') else ''
         keywords = filter_text.split()
         filtered = []
+        keys = []
         for record in records:
             try:
-                _, item_name, transaction_time, quantity, unit_price, fee, deposit, total_amount, note, *_ = record
+                record_id, item_name, transaction_time, quantity, unit_price, fee, deposit, total_amount, note, *_ = record
                 name_lc = str(item_name).lower()
                 if keywords and not all(k in name_lc for k in keywords):
                     continue
@@ -1038,10 +1075,12 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
                     note if note is not None else ''
                 )
                 filtered.append(values)
-                self.stock_out_tab.stock_out_tree.insert('', 'end', values=values)
+                keys.append(record_id)
             except Exception as e:
                 messagebox.showerror("数据结构异常", f"出库数据结构异常: {e}\n请检查表结构与代码字段一致性。\nrecord={record}")
                 continue
+        # 按记录id保持行id，只更新有变化的行
+        self.stock_out_tab.stock_out_tree.set_rows([(values, ()) for values in filtered], keys=keys)
         # 合计行
         if filter_text and filtered:
             total_qty = sum(int(row[2]) for row in filtered)
@@ -1052,24 +1091,16 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
             ), tags=('total',))
 
     def refresh_monitor(self):
-        threading.Thread(target=self._fetch_and_draw_monitor, daemon=True).start()
+        # 与交易监控标签页的刷新是不同的回调，使用各自的任务键
+        self.task_scheduler.submit('main_window.trade_monitor_refresh', self._fetch_and_draw_monitor)
 
     def _fetch_and_draw_monitor(self):
         monitor_data = self.db_manager.get_trade_monitor()
         table_data = []
-        # 加载自定义公式
-        formula_dict = {}
-        try:
-            import json
-            if os.path.exists("field_formulas.json"):
-                with open("field_formulas.json", "r", encoding="utf-8") as f:
-                    formula_json = json.load(f)
-                    formula_dict = formula_json.get("交易监控", {})
-        except Exception as e:
-            formula_dict = {}
+        formula_store = get_formula_store()
         for item in monitor_data:
             try:
-                _, item_name, monitor_time, quantity, market_price, target_price, planned_price, break_even_price, profit, profit_rate, strategy, *_ = item
+                item_id, item_name, monitor_time, quantity, market_price, target_price, planned_price, break_even_price, profit, profit_rate, strategy, *_ = item
                 # 构建上下文
                 ctx = {
                     '物品': item_name,
@@ -1085,21 +1116,14 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
                 }
                 # 依次应用自定义公式
                 def calc_field(field, default_value):
-                    formula = None
-                    if field in formula_dict:
-                        formulas = formula_dict[field]
-                        if formulas:
-                            formula = list(formulas.values())[0]
+                    formula = formula_store.get_formula('交易监控', field)
                     if not formula:
                         return default_value
-                    try:
-                        return eval(formula, {}, ctx)
-                    except Exception:
-                        return default_value
+                    return evaluate(formula, ctx, default_value)
                 break_even_price_val = calc_field('保本卖出价', float(break_even_price))
                 profit_val = calc_field('利润', float(profit))
                 profit_rate_val = calc_field('利润率', float(profit_rate))
-                table_data.append((
+                table_data.append((item_id, (
                     item_name,
                     monitor_time.strftime("%Y-%m-%d %H:%M:%S") if hasattr(monitor_time, 'strftime') else str(monitor_time),
                     int(quantity),
@@ -1110,18 +1134,17 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
                     f"{profit_val:.2f}",
                     f"{profit_rate_val:.2f}%",
                     strategy
-                ))
+                )))
             except Exception as e:
                 messagebox.showerror("数据结构异常", f"监控数据结构异常: {e}\n请检查表结构与代码字段一致性。\nitem={item}")
                 continue
         self.root.after(0, lambda: self._draw_monitor(table_data))
 
     def _draw_monitor(self, table_data):
-        for item in self.trade_monitor_tab.monitor_tree.get_children():
-            self.trade_monitor_tab.monitor_tree.delete(item)
-        for row in table_data:
-            self.trade_monitor_tab.monitor_tree.insert('', 'end', values=row)
-        # 不插入合计行
+        # 按记录id只更新有变化的行，不插入合计行
+        self.trade_monitor_tab.monitor_rows.update(
+            (item_id, values, ()) for item_id, values in table_data
+        )
 
     def add_stock_in(self):
         """添加入库记录"""
@@ -1163,12 +1186,8 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
             note = self.stock_out_note.get()
             total_amount = quantity * price - fee
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            # 自动减少库存
-            success = self.db_manager.decrease_inventory(item, quantity)
-            if not success:
-                messagebox.showerror("错误", f"库存不足，无法出库 {item} 数量 {quantity}")
-                return
-            self.db_manager.save_stock_out({
+            # 扣减库存并保存出库记录（同一事务）
+            success, message = self.db_manager.atomic_stock_out({
                 'item_name': item,
                 'transaction_time': now,
                 'quantity': quantity,
@@ -1178,6 +1197,9 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
                 'total_amount': total_amount,
                 'note': note if note is not None else ''
             })
+            if not success:
+                messagebox.showerror("错误", f"出库失败 {item} 数量 {quantity}: {message}")
+                return
             self.refresh_stock_out()
             self.refresh_inventory()
             # 清空输入框
@@ -1198,7 +1220,7 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
         from tkinter import filedialog
         try:
             # 收集所有表格数据
-            inventory_data = [self.inventory_tab.inventory_tree.item(item)['values'] for item in self.inventory_tab.inventory_tree.get_children()]
+            inventory_data = self._inventory_export_rows()
             stock_in_data = [self.stock_in_tab.stock_in_tree.item(item)['values'] for item in self.stock_in_tab.stock_in_tree.get_children()]
             stock_out_data = [self.stock_out_tab.stock_out_tree.item(item)['values'] for item in self.stock_out_tab.stock_out_tree.get_children()]
             monitor_data = [self.trade_monitor_tab.monitor_tree.item(item)['values'] for item in self.trade_monitor_tab.monitor_tree.get_children()]
@@ -1245,25 +1267,8 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
         try:
             with open("inventory_report.csv", "w", encoding="utf-8") as f:
                 f.write("物品,库存数,总入库均价,保本均价,总出库均价,利润,利润率,成交利润额,库存价值\n")
-                for item in self.inventory_tab.inventory_tree.get_children():
-                    try:
-                        values = self.inventory_tab.inventory_tree.item(item)['values']
-                        item_name, quantity, avg_price, break_even_price, selling_price, profit, profit_rate, total_profit, inventory_value, *_ = values
-                        formatted_values = [
-                            item_name,
-                            str(int(quantity)),
-                            str(int(avg_price)),
-                            str(int(break_even_price)),
-                            str(int(selling_price)),
-                            str(int(profit)),
-                            values[6],
-                            str(int(total_profit)),
-                            str(int(inventory_value))
-                        ]
-                        f.write(",".join(formatted_values) + "\n")
-                    except Exception as e:
-                        print(f"导出库存项失败: {e}")
-                        continue
+                for row in self._inventory_export_rows():
+                    f.write(",".join(str(value) for value in row) + "\n")
             self.root.after(0, lambda: messagebox.showinfo("成功", "库存报表已导出到 inventory_report.csv"))
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("错误", f"导出库存报表失败: {str(e)}"))
@@ -1780,11 +1785,16 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
     def _load_operation_logs(self):
         """加载操作日志"""
         try:
-            cursor = self.db_manager.get_connection().cursor()
-            cursor.execute("SELECT * FROM operation_logs ORDER BY operation_time DESC")
-            logs = cursor.fetchall()
-            cursor.close()
-            return logs
+            self.db_manager.flush_operation_logs()
+            conn = self.db_manager.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM operation_logs ORDER BY operation_time DESC")
+                logs = cursor.fetchall()
+                cursor.close()
+                return logs
+            finally:
+                conn.close()
         except Exception as e:
             print(f"加载操作日志失败: {e}")
             return []
@@ -1814,6 +1824,7 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
                 conn.commit()
                 cursor.close()
                 conn.close()
+                self.db_manager.mark_tables_changed('operation_logs')
             except Exception as e:
                 print(f"删除数据库日志失败: {e}")
             # 删除界面上的
@@ -1972,8 +1983,7 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
     def _undo_delete_stock_in(self, data):
         """回退删除入库操作"""
         if isinstance(data, list):
-            for row in data:
-                self.db_manager.save_stock_in(row)
+            self.db_manager.bulk_save_stock_in(data)
         elif isinstance(data, dict):
             self.db_manager.save_stock_in(data)
         else:
@@ -1985,8 +1995,7 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
     def _undo_delete_stock_out(self, data):
         """回退删除出库操作"""
         if isinstance(data, list):
-            for row in data:
-                self.db_manager.save_stock_out(row)
+            self.db_manager.bulk_save_stock_out(data)
         elif isinstance(data, dict):
             self.db_manager.save_stock_out(data)
         else:
@@ -2166,8 +2175,7 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
     def _redo_add_stock_in(self, data):
         """恢复添加入库操作"""
         if isinstance(data, list):
-            for row in data:
-                self.db_manager.save_stock_in(row)
+            self.db_manager.bulk_save_stock_in(data)
         elif isinstance(data, dict):
             self.db_manager.save_stock_in(data)
         else:
@@ -2179,8 +2187,7 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
     def _redo_add_stock_out(self, data):
         """恢复添加出库操作"""
         if isinstance(data, list):
-            for row in data:
-                self.db_manager.save_stock_out(row)
+            self.db_manager.bulk_save_stock_out(data)
         elif isinstance(data, dict):
             self.db_manager.save_stock_out(data)
         else:
@@ -2424,6 +2431,33 @@ GameTrad是一款专业的游戏物品交易管理系统，提供全面的库存
                 # 记录错误但继续关闭应用程序
                 self.logger.error(f"清理资源时出错: {e}", exc_info=True)
                 
+            # 停止后台任务和定时器
+            if hasattr(self, 'task_scheduler'):
+                self.task_scheduler.shutdown()
+            if hasattr(self, 'ocr_batch'):
+                self.ocr_batch.shutdown()
+                ocr_stats = ocr.get_stats()
+                if ocr_stats['recognized']:
+                    self.logger.info(f"OCR统计: {ocr_stats}")
+                ocr.get_backend().close()
+            # 关闭异步数据访问线程池并停止事件循环线程，之后不会再有查询或日志写入
+            if hasattr(self, 'async_db'):
+                try:
+                    self.async_db.close()
+                    self.async_db.loop_thread.stop()
+                except Exception as e:
+                    self.logger.error(f"停止事件循环线程时出错: {e}", exc_info=True)
+
+            # 写完队列中尚未写入的操作日志
+            try:
+                if hasattr(self, 'db_manager'):
+                    if not self.db_manager.flush_operation_logs():
+                        depth = self.db_manager.get_operation_log_stats().get('queue_depth', 0)
+                        self.logger.warning(f"退出时操作日志未能全部写入，剩余 {depth} 条")
+                    self.db_manager.close_operation_log_writer()
+            except Exception as e:
+                self.logger.error(f"写入操作日志时出错: {e}", exc_info=True)
+                
             # 关闭窗口
             self.root.destroy()
 
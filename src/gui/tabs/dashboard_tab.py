@@ -18,6 +18,8 @@ import warnings
 from urllib3.exceptions import InsecureRequestWarning
 import queue
 import calendar
+import asyncio
+from src.utils.sidebar import TabVisibility
 
 # 禁用SSL警告
 warnings.simplefilter('ignore', InsecureRequestWarning)
@@ -49,6 +51,10 @@ class DashboardTab(Frame):
         self.inventory_auto_scroll_timer_id = None
         self.inventory_auto_scroll_speed = 3000  # 滚动速度(毫秒)
         
+        # 切换到其他标签页时暂停自动滚动和价格刷新，切回时补一次刷新
+        self.visibility = TabVisibility()
+        self._resume_auto_scroll = False
+        
         # 设置中文字体
         self.chinese_font = main_gui.chinese_font
         self.setup_matplotlib_fonts()  # 设置Matplotlib的中文字体
@@ -58,6 +64,8 @@ class DashboardTab(Frame):
         self.nvwa_price_cache = None
         self.last_price_update = 0
         self.price_cache_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_cache.json')
+        # 银两和女娲石价格并发获取，写缓存文件时加锁
+        self._price_cache_lock = threading.Lock()
         
         # 加载缓存的价格数据
         self.load_price_cache()
@@ -155,6 +163,24 @@ class DashboardTab(Frame):
         if event.widget == self:
             self.cleanup_resources()
     
+    def on_tab_hidden(self):
+        """切换到其他标签页时停止自动滚动"""
+        self.visibility.hide()
+        self._resume_auto_scroll = self.auto_scroll_enabled
+        self.stop_auto_scroll()
+        self.stop_inventory_auto_scroll()
+    
+    def on_tab_shown(self):
+        """切回仪表盘时补上推迟的刷新并恢复自动滚动"""
+        if self.visibility.show():
+            # refresh_dashboard完成后会重新启动库存详情表格的自动滚动
+            self.refresh_dashboard()
+        else:
+            self.start_inventory_auto_scroll()
+        if self._resume_auto_scroll:
+            self._resume_auto_scroll = False
+            self.start_auto_scroll()
+    
     def cleanup_resources(self):
         """清理资源"""
         # 停止用户库存监控表格自动滚动
@@ -261,80 +287,16 @@ class DashboardTab(Frame):
             end = datetime(year+1, 1, 1)
         else:
             end = datetime(year, month+1, 1)
-        # 查询本月所有出库记录
-        stock_out = db_manager.fetch_all(
-            "SELECT quantity, unit_price, fee FROM stock_out WHERE transaction_time >= %s AND transaction_time < %s",
-            (start, end)
-        )
-        profit = 0.0
-        for row in stock_out:
-            try:
-                q, p, f = float(row[0]), float(row[1]), float(row[2])
-                profit += q * p - f
-            except Exception:
-                continue
-        return profit
+        # 由数据库按物品汇总本月出库金额
+        stock_out_sums = db_manager.get_stock_out_sums(start, end)
+        return sum(sums['out_amount'] for sums in stock_out_sums.values())
 
     def get_total_trading_profit(self):
         """计算库存管理中所有物品的成交利润额总和"""
-        db_manager = getattr(self.main_gui, 'db_manager', None)
-        if db_manager is None:
+        trade_stats = getattr(self.main_gui, 'trade_stats', None)
+        if trade_stats is None:
             return 0.0
-            
-        # 获取入库和出库数据
-        stock_in_data = db_manager.get_stock_in()
-        stock_out_data = db_manager.get_stock_out()
-        
-        # 计算每种物品的库存和价值
-        inventory_dict = {}
-        
-        # 统计入库
-        for row in stock_in_data:
-            try:
-                _, item_name, _, qty, cost, *_ = row
-                qty = float(qty)
-                cost = float(cost)
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['in_qty'] += qty
-                inventory_dict[item_name]['in_amount'] += cost
-            except Exception:
-                continue
-                
-        # 统计出库
-        for row in stock_out_data:
-            try:
-                _, item_name, _, qty, unit_price, fee, deposit, total_amount, note, *_ = row
-                qty = float(qty)
-                unit_price = float(unit_price)
-                fee = float(fee)
-                amount = unit_price * qty - fee
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['out_qty'] += qty
-                inventory_dict[item_name]['out_amount'] += amount
-            except Exception:
-                continue
-                
-        # 计算总成交利润额
-        total_profit = 0.0
-        for item, data in inventory_dict.items():
-            # 只计算有出库记录的物品
-            if data['out_qty'] <= 0:
-                continue
-            # 计算入库均价
-            in_avg = data['in_amount'] / data['in_qty'] if data['in_qty'] > 0 else 0
-            # 计算出库均价
-            out_avg = data['out_amount'] / data['out_qty'] if data['out_qty'] > 0 else 0
-            # 计算成交利润额
-            profit = (out_avg - in_avg) * data['out_qty'] if data['out_qty'] > 0 else 0
-            total_profit += profit
-            
-        return total_profit
+        return trade_stats.get_total_profit()
 
     def get_total_profit_and_mom(self):
         now = datetime.now()
@@ -348,60 +310,10 @@ class DashboardTab(Frame):
 
     def get_total_inventory_value(self):
         """计算库存管理中所有物品的库存价值总和"""
-        db_manager = getattr(self.main_gui, 'db_manager', None)
-        if db_manager is None:
+        trade_stats = getattr(self.main_gui, 'trade_stats', None)
+        if trade_stats is None:
             return 0.0
-            
-        # 获取入库和出库数据
-        stock_in_data = db_manager.get_stock_in()
-        stock_out_data = db_manager.get_stock_out()
-        
-        # 计算每种物品的库存和价值
-        inventory_dict = {}
-        
-        # 统计入库
-        for row in stock_in_data:
-            try:
-                _, item_name, _, qty, cost, *_ = row
-                qty = float(qty)
-                cost = float(cost)
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['in_qty'] += qty
-                inventory_dict[item_name]['in_amount'] += cost
-            except Exception:
-                continue
-                
-        # 统计出库
-        for row in stock_out_data:
-            try:
-                _, item_name, _, qty, unit_price, fee, deposit, total_amount, note, *_ = row
-                qty = float(qty)
-                unit_price = float(unit_price)
-                fee = float(fee)
-                amount = unit_price * qty - fee
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['out_qty'] += qty
-                inventory_dict[item_name]['out_amount'] += amount
-            except Exception:
-                continue
-                
-        # 计算总库存价值
-        total_value = 0.0
-        for item, data in inventory_dict.items():
-            remain_qty = data['in_qty'] - data['out_qty']
-            if remain_qty <= 0:
-                continue
-            in_avg = data['in_amount'] / data['in_qty'] if data['in_qty'] else 0
-            value = remain_qty * in_avg
-            total_value += value
-            
-        return total_value
+        return trade_stats.get_total_inventory_value()
         
     def get_inventory_value_mom(self):
         """计算库存价值的月环比变化"""
@@ -1414,12 +1326,40 @@ class DashboardTab(Frame):
 
     def refresh_dashboard(self):
         """刷新仪表盘数据"""
-        try:
-            # 先停止现有的滚动
-            self.stop_inventory_auto_scroll()
+        if self.visibility.defer():
+            return
             
-            # 获取库存统计
-            inventory_stats = self.db_manager.get_inventory_stats()
+        # 先停止现有的滚动
+        self.stop_inventory_auto_scroll()
+        
+        # 各卡片的查询互不依赖，在事件循环线程中并发执行，全部返回后再在主线程中更新界面
+        load_items = hasattr(self, 'selected_item') and hasattr(self, 'period_var')
+        self.main_gui.tk_async.run(
+            self._load_dashboard_data(load_items),
+            self._apply_dashboard_data,
+            on_error=self._on_dashboard_error,
+            owner=self
+        )
+    
+    async def _load_dashboard_data(self, load_items):
+        """并发读取仪表盘各部分的数据"""
+        adb = self.main_gui.async_db
+        inventory_stats, zero_inventory, recent_transactions, all_items = await asyncio.gather(
+            adb.get_inventory_stats(),
+            adb.get_zero_inventory_items(),
+            adb.get_recent_transactions(5),
+            adb.run(self.get_all_items) if load_items else asyncio.sleep(0)
+        )
+        return inventory_stats, zero_inventory, recent_transactions, all_items
+    
+    def _on_dashboard_error(self, error):
+        print(f"刷新仪表盘失败: {error}")
+    
+    def _apply_dashboard_data(self, data):
+        """用查询结果更新仪表盘界面"""
+        inventory_stats, zero_inventory, recent_transactions, updated_all_items = data
+        try:
+            # 更新库存统计
             if inventory_stats:
                 # 汇总库存
                 total_items, total_quantity, total_value, _ = inventory_stats
@@ -1429,17 +1369,8 @@ class DashboardTab(Frame):
                 self.total_quantity_var.set(f"{int(total_quantity):,}")
                 self.total_value_var.set(f"¥{total_value:,.2f}")
                 
-            # 更新统计卡片
-            # 获取利润数据
-            total_profit, profit_mom = self.get_total_profit_and_mom()
-            total_value = self.get_total_inventory_value()
-            inventory_mom = self.get_inventory_value_mom()
-            
             # 更新物价趋势部分
             if hasattr(self, 'selected_item') and hasattr(self, 'period_var'):
-                # 重新获取所有物品
-                updated_all_items = self.get_all_items()
-                
                 if hasattr(self, 'all_items_original'):
                     # 保存当前搜索文本
                     current_search = ""
@@ -1499,12 +1430,6 @@ class DashboardTab(Frame):
                                                                 self.update_price_chart(chart_frame, selected_item, period)
                                                         break
             
-            # 刷新库存详情表格
-            # ... 其余部分保持不变
-            
-            # 获取零库存物品
-            zero_inventory = self.db_manager.get_zero_inventory_items()
-            
             # 只在low_stock_tree存在时才操作
             if hasattr(self, 'low_stock_tree'):
                 # 清空零库存列表
@@ -1534,9 +1459,6 @@ class DashboardTab(Frame):
             if hasattr(self, 'user_inventory_tree'):
                 self.update_user_inventory_monitor()
                 
-            # 获取最近交易记录
-            recent_transactions = self.db_manager.get_recent_transactions(5)
-            
             # 只在recent_trades_tree存在时才操作
             if hasattr(self, 'recent_trades_tree'):
                 # 清空最近交易列表
@@ -1588,6 +1510,10 @@ class DashboardTab(Frame):
                 self.after(0, self.refresh_price_data)
             return
 
+        # 仪表盘不可见时不请求价格，切回时随仪表盘一起刷新
+        if self.visibility.defer():
+            return
+
         # 立即显示缓存的价格数据（如果有）
         if self.silver_price_cache:
             self.silver_price_label.config(text=self.silver_price_cache)
@@ -1619,48 +1545,18 @@ class DashboardTab(Frame):
             self._legacy_price_fetch()
 
     def fetch_prices_in_thread(self):
-        """在后台线程中获取价格数据"""
-        def fetch_task():
-            try:
-                # 获取价格数据
-                silver_price = self.fetch_silver_price()
-                nvwa_price = self.fetch_nvwa_price()
-                
-                # 使用队列传递数据到主线程
-                import queue
-                data_queue = queue.Queue()
-                data_queue.put((silver_price, nvwa_price))
-                
-                # 在主线程中检查队列并更新UI
-                def check_queue():
-                    try:
-                        if not hasattr(self, 'main_gui') or not hasattr(self.main_gui, 'root'):
-                            # 组件可能已被销毁
-                            return
-                            
-                        if data_queue.empty():
-                            # 如果队列为空，继续等待
-                            self.main_gui.root.after(100, check_queue)
-                            return
-                            
-                        silver_price, nvwa_price = data_queue.get()
-                        # 在主线程中安全地更新UI
-                        self.update_price_labels(silver_price, nvwa_price)
-                    except Exception as e:
-                        print(f"更新价格标签失败: {e}")
-                        import traceback
-                        traceback.print_exc()
-                
-                # 在主窗口上下文中启动检查队列
-                if hasattr(self, 'main_gui') and hasattr(self.main_gui, 'root'):
-                    self.main_gui.root.after(100, check_queue)
-                
-            except Exception as e:
-                print(f"获取价格数据失败: {e}")
-                import traceback
-                traceback.print_exc()
-        
-        threading.Thread(target=fetch_task, daemon=True).start()
+        """在后台分别获取银两和女娲石价格，完成后在主线程中更新标签"""
+        scheduler = self.main_gui.task_scheduler
+        on_error = lambda e: print(f"获取价格数据失败: {e}")
+        # 价格请求已在进行时不会重复提交
+        scheduler.submit(
+            'dashboard.silver_price', self.fetch_silver_price, owner=self,
+            on_done=lambda price: self.update_price_labels(price, None), on_error=on_error
+        )
+        scheduler.submit(
+            'dashboard.nvwa_price', self.fetch_nvwa_price, owner=self,
+            on_done=lambda price: self.update_price_labels(None, price), on_error=on_error
+        )
     
     def update_price_labels(self, silver_price, nvwa_price):
         """更新价格标签"""
@@ -1823,13 +1719,14 @@ class DashboardTab(Frame):
     def save_price_cache(self):
         """保存价格数据到缓存文件"""
         try:
-            cache_data = {
-                'silver_price': self.silver_price_cache,
-                'nvwa_price': self.nvwa_price_cache,
-                'timestamp': self.last_price_update
-            }
-            with open(self.price_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f)
+            with self._price_cache_lock:
+                cache_data = {
+                    'silver_price': self.silver_price_cache,
+                    'nvwa_price': self.nvwa_price_cache,
+                    'timestamp': self.last_price_update
+                }
+                with open(self.price_cache_file, 'w', encoding='utf-8') as f:
+                    json.dump(cache_data, f)
         except Exception as e:
             print(f"保存价格缓存失败: {e}")
             
@@ -1970,80 +1867,11 @@ class DashboardTab(Frame):
         return canvas.create_polygon(shadow_points, fill="#E0E0E0", outline="", smooth=True)
 
     def get_inventory_data(self):
-        """从数据库获取库存管理数据，计算库存数量和利润率"""
-        db_manager = getattr(self.main_gui, 'db_manager', None)
-        if db_manager is None:
+        """获取库存数量最多的物品及其利润率，最多7项"""
+        trade_stats = getattr(self.main_gui, 'trade_stats', None)
+        if trade_stats is None:
             return []
-            
-        # 获取入库和出库数据
-        stock_in_data = db_manager.get_stock_in()
-        stock_out_data = db_manager.get_stock_out()
-        
-        # 计算每种物品的库存和价值
-        inventory_dict = {}
-        
-        # 统计入库
-        for row in stock_in_data:
-            try:
-                _, item_name, _, qty, cost, *_ = row
-                qty = float(qty)
-                cost = float(cost)
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['in_qty'] += qty
-                inventory_dict[item_name]['in_amount'] += cost
-            except Exception as e:
-                continue
-                
-        # 统计出库
-        for row in stock_out_data:
-            try:
-                _, item_name, _, qty, unit_price, fee, deposit, total_amount, note, *_ = row
-                qty = float(qty)
-                unit_price = float(unit_price)
-                fee = float(fee)
-                amount = unit_price * qty - fee
-                if item_name not in inventory_dict:
-                    inventory_dict[item_name] = {
-                        'in_qty': 0, 'in_amount': 0, 'out_qty': 0, 'out_amount': 0
-                    }
-                inventory_dict[item_name]['out_qty'] += qty
-                inventory_dict[item_name]['out_amount'] += amount
-            except Exception as e:
-                continue
-        
-        # 计算库存数量和利润率
-        result = []
-        for item, data in inventory_dict.items():
-            remain_qty = data['in_qty'] - data['out_qty']
-            
-            # 显示所有物品，不管库存是否为正
-            # 计算平均入库成本和平均出库价格
-            in_avg = data['in_amount'] / data['in_qty'] if data['in_qty'] else 0
-            out_avg = data['out_amount'] / data['out_qty'] if data['out_qty'] else 0
-            
-            # 计算利润率
-            profit_rate = 0
-            if in_avg > 0 and out_avg > 0:
-                profit_rate = (out_avg - in_avg) / in_avg * 100
-            
-            # 格式化数据 - 改进格式化方式
-            if abs(remain_qty) < 1000:
-                formatted_qty = f"{int(remain_qty):d}"
-            else:
-                formatted_qty = f"{int(remain_qty):,d}"
-                
-            formatted_rate = f"{profit_rate:+.1f}%"
-            
-            result.append((item, formatted_qty, formatted_rate, profit_rate))
-        
-        # 首先按库存是否为正排序，然后按库存数量从高到低排序
-        result.sort(key=lambda x: (-1 if float(x[1].replace(',', '')) > 0 else 1, -float(x[1].replace(',', '').replace('-', ''))))
-        
-        # 取所有项，但最多显示7项
-        return result[:7]
+        return trade_stats.get_top_inventory()
 
     def update_user_inventory_monitor(self):
         """更新用户库存监控数据"""
@@ -2061,37 +1889,18 @@ class DashboardTab(Frame):
             self.user_inventory_tree.insert("", "end", values=("未设置规则", "请在设置->公式管理中配置", ""))
             return
             
-        # 获取入库和出库数据
+        # 由数据库按备注和物品汇总入库/出库数量
         try:
-            stock_in_data = self.db_manager.get_stock_in()
-            stock_out_data = self.db_manager.get_stock_out()
+            quantities_by_note = self.db_manager.get_item_quantities_by_note(list(note_rules.keys()))
             
             # 遍历每个备注规则
             for note_value, username in note_rules.items():
                 # 查找所有该备注值对应的物品
-                items_with_note = {}
-                
-                # 处理入库数据
-                for row in stock_in_data:
-                    try:
-                        _, item_name, _, qty, _, _, note, *_ = row
-                        if note and str(note).strip() == note_value:
-                            if item_name not in items_with_note:
-                                items_with_note[item_name] = {'in': 0, 'out': 0}
-                            items_with_note[item_name]['in'] += float(qty)
-                    except Exception as e:
-                        continue
-                        
-                # 处理出库数据
-                for row in stock_out_data:
-                    try:
-                        _, item_name, _, qty, _, _, _, _, note, *_ = row
-                        if note and str(note).strip() == note_value:
-                            if item_name not in items_with_note:
-                                items_with_note[item_name] = {'in': 0, 'out': 0}
-                            items_with_note[item_name]['out'] += float(qty)
-                    except Exception as e:
-                        continue
+                items_with_note = {
+                    item_name: quantities
+                    for (note, item_name), quantities in quantities_by_note.items()
+                    if note == str(note_value).strip()
+                }
                 
                 # 计算每个物品的库存数量并添加到表格
                 for item_name, quantities in items_with_note.items():
@@ -2221,7 +2030,7 @@ class DashboardTab(Frame):
 
     def start_inventory_auto_scroll(self):
         """开始库存详情表格自动滚动"""
-        if not hasattr(self, 'inventory_detail_tree'):
+        if not hasattr(self, 'inventory_detail_tree') or not self.visibility.visible:
             return
         
         # 检查是否有足够多的行来滚动
@@ -2434,6 +2243,14 @@ class DashboardTab(Frame):
         # 按从早到晚排序
         wednesdays.sort()
         
+        # 入库均价（成本）各周共用，只查询一次
+        in_records = self.db_manager.fetch_all(
+            "SELECT item_name, AVG(avg_cost) as avg_cost FROM stock_in GROUP BY item_name"
+        )
+        in_prices = {}
+        for item_name, avg_cost in in_records:
+            in_prices[item_name] = float(avg_cost) if avg_cost else 0
+        
         # 计算每个周三到下个周三的收入
         weekly_income = []
         
@@ -2441,44 +2258,7 @@ class DashboardTab(Frame):
             start_time = wednesdays[i]
             end_time = wednesdays[i+1]
             
-            # 获取日期范围内的出库数据
-            query_out = """
-                SELECT item_name, quantity, unit_price, fee, note 
-                FROM stock_out 
-                WHERE transaction_time BETWEEN %s AND %s
-            """
-            out_records = self.db_manager.fetch_all(query_out, (start_time, end_time))
-            
-            # 获取日期范围内的入库数据 - 用于查找成本
-            query_in = """
-                SELECT item_name, AVG(avg_cost) as avg_cost
-                FROM stock_in 
-                GROUP BY item_name
-            """
-            in_records = self.db_manager.fetch_all(query_in)
-            
-            # 构建入库均价字典
-            in_prices = {}
-            for record in in_records:
-                item_name, avg_cost = record
-                in_prices[item_name] = float(avg_cost) if avg_cost else 0
-            
-            # 计算总收入
-            income = 0
-            for record in out_records:
-                item_name, quantity, unit_price, fee, note = record
-                
-                # 转换为适当的类型
-                quantity = int(quantity) if quantity else 0
-                unit_price = float(unit_price) if unit_price else 0
-                fee = float(fee) if fee else 0
-                
-                # 查找入库均价（成本）
-                in_price = in_prices.get(item_name, 0)
-                
-                # 计算此次交易的收入 = (出库单价 - 入库均价) * 数量 - 手续费
-                transaction_income = (unit_price - in_price) * quantity - fee
-                income += transaction_income
+            income = self._period_income(start_time, end_time, in_prices)
             
             # 格式化日期为简洁显示
             date_label = start_time.strftime("%m/%d")
@@ -2489,47 +2269,18 @@ class DashboardTab(Frame):
         start_time = wednesdays[-1]
         end_time = now
         
-        # 获取日期范围内的出库数据
-        query_out = """
-            SELECT item_name, quantity, unit_price, fee, note 
-            FROM stock_out 
-            WHERE transaction_time BETWEEN %s AND %s
-        """
-        out_records = self.db_manager.fetch_all(query_out, (start_time, end_time))
-        
-        # 获取入库均价数据
-        query_in = """
-            SELECT item_name, AVG(avg_cost) as avg_cost
-            FROM stock_in 
-            GROUP BY item_name
-        """
-        in_records = self.db_manager.fetch_all(query_in)
-        
-        # 构建入库均价字典
-        in_prices = {}
-        for record in in_records:
-            item_name, avg_cost = record
-            in_prices[item_name] = float(avg_cost) if avg_cost else 0
-        
         # 计算最后一周的总收入
-        income = 0
-        for record in out_records:
-            item_name, quantity, unit_price, fee, note = record
-            
-            # 转换为适当的类型
-            quantity = int(quantity) if quantity else 0
-            unit_price = float(unit_price) if unit_price else 0
-            fee = float(fee) if fee else 0
-            
-            # 查找入库均价（成本）
-            in_price = in_prices.get(item_name, 0)
-            
-            # 计算此次交易的收入 = (出库单价 - 入库均价) * 数量 - 手续费
-            transaction_income = (unit_price - in_price) * quantity - fee
-            income += transaction_income
+        income = self._period_income(start_time, end_time, in_prices)
         
         # 格式化当前周日期
         date_label = start_time.strftime("%m/%d")
         weekly_income.append((date_label, income))
         
-        return weekly_income
\ No newline at end of file
+        return weekly_income
+
+    def _period_income(self, start_time, end_time, in_prices):
+        """计算时间段内的出库收入 = Σ(出库单价 - 入库均价) * 数量 - 手续费，由数据库按物品汇总"""
+        income = 0
+        for item_name, sums in self.db_manager.get_stock_out_sums(start_time, end_time).items():
+            income += sums['out_amount'] - in_prices.get(item_name, 0) * sums['out_qty']
+        return income
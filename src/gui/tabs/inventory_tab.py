@@ -3,6 +3,7 @@ from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox, filedialog
 import tkinter as tk
 from datetime import datetime
+from src.gui.components import VirtualTreeview
 
 class InventoryTab:
     def __init__(self, parent_frame, main_gui):
@@ -133,9 +134,10 @@ class InventoryTab:
         
         columns = ('物品', '库存数', '总入库均价', '保本均价', '总出库均价', '利润', '利润率', '成交利润额', '库存价值')
         
-        # 使用ttkbootstrap的Treeview组件
-        self.inventory_tree = tb.Treeview(table_frame, columns=columns, show='headings', 
-                                       height=18, bootstyle="info", style="Inventory.Treeview")
+        # 使用虚拟表格组件，只创建可见区域的行
+        self.inventory_tree = VirtualTreeview(table_frame, columns=columns, show='headings', 
+                                       height=18, bootstyle="info", style="Inventory.Treeview",
+                                       stripe_tags=('evenrow', 'oddrow'))
         
         # 优化列宽和对齐方式
         column_widths = {
@@ -168,6 +170,8 @@ class InventoryTab:
             width = column_widths.get(col, 120)
             align = column_aligns.get(col, 'center')
             self.inventory_tree.column(col, width=width, anchor=align)
+        # 点击列标题排序
+        self.inventory_tree.enable_heading_sort()
         
         # 使用ttkbootstrap的Scrollbar
         scrollbar = tb.Scrollbar(table_frame, orient="vertical", command=self.inventory_tree.yview, bootstyle="info-round")
@@ -176,8 +180,9 @@ class InventoryTab:
         self.inventory_tree.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
         
-        # 绑定鼠标移动事件
+        # 绑定鼠标移动事件：悬停高亮和工具提示
         self.inventory_tree.bind("<Motion>", self.on_treeview_motion)
+        self.inventory_tree.bind("<Motion>", self.on_tree_motion, add='+')
         # 记录上一个高亮的行
         self.last_hover_row = None
         
@@ -202,18 +207,13 @@ class InventoryTab:
         self.refresh_inventory(show_dialog=False)
 
     def filter_inventory(self):
+        """按物品名筛选已加载的库存数据，不重新查询数据库"""
         search_text = self.search_var.get().lower()
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
-            
-        self.refresh_inventory(search_text, show_dialog=False)
+        self.inventory_tree.set_filter((lambda values: search_text in str(values[0]).lower()) if search_text else None)
+        self.status_var.set(f"共 {self.inventory_tree.row_count()} 条记录  |  上次更新: {datetime.now().strftime('%H:%M:%S')}")
 
     def refresh_inventory(self, search_text="", show_dialog=False):
         """刷新库存数据，支持搜索过滤"""
-        # 清空现有数据
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
-            
         try:
             # 设置标签样式
             # 交替行颜色标签
@@ -256,22 +256,9 @@ class InventoryTab:
             # 确保从数据库获取最新数据
             inventory_data = self.db_manager.get_inventory()
             
-            # 过滤数据
-            filtered_data = []
-            search_text = search_text.lower()
+            # 生成表格数据，过滤在表格内存模型中进行
+            rows = []
             for item in inventory_data:
-                try:
-                    # 使用星号解包处理前面的几个必要字段
-                    item_id, item_name, quantity, avg_price, *other_fields = item
-                    if search_text and search_text not in item_name.lower():
-                        continue
-                    filtered_data.append(item)
-                except Exception as e:
-                    print(f"过滤库存数据错误: {e}")
-                    continue
-            
-            # 添加数据到表格
-            for i, item in enumerate(filtered_data):
                 try:
                     # 只提取前10个字段，忽略多余的字段
                     item_id, item_name, quantity, avg_price, break_even_price, selling_price, profit, profit_rate, total_profit, inventory_value, *_ = item
@@ -286,15 +273,9 @@ class InventoryTab:
                     total_profit_str = f"{float(total_profit):,.0f}" if total_profit else "0"
                     inventory_value_str = f"{float(inventory_value):,.2f}" if inventory_value else "0.00"
                     
-                    # 添加到表格，并设置多种标签
+                    # 设置多种标签，交替行颜色由表格按显示位置添加
                     tags = []
                     
-                    # 交替行颜色
-                    if i % 2 == 0:
-                        tags.append('evenrow')
-                    else:
-                        tags.append('oddrow')
-                    
                     # 库存数量标签
                     quantity_int = int(quantity)
                     if quantity_int < 0:
@@ -312,20 +293,20 @@ class InventoryTab:
                     elif float(profit) > 0:
                         tags.append('profit_positive')
                         
-                    self.inventory_tree.insert("", "end", values=(
+                    rows.append(((
                         item_name, quantity_str, avg_price_str, break_even_str, 
                         selling_price_str, profit_str, profit_rate_str, total_profit_str, inventory_value_str
-                    ), tags=tags)
-                    
-                    # 绑定工具提示事件，显示完整信息
-                    self.inventory_tree.bind("<Motion>", self.on_tree_motion)
+                    ), tags))
                     
                 except Exception as e:
                     print(f"添加库存数据到表格错误: {e}")
                     continue
             
-            # 更新状态栏
-            self.status_var.set(f"共 {len(filtered_data)} 条记录  |  上次更新: {datetime.now().strftime('%H:%M:%S')}")
+            # 一次性替换表格数据（按物品名保持行id），并按当前搜索条件过滤、更新状态栏
+            self.inventory_tree.set_rows(rows, keys=[values[0] for values, _ in rows])
+            if search_text:
+                self.search_var.set(search_text)
+            self.filter_inventory()
         except Exception as e:
             self.status_var.set(f"刷新库存数据错误: {e}")
             import traceback
@@ -415,7 +396,7 @@ class InventoryTab:
         row_id = self.inventory_tree.identify_row(event.y)
         
         # 如果鼠标离开了上一个高亮行，恢复其原始样式
-        if self.last_hover_row and self.last_hover_row != row_id:
+        if self.last_hover_row and self.last_hover_row != row_id and self.inventory_tree.exists(self.last_hover_row):
             # 获取行的当前标签
             current_tags = list(self.inventory_tree.item(self.last_hover_row, 'tags'))
             # 移除悬停标签
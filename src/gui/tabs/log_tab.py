@@ -2,11 +2,13 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import ttk, messagebox, StringVar
 import tkinter as tk
+import csv
+import itertools
 import json
-import threading
 import time
 # 导入操作类型常量
 from src.utils.operation_types import OperationType, TabName
+from src.gui.components.row_reconciler import RowReconciler
 
 class LogTab:
     def __init__(self, notebook, main_gui):
@@ -28,6 +30,13 @@ class LogTab:
         self.log_total_pages = 1
         self.log_total_records = 0
         
+        # 键集分页状态：每页起点游标（上一页最后一行的(operation_time, id)），第1页为None
+        self._page_anchors = {1: None}
+        self._page_first_cursor = None  # 当前页第一行的游标，用于向前翻页
+        self._page_direction = None     # 'next' / 'prev' / None
+        self._prefetched = None         # 预取的下一页：(键, 日志列表)
+        self._anchors_key = None        # 游标对应的筛选条件和每页条数，变化后游标失效
+        
         # 自适应记录数控制变量
         self.min_records_per_page = 8  # 每页最少显示的记录数
         self.row_height = 25  # 每行预估高度(像素)
@@ -147,6 +156,8 @@ class LogTab:
         # 动态计算初始高度，但至少保持一个最小值
         initial_height = max(18, self.calculate_treeview_height())
         self.log_tree = ttk.Treeview(log_frame, columns=columns, show='headings', height=initial_height)
+        # 按日志id增量更新表格行，翻页和刷新时不清空重建
+        self.log_rows = RowReconciler(self.log_tree)
         for col in columns:
             self.log_tree.heading(col, text=col, anchor='center')
             # 设置列宽
@@ -286,10 +297,17 @@ class LogTab:
     def log_prev_page(self):
         if self.log_page > 1:
             self.log_page -= 1
+            self._page_direction = 'prev'
             self.refresh_log_tab()
 
     def log_next_page(self):
+        if self.log_page >= self.log_total_pages:
+            return
         self.log_page += 1
+        self._page_direction = 'next'
+        # 下一页已在后台预取时直接显示，不再访问数据库
+        if self._show_prefetched_page():
+            return
         self.refresh_log_tab()
 
     def log_jump_page(self):
@@ -315,104 +333,135 @@ class LogTab:
             self.progress_bar.pack_forget()
             self.status_var.set("就绪")
     
+    # 加载和预取共用同一个任务键，新的加载会取消并替换进行中的加载或预取
+    _LOAD_KEY = 'log_tab.load'
+    
     def refresh_log_tab(self):
         """刷新日志表格"""
-        # 显示加载指示器
+        # 显示加载指示器，加载完成前保留当前内容
         self.show_loading(True)
         
-        # 清空表格
-        for item in self.log_tree.get_children():
-            self.log_tree.delete(item)
+        # 分页状态只在主线程中读写：这里取快照交给事件循环线程查询，结果在_on_data_loaded中应用
+        filters = self._get_filters()
+        direction, self._page_direction = self._page_direction, None
+        self._reset_anchors_if_needed(filters)
+        before = self._page_first_cursor if direction == 'prev' else None
+        self.main_gui.tk_async.run(
+            self._load_data(filters, self.log_page, self.log_page_size, dict(self._page_anchors), before),
+            lambda result, key=self._anchors_key: self._on_data_loaded(key, filters, result),
+            on_error=self._on_load_error,
+            key=self._LOAD_KEY
+        )
+    
+    def _get_filters(self):
+        """读取当前筛选条件"""
+        tab_name = self.filter_tab.get() if self.filter_tab.get() != "全部" else None
+        op_type = self.filter_type.get() if self.filter_type.get() != "全部" else None
+        keyword = self.log_search_var.get() if self.log_search_var.get().strip() else None
+        reverted = None
+        if self.filter_reverted.get() == "是":
+            reverted = True
+        elif self.filter_reverted.get() == "否":
+            reverted = False
+        return {'tab_name': tab_name, 'op_type': op_type, 'keyword': keyword, 'reverted': reverted}
+    
+    def _reset_anchors_if_needed(self, filters):
+        """筛选条件（或每页条数）变化时清空游标；新日志写入只会让各页整体后移，游标仍然有效"""
+        anchors_key = (tuple(sorted(filters.items())), self.log_page_size)
+        if anchors_key != self._anchors_key:
+            self._anchors_key = anchors_key
+            self._page_anchors = {1: None}
+            self._page_first_cursor = None
+            self._prefetched = None
+    
+    def _fetch_page(self, filters, page, page_size, anchors, before):
+        """按键集分页获取指定页；没有可用游标时（如直接跳页）退回OFFSET分页"""
+        if page in anchors:
+            return self.db_manager.get_operation_logs_page(after=anchors[page], page_size=page_size, **filters)
+        if before is not None:
+            return self.db_manager.get_operation_logs_page(before=before, page_size=page_size, **filters)
+        return self.db_manager.get_operation_logs(page=page, page_size=page_size, **filters)
+    
+    def _prefetch_next_page(self, filters, page_size, anchor):
+        """后台预取下一页，返回(预取前的日志数据版本, 日志列表)"""
+        version = self.db_manager.get_data_version('operation_logs')
+        logs = self.db_manager.get_operation_logs_page(after=anchor, page_size=page_size, **filters)
+        return version, logs
+    
+    def _show_prefetched_page(self):
+        """如预取的数据与当前页匹配且日志未变化，则直接显示并返回True"""
+        prefetched = self._prefetched
+        if not prefetched or self.is_loading:
+            return False
+        (anchors_key, page, anchor, version), logs = prefetched
+        if (anchors_key != self._anchors_key or page != self.log_page
+                or anchor != self._page_anchors.get(page)
+                or version != self.db_manager.get_data_version('operation_logs')):
+            return False
+        self._prefetched = None
+        if logs:
+            self._page_anchors[page + 1] = logs[-1]['cursor']
+        self._update_ui(logs, self.log_total_records)
+        # 继续在后台预取再下一页
+        self._start_prefetch(self._get_filters(), page, logs)
+        return True
+    
+    def _start_prefetch(self, filters, page, logs):
+        self._prefetched = None
+        if not logs or page >= self.log_total_pages:
+            return
+        anchor = logs[-1]['cursor']
+        adb = self.main_gui.async_db
+        self.main_gui.tk_async.run(
+            adb.run(self._prefetch_next_page, filters, self.log_page_size, anchor),
+            lambda result, key=self._anchors_key: self._on_prefetched(key, page + 1, anchor, result),
+            on_error=lambda e: print(f"预取日志失败: {e}"),
+            key=self._LOAD_KEY
+        )
+    
+    def _on_prefetched(self, anchors_key, page, anchor, result):
+        """在主线程中保存预取结果"""
+        version, logs = result
+        self._prefetched = ((anchors_key, page, anchor, version), logs)
+    
+    async def _load_data(self, filters, page, page_size, anchors, before):
+        """
+        在事件循环线程中加载指定页，不修改任何界面状态
+
+        Returns:
+            (总记录数, 实际页码, 日志列表, 下一页起点游标)
+        """
+        adb = self.main_gui.async_db
+        
+        # 获取总记录数（按日志数据版本缓存，写入新日志后才重新统计）
+        total = await adb.count_operation_logs_cached(**filters)
+        
+        # 如果页码超出范围，改为第一页
+        total_pages = max(1, (total + page_size - 1) // page_size)
+        if page > total_pages:
+            page, before = 1, None
         
-        # 启动后台线程加载数据
-        threading.Thread(target=self._load_data_thread, daemon=True).start()
+        logs = await adb.run(self._fetch_page, filters, page, page_size, anchors, before)
+        next_cursor = logs[-1]['cursor'] if logs else None
+        return total, page, logs, next_cursor
     
-    def _load_data_thread(self):
-        """后台线程加载数据"""
-        try:
-            # 获取过滤条件
-            tab_name = self.filter_tab.get() if self.filter_tab.get() != "全部" else None
-            op_type = self.filter_type.get() if self.filter_type.get() != "全部" else None
-            keyword = self.log_search_var.get() if self.log_search_var.get().strip() else None
-            reverted = None
-            if self.filter_reverted.get() == "是":
-                reverted = True
-            elif self.filter_reverted.get() == "否":
-                reverted = False
-            
-            # 获取数据
-            logs = self.db_manager.get_operation_logs(
-                tab_name=tab_name, 
-                op_type=op_type, 
-                keyword=keyword, 
-                reverted=reverted,
-                page=self.log_page,
-                page_size=self.log_page_size
-            )
-            
-            # 获取总记录数
-            total = self.db_manager.count_operation_logs(
-                tab_name=tab_name,
-                op_type=op_type,
-                keyword=keyword,
-                reverted=reverted
-            )
-            
-            # 计算总页数
-            self.log_total_pages = max(1, (total + self.log_page_size - 1) // self.log_page_size)
-            self.log_total_records = total
-            
-            # 如果当前页码超出范围，重置为第一页
-            if self.log_page > self.log_total_pages:
-                self.log_page = 1
-                # 重新获取第一页数据
-                logs = self.db_manager.get_operation_logs(
-                    tab_name=tab_name, 
-                    op_type=op_type, 
-                    keyword=keyword, 
-                    reverted=reverted,
-                    page=self.log_page,
-                    page_size=self.log_page_size
-                )
-            
-            # 使用线程安全的方式传递数据
-            self._log_data_ready = (logs, total)
-            
-            # 在主线程中安排UI更新
-            if hasattr(self, 'log_frame'):
-                try:
-                    def update_ui():
-                        if hasattr(self, '_log_data_ready'):
-                            logs, total = self._log_data_ready
-                            self._update_ui(logs, total)
-                            delattr(self, '_log_data_ready')
-                    
-                    # 使用after_idle而不是after，避免定时器问题
-                    self.log_frame.after_idle(update_ui)
-                except Exception as e:
-                    print(f"安排日志UI更新失败: {e}")
-                    
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            print(f"加载日志数据失败: {e}")
-            
-            # 使用线程安全的方式传递错误
-            self._log_error = str(e)
-            
-            # 在主线程中处理错误
-            if hasattr(self, 'log_frame'):
-                try:
-                    def handle_error():
-                        if hasattr(self, '_log_error'):
-                            error_msg = self._log_error
-                            self.show_loading(False, f"加载失败: {error_msg}")
-                            delattr(self, '_log_error')
-                    
-                    # 使用after_idle而不是after
-                    self.log_frame.after_idle(handle_error)
-                except Exception as e:
-                    print(f"安排日志错误处理失败: {e}")
+    def _on_data_loaded(self, anchors_key, filters, result):
+        """在主线程中应用加载结果、更新分页状态并预取下一页"""
+        total, page, logs, next_cursor = result
+        if anchors_key != self._anchors_key:
+            # 加载期间筛选条件已变化，结果作废
+            return
+        self.log_total_records = total
+        self.log_total_pages = max(1, (total + self.log_page_size - 1) // self.log_page_size)
+        self.log_page = page
+        if next_cursor is not None:
+            self._page_anchors[page + 1] = next_cursor
+        self._update_ui(logs, total)
+        self._start_prefetch(filters, page, logs)
+    
+    def _on_load_error(self, error):
+        print(f"加载日志数据失败: {error}")
+        self.show_loading(False, f"加载失败: {error}")
     
     def _update_ui(self, logs, total):
         """在主线程中更新UI元素"""
@@ -426,7 +475,11 @@ class LogTab:
             elif hasattr(self, 'log_page_label'):
                 self.log_page_label.config(text=f"第{self.log_page}/{self.log_total_pages}页")
             
-            # 插入数据
+            # 记录当前页第一行的游标，供向前翻页使用
+            self._page_first_cursor = logs[0]['cursor'] if logs else None
+            
+            # 按日志id对比更新，只修改有变化的行
+            rows = []
             for idx, log in enumerate(logs):
                 # 使用交替行颜色
                 row_tags = ('evenrow',) if idx % 2 == 0 else ('oddrow',)
@@ -459,12 +512,13 @@ class LogTab:
                 if len(data_text) > 100:
                     data_text = data_text[:100] + "..."
                 
-                self.log_tree.insert('', 'end', values=(
+                rows.append((f"log{log['cursor'][1]}", (
                     log['操作类型'] + ("（已回退）" if log.get('已回退') else ""),
                     log['标签页'],
                     log['操作时间'],
                     data_text
-                ), tags=row_tags)
+                ), row_tags))
+            self.log_rows.update(rows)
                 
             # 隐藏加载指示器
             self.show_loading(False)
@@ -481,28 +535,30 @@ class LogTab:
         import os
         from tkinter import filedialog
         try:
-            logs = self.db_manager.get_operation_logs(
-                tab_name=None,
-                op_type=None,
-                keyword=None,
-                reverted=None,
-                page=1,
-                page_size=10000
-            )
             columns = ["操作类型", "标签页", "操作时间", "数据"]
-            data = [[log['操作类型'], log['标签页'], log['操作时间'], json.dumps(log['数据'], ensure_ascii=False)] for log in logs]
             file_path = filedialog.asksaveasfilename(
                 filetypes=[('Excel文件', '*.xlsx'), ('CSV文件', '*.csv')],
                 title='导出日志'
             )
             if not file_path:
                 return
+            # 流式读取日志，逐行转换
+            rows = (
+                [log['操作类型'], log['标签页'], log['操作时间'], json.dumps(log['数据'], ensure_ascii=False)]
+                for log in self.db_manager.iter_operation_logs()
+            )
             ext = os.path.splitext(file_path)[1].lower()
             if ext == '.xlsx':
+                # Excel需要整表写入，仍只导出最近10000条
+                data = list(itertools.islice(rows, 10000))
                 pd.DataFrame(data, columns=columns).to_excel(file_path, index=False)
                 messagebox.showinfo('成功', f'日志已导出到 {file_path}')
             elif ext == '.csv':
-                pd.DataFrame(data, columns=columns).to_csv(file_path, index=False, encoding='utf-8-sig')
+                # CSV边读边写，导出全部日志且内存占用不随日志量增长
+                with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    writer.writerows(rows)
                 messagebox.showinfo('成功', f'日志已导出为csv文件 {file_path}')
             else:
                 messagebox.showerror('错误', '不支持的文件格式')
@@ -534,6 +590,7 @@ class LogTab:
                 conn.commit()
                 cursor.close()
                 conn.close()
+                self.db_manager.mark_tables_changed('operation_logs')
             except Exception as e:
                 print(f"删除数据库日志失败: {e}")
             # 删除界面上的
@@ -14,9 +14,9 @@ import re
 import matplotlib.font_manager as fm
 import requests
 import time
-import threading
 import pandas as pd
 import matplotlib.ticker as ticker
+from src.utils.sidebar import TabVisibility
 
 class NvwaPriceTab:
     def __init__(self, notebook, main_gui=None):
@@ -41,6 +41,10 @@ class NvwaPriceTab:
         self._auto_refresh_var = tk.BooleanVar(value=False)
         self._max_points = 1000  # 显示的最大点数，与银两行情保持一致
         self._mpl_cursor = None
+        self._last_refresh_time = 0
+        self._refresh_interval = 60
+        # 标签页隐藏时暂停自动刷新和网络请求；创建时尚未显示，首次切换到本页时再加载数据
+        self.visibility = TabVisibility(visible=False)
         
         # 设置中文字体
         self.setup_fonts()
@@ -214,33 +218,45 @@ class NvwaPriceTab:
 
     def refresh_nvwa_price(self):
         """刷新女娲石价格"""
+        if self.visibility.defer():
+            return
         self._fetch_and_draw_nvwa_price()
         
     def _fetch_and_draw_nvwa_price(self):
         """从服务器获取数据并绘制"""
-        def fetch_data():
-            try:
-                days = int(self.days.get())
-                platform = self.platform.get()
-                
-                url = f"https://www.zxsjinfo.com/api/nvwa-price?days={days}"
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data and 'series' in data:
-                    self._last_nvwa_data = data
-                    # 确保在主线程中更新UI
-                    self.nvwa_tab.after(0, lambda: self._draw_nvwa_price(data, platform, days))
-            except Exception as e:
-                print(f"Error fetching nvwa price: {e}")
-                # 如果失败，尝试使用上次的数据
-                if self._last_nvwa_data:
-                    self.nvwa_tab.after(0, lambda: self._draw_nvwa_price(self._last_nvwa_data, platform, days))
-        
-        thread = threading.Thread(target=fetch_data)
-        thread.daemon = True
-        thread.start()
+        try:
+            days = int(self.days.get())
+            platform = self.platform.get()
+        except Exception as e:
+            print(f"Error fetching nvwa price: {e}")
+            return
+        
+        def on_error(e):
+            print(f"Error fetching nvwa price: {e}")
+            # 如果失败，尝试使用上次的数据
+            if self._last_nvwa_data:
+                self._draw_nvwa_price(self._last_nvwa_data, platform, days)
+        
+        # 由调度器在后台获取，上一次请求未完成时不会重复提交
+        self.main_gui.task_scheduler.submit(
+            'nvwa_price.refresh', self._fetch_nvwa_data, days,
+            owner=self.nvwa_tab,
+            on_done=lambda data: self._on_nvwa_price_fetched(data, platform, days),
+            on_error=on_error
+        )
+    
+    def _fetch_nvwa_data(self, days):
+        """在后台线程中请求女娲石价格数据"""
+        url = f"https://www.zxsjinfo.com/api/nvwa-price?days={days}"
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    
+    def _on_nvwa_price_fetched(self, data, platform, days):
+        if data and 'series' in data:
+            self._last_nvwa_data = data
+            self._last_refresh_time = time.time()
+            self._draw_nvwa_price(data, platform, days)
     
     def _draw_nvwa_price(self, data, platform, days):
         """绘制女娲石价格走势图，优化视觉样式"""
@@ -422,10 +438,27 @@ class NvwaPriceTab:
         self.nvwa_ax1.autoscale()
         self.nvwa_canvas.draw_idle()
 
-    def auto_refresh_nvwa_price(self):
-        if self._auto_refresh_var.get():
+    def auto_refresh_nvwa_price(self, run_now=True):
+        scheduler = self.main_gui.task_scheduler
+        if self._auto_refresh_var.get() and self.visibility.visible:
+            scheduler.every('nvwa_price.auto_refresh', self._refresh_interval * 1000, self.refresh_nvwa_price,
+                            owner=self.nvwa_tab, run_now=run_now)
+        else:
+            scheduler.stop('nvwa_price.auto_refresh')
+
+    def on_tab_hidden(self):
+        """切换到其他标签页时停止自动刷新"""
+        self.visibility.hide()
+        self.main_gui.task_scheduler.stop('nvwa_price.auto_refresh')
+
+    def on_tab_shown(self):
+        """切回时如有推迟的刷新或自动刷新已到期，只刷新一次并恢复自动刷新"""
+        stale = self.visibility.show()
+        due = (self._auto_refresh_var.get()
+               and time.time() - self._last_refresh_time >= self._refresh_interval)
+        if stale or due:
             self.refresh_nvwa_price()
-            self.nvwa_tab.after(60000, self.auto_refresh_nvwa_price)
+        self.auto_refresh_nvwa_price(run_now=False)
 
     def export_nvwa_chart(self):
         import tkinter.filedialog as fd
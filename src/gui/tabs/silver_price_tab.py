@@ -2,7 +2,6 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import threading
 import requests
 from datetime import datetime
 import matplotlib
@@ -16,6 +15,7 @@ import time
 import pandas as pd
 import warnings
 from urllib3.exceptions import InsecureRequestWarning
+from src.utils.sidebar import TabVisibility
 
 # 禁用SSL警告
 warnings.simplefilter('ignore', InsecureRequestWarning)
@@ -42,6 +42,8 @@ class SilverPriceTab:
         self._refresh_interval = 60
         self._auto_refresh_var = tk.BooleanVar(value=False)
         self._last_silver_data = None
+        # 标签页隐藏时暂停自动刷新和网络请求；创建时尚未显示，首次切换到本页时再加载数据
+        self.visibility = TabVisibility(visible=False)
         
         # 设置中文字体
         self.setup_fonts()
@@ -210,17 +212,26 @@ class SilverPriceTab:
         self.silver_canvas.mpl_connect('motion_notify_event', self._on_silver_motion)
 
     def refresh_silver_price(self):
-        threading.Thread(target=self._fetch_and_draw_silver_price, daemon=True).start()
-
-    def _fetch_and_draw_silver_price(self):
+        if self.visibility.defer():
+            return
         try:
             days = int(self.days.get())
             platform = self.platform.get()
-            data = self.fetch_silver_price_multi_series(days)
-            self._last_silver_data = data
-            self.silver_tab.after(0, lambda: self._draw_silver_price(data, platform, days))
         except Exception as e:
             print(f"Error fetching silver price data: {e}")
+            return
+        # 由调度器在后台获取，上一次请求未完成时不会重复提交
+        self.main_gui.task_scheduler.submit(
+            'silver_price.refresh', self.fetch_silver_price_multi_series, days,
+            owner=self.silver_tab,
+            on_done=lambda data: self._on_silver_price_fetched(data, platform, days),
+            on_error=lambda e: print(f"Error fetching silver price data: {e}")
+        )
+
+    def _on_silver_price_fetched(self, data, platform, days):
+        self._last_silver_data = data
+        self._last_refresh_time = time.time()
+        self._draw_silver_price(data, platform, days)
 
     def _draw_silver_price(self, data, platform, days):
         """绘制银两价格走势图"""
@@ -431,10 +442,27 @@ class SilverPriceTab:
         self.silver_ax1.autoscale()
         self.silver_canvas.draw_idle()
 
-    def auto_refresh_silver_price(self):
-        if self._auto_refresh_var.get():
+    def auto_refresh_silver_price(self, run_now=True):
+        scheduler = self.main_gui.task_scheduler
+        if self._auto_refresh_var.get() and self.visibility.visible:
+            scheduler.every('silver_price.auto_refresh', self._refresh_interval * 1000, self.refresh_silver_price,
+                            owner=self.silver_tab, run_now=run_now)
+        else:
+            scheduler.stop('silver_price.auto_refresh')
+
+    def on_tab_hidden(self):
+        """切换到其他标签页时停止自动刷新"""
+        self.visibility.hide()
+        self.main_gui.task_scheduler.stop('silver_price.auto_refresh')
+
+    def on_tab_shown(self):
+        """切回时如有推迟的刷新或自动刷新已到期，只刷新一次并恢复自动刷新"""
+        stale = self.visibility.show()
+        due = (self._auto_refresh_var.get()
+               and time.time() - self._last_refresh_time >= self._refresh_interval)
+        if stale or due:
             self.refresh_silver_price()
-            self.silver_tab.after(60000, self.auto_refresh_silver_price)
+        self.auto_refresh_silver_price(run_now=False)
 
     def export_silver_chart(self):
         file_path = tk.filedialog.asksaveasfilename(
@@ -9,11 +9,10 @@ except ImportError:
     # 如果PIL模块不完整，创建一个占位符
     PIL_AVAILABLE = False
     messagebox.showwarning("模块缺失", "PIL图像处理模块不完整，图片粘贴功能将不可用。请确保正确安装Pillow库。")
-import io, base64, requests
 from datetime import datetime
 import tkinter as tk
 from src.gui.dialogs import ModalInputDialog
-from src.gui.components import OCRPreview, OCRPreviewDialog
+from src.gui.components import OCRPreview, OCRPreviewDialog, VirtualTreeview
 from src.utils import clipboard_helper
 import os
 import math
@@ -36,7 +35,6 @@ class StockInTab:
         
         # 添加剪贴板监听状态标志
         self.monitoring_clipboard = False
-        self.monitor_job_id = None
         
         # 创建样式
         self.setup_styles()
@@ -139,10 +137,10 @@ class StockInTab:
         self.stock_in_filter_var = tb.StringVar()
         filter_entry = tb.Entry(filter_frame, textvariable=self.stock_in_filter_var, width=12, bootstyle="info")
         filter_entry.pack(side='left', padx=2)
-        filter_entry.bind("<Return>", lambda e: self.refresh_stock_in())
+        filter_entry.bind("<Return>", lambda e: self.apply_stock_in_filter())
         
-        tb.Button(filter_frame, text="筛选", command=self.refresh_stock_in, bootstyle="info-outline").pack(side='left', padx=2)
-        tb.Button(filter_frame, text="清除", command=lambda: [self.stock_in_filter_var.set(""), self.refresh_stock_in()], bootstyle="secondary-outline").pack(side='left', padx=2)
+        tb.Button(filter_frame, text="筛选", command=self.apply_stock_in_filter, bootstyle="info-outline").pack(side='left', padx=2)
+        tb.Button(filter_frame, text="清除", command=lambda: [self.stock_in_filter_var.set(""), self.apply_stock_in_filter()], bootstyle="secondary-outline").pack(side='left', padx=2)
         
         # 主区域分割
         main_area = tb.Frame(stock_in_frame, bootstyle="light")
@@ -175,15 +173,18 @@ class StockInTab:
             '备注': 'center'      # 文本居中对齐
         }
         
-        # 创建表格
-        self.stock_in_tree = tb.Treeview(table_frame, columns=columns, show='headings', 
-                                        height=16, bootstyle="info", style="StockIn.Treeview")
+        # 创建表格（虚拟表格，只创建可见区域的行）
+        self.stock_in_tree = VirtualTreeview(table_frame, columns=columns, show='headings', 
+                                        height=16, bootstyle="info", style="StockIn.Treeview",
+                                        stripe_tags=('evenrow', 'oddrow'))
         
         for col in columns:
             self.stock_in_tree.heading(col, text=col, anchor='center')
             width = column_widths.get(col, 120)
             align = column_aligns.get(col, 'center')
             self.stock_in_tree.column(col, width=width, anchor=align)
+        # 点击列标题排序
+        self.stock_in_tree.enable_heading_sort()
             
         # 滚动条
         scrollbar = tb.Scrollbar(table_frame, orient="vertical", command=self.stock_in_tree.yview, bootstyle="info-round")
@@ -389,28 +390,18 @@ class StockInTab:
             print(f"入库记录添加错误: {e}")
 
     def refresh_stock_in(self):
-        for item in self.stock_in_tree.get_children():
-            self.stock_in_tree.delete(item)
-            
         self.status_var.set("正在加载数据...")
         stock_in_data = self.db_manager.get_stock_in()
-        filter_text = self.stock_in_filter_var.get().strip()
-        filtered = []
+        rows = []
+        keys = []
+        records = []
         
         for item in stock_in_data:
             try:
-                _, item_name, transaction_time, quantity, cost, avg_cost, note, *_ = item
+                record_id, item_name, transaction_time, quantity, cost, avg_cost, note, *_ = item
             except Exception as e:
                 messagebox.showerror("数据结构异常", f"入库数据结构异常: {e}\n请检查表结构与代码字段一致性。\nitem={item}")
                 continue
-            if not filter_text or filter_text in str(item_name):
-                filtered.append((item_name, transaction_time, quantity, cost, avg_cost, note))
-                
-        total = [0, 0, 0]  # 数量、花费、均价合计
-        
-        for i, (item_name, transaction_time, quantity, cost, avg_cost, note) in enumerate(filtered):
-            # 设置交替行颜色
-            row_tags = ('evenrow',) if i % 2 == 0 else ('oddrow',)
             
             # 格式化数据以提高可读性
             quantity_display = f"{int(quantity):,}" if quantity else "0"
@@ -418,15 +409,38 @@ class StockInTab:
             # 将均价显示修改为整数
             avg_cost_display = f"{int(round(avg_cost)):,}" if avg_cost else "0"
             
-            self.stock_in_tree.insert('', 'end', values=(
+            # 交替行颜色由表格按显示位置添加
+            rows.append(((
                 item_name,
                 transaction_time.strftime("%Y-%m-%d %H:%M:%S") if hasattr(transaction_time, 'strftime') else str(transaction_time),
                 quantity_display,
                 cost_display,
                 avg_cost_display,
                 note if note is not None else ''
-            ), tags=row_tags)
+            ), ()))
+            keys.append(record_id)
+            records.append((item_name, quantity, cost, avg_cost))
             
+        # 一次性替换表格数据，按记录id保持行id，只更新有变化的行；筛选只在内存中进行
+        self.stock_in_tree.set_rows(rows, keys=keys)
+        self._stock_in_records = records
+        self._stock_in_total_row = None
+        self.apply_stock_in_filter()
+
+    def apply_stock_in_filter(self):
+        """按物品名筛选已加载的入库记录，并更新合计行"""
+        if not hasattr(self, '_stock_in_records'):
+            self.refresh_stock_in()
+            return
+        filter_text = self.stock_in_filter_var.get().strip()
+        self.stock_in_tree.set_filter((lambda values: filter_text in str(values[0])) if filter_text else None)
+        if self._stock_in_total_row is not None:
+            self.stock_in_tree.delete(self._stock_in_total_row)
+            self._stock_in_total_row = None
+        
+        filtered = [r for r in self._stock_in_records if not filter_text or filter_text in str(r[0])]
+        total = [0, 0, 0]  # 数量、花费、均价合计
+        for _, quantity, cost, avg_cost in filtered:
             try:
                 total[0] += int(quantity)
                 total[1] += int(round(cost))
@@ -436,7 +450,7 @@ class StockInTab:
                 
         # 合计行
         if filter_text and filtered:
-            self.stock_in_tree.insert('', 'end', values=(
+            self._stock_in_total_row = self.stock_in_tree.insert('', 'end', values=(
                 '合计', '', 
                 f"{total[0]:,}", 
                 f"{total[1]:,}", 
@@ -831,58 +845,51 @@ class StockInTab:
             messagebox.showinfo("提示", "请先添加图片")
             return
         
-        # 显示处理中提示
+        # 显示处理中提示，图片在后台并发识别
         self.status_var.set("正在进行OCR识别，请稍候...")
-        self.main_gui.root.update()
-        
+        self.main_gui.ocr_batch.run_in_tk(
+            self.main_gui.tk_async, ocr_images,
+            on_progress=lambda done, total, result: self.status_var.set(f"已识别 {done}/{total} 张图片..."),
+            on_done=self._on_batch_ocr_done,
+            owner=self.ocr_preview
+        )
+
+    def _on_batch_ocr_done(self, results):
+        """批量识别完成后按图片顺序解析结果"""
         all_data = []
         error_count = 0
+        failures = []
         
-        for i, img in enumerate(ocr_images):
-            try:
-                # 更新状态
-                self.status_var.set(f"正在处理第 {i+1}/{len(ocr_images)} 张图片...")
-                self.main_gui.root.update()
-                
-                buf = io.BytesIO()
-                img.save(buf, format='PNG')
-                img_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-                url = "http://sql.didiba.uk:1224/api/ocr"
-                payload = {
-                    "base64": img_b64,
-                    "options": {
-                        "data.format": "text"
-                    }
-                }
-                headers = {"Content-Type": "application/json"}
-                resp = requests.post(url, json=payload, headers=headers, timeout=20)
-                resp.raise_for_status()
-                ocr_result = resp.json()
-                text = ocr_result.get('data')
-                if not text:
-                    print(f"图片 {i+1} OCR识别返回空文本")
-                    error_count += 1
-                    continue
-                
-                # 使用入库专用的OCR解析方法
-                data = self.parse_stock_in_ocr_text_v2(text)
+        for result in results:
+            i = result.index
+            if not result.ok:
+                error_count += 1
+                print(f"处理图片 {i+1} 时出错: {result.error}")
+                failures.append(f"图片 {i+1}: {result.error}")
+                continue
+            text = result.text
+            if not text:
+                print(f"图片 {i+1} OCR识别返回空文本")
+                error_count += 1
+                continue
+            
+            # 使用入库专用的OCR解析方法
+            data = self.parse_stock_in_ocr_text_v2(text)
+            
+            # 如果专用方法失败，回退到通用方法
+            if not data:
+                data = self.parse_stock_in_ocr_text(text)
                 
-                # 如果专用方法失败，回退到通用方法
-                if not data:
-                    data = self.parse_stock_in_ocr_text(text)
-                    
-                if data:
-                    all_data.append(data)
-                else:
-                    print(f"图片 {i+1} 无法解析出有效数据")
-                    error_count += 1
-            except Exception as e:
+            if data:
+                all_data.append(data)
+            else:
+                print(f"图片 {i+1} 无法解析出有效数据")
                 error_count += 1
-                print(f"处理图片 {i+1} 时出错: {e}")
-                messagebox.showerror("错误", f"OCR识别失败: {e}")
         
         # 恢复状态
         self.status_var.set("就绪")
+        if failures:
+            messagebox.showerror("错误", "OCR识别失败:\n" + "\n".join(failures))
         
         if all_data:
             # 显示OCR识别数据预览窗口
@@ -982,6 +989,7 @@ class StockInTab:
         success_count = 0
         error_count = 0
         error_messages = []
+        records = []
         
         for data in confirmed_data:
             try:
@@ -1043,8 +1051,7 @@ class StockInTab:
                     
                 now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 
-                # 保存入库记录
-                self.db_manager.save_stock_in({
+                records.append({
                     'item_name': item_name,
                     'transaction_time': now,
                     'quantity': quantity,
@@ -1053,15 +1060,18 @@ class StockInTab:
                     'deposit': data.get('deposit', 0.00),
                     'note': note
                 })
-                
-                # 更新库存
-                self.db_manager.increase_inventory(item_name, quantity, avg_cost)
-                
-                success_count += 1
             except Exception as e:
                 error_count += 1
                 error_messages.append(f"处理记录时出错: {str(e)}")
         
+        # 入库记录和库存增加在同一事务内提交
+        for record, (ok, message) in zip(records, self.db_manager.bulk_save_stock_in(records, increase_inventory=True)):
+            if not ok:
+                error_count += 1
+                error_messages.append(f"{record['item_name']}: {message}")
+                continue
+            success_count += 1
+        
         # 刷新界面
         if success_count > 0:
             self.refresh_stock_in()
@@ -1127,15 +1137,14 @@ class StockInTab:
         self.monitor_button.config(text="停止监听剪贴板", bootstyle="danger")
         self.status_var.set("剪贴板监听已启动，等待图片...")
         
-        # 开始监听循环
-        self.check_clipboard()
+        # 由调度器每秒检查一次剪贴板
+        self.main_gui.task_scheduler.every('stock_in.clipboard', 1000, self.check_clipboard,
+                                           owner=self.monitor_button, run_now=True)
     
     def stop_clipboard_monitoring(self):
         """停止监听剪贴板"""
-        # 取消定时任务
-        if self.monitor_job_id is not None:
-            self.main_gui.root.after_cancel(self.monitor_job_id)
-            self.monitor_job_id = None
+        # 取消定时检查
+        self.main_gui.task_scheduler.stop('stock_in.clipboard')
             
         # 更新UI
         self.monitoring_clipboard = False
@@ -1143,34 +1152,35 @@ class StockInTab:
         self.status_var.set("剪贴板监听已停止")
     
     def check_clipboard(self):
-        """检查剪贴板是否有图片"""
+        """检查剪贴板是否有图片，读取剪贴板在后台线程中进行"""
         if not self.monitoring_clipboard:
             return
-            
+        self.main_gui.task_scheduler.submit(
+            'stock_in.clipboard', clipboard_helper.get_clipboard_image,
+            owner=self.monitor_button,
+            on_done=self._on_clipboard_checked,
+            on_error=lambda e: self.status_var.set(f"检查剪贴板出错: {str(e)}")
+        )
+    
+    def _on_clipboard_checked(self, img):
+        """在主线程中处理剪贴板中的图片"""
+        if not self.monitoring_clipboard or img is None:
+            return
+        # 有图片，处理它
+        self.process_clipboard_image(img)
+        
+        # 处理完后清除剪贴板
         try:
-            # 检查剪贴板是否有图片
-            img = clipboard_helper.get_clipboard_image()
-            if img is not None:
-                # 有图片，处理它
-                self.process_clipboard_image(img)
-                
-                # 处理完后清除剪贴板
-                try:
-                    if clipboard_helper.PYPERCLIP_AVAILABLE:
-                        import pyperclip
-                        pyperclip.copy('')
-                    elif clipboard_helper.WIN32_AVAILABLE:
-                        import win32clipboard
-                        win32clipboard.OpenClipboard()
-                        win32clipboard.EmptyClipboard()
-                        win32clipboard.CloseClipboard()
-                except Exception as e:
-                    self.status_var.set(f"清除剪贴板失败: {str(e)}")
+            if clipboard_helper.PYPERCLIP_AVAILABLE:
+                import pyperclip
+                pyperclip.copy('')
+            elif clipboard_helper.WIN32_AVAILABLE:
+                import win32clipboard
+                win32clipboard.OpenClipboard()
+                win32clipboard.EmptyClipboard()
+                win32clipboard.CloseClipboard()
         except Exception as e:
-            self.status_var.set(f"检查剪贴板出错: {str(e)}")
-            
-        # 继续监听，设置下一次检查
-        self.monitor_job_id = self.main_gui.root.after(1000, self.check_clipboard)  # 每秒检查一次
+            self.status_var.set(f"清除剪贴板失败: {str(e)}")
     
     def process_clipboard_image(self, img):
         """处理从剪贴板获取的图片"""
@@ -1198,7 +1208,7 @@ class StockInTab:
             # 如果鼠标离开了上一个高亮行，恢复其原始样式
             if self.last_hover_row and self.last_hover_row != row_id:
                 # 先检查行是否仍然存在
-                if self.last_hover_row in self.stock_in_tree.get_children():
+                if self.stock_in_tree.exists(self.last_hover_row):
                     # 获取行的当前标签
                     current_tags = list(self.stock_in_tree.item(self.last_hover_row, 'tags'))
                     # 移除悬停标签
@@ -1212,7 +1222,7 @@ class StockInTab:
             # 如果鼠标位于一个有效行上，应用悬停高亮效果
             if row_id and row_id != self.last_hover_row:
                 # 确保行仍然存在
-                if row_id in self.stock_in_tree.get_children():
+                if self.stock_in_tree.exists(row_id):
                     # 获取行的当前标签
                     current_tags = list(self.stock_in_tree.item(row_id, 'tags'))
                     # 添加悬停标签
@@ -9,12 +9,11 @@ except ImportError:
     # 如果PIL模块不完整，创建一个占位符
     PIL_AVAILABLE = False
     messagebox.showwarning("模块缺失", "PIL图像处理模块不完整，图片粘贴功能将不可用。请确保正确安装Pillow库。")
-import io, base64, requests
 from datetime import datetime
 import tkinter as tk
 import re
 from src.gui.dialogs import ModalInputDialog
-from src.gui.components import OCRPreview, OCRPreviewDialog
+from src.gui.components import OCRPreview, OCRPreviewDialog, VirtualTreeview
 from src.utils import clipboard_helper
 
 class StockOutTab:
@@ -34,7 +33,6 @@ class StockOutTab:
         
         # 添加剪贴板监听状态标志
         self.monitoring_clipboard = False
-        self.monitor_job_id = None
         
         # 创建标签页
         self.create_tab()
@@ -134,10 +132,10 @@ class StockOutTab:
         self.stock_out_filter_var = tb.StringVar()
         filter_entry = tb.Entry(filter_frame, textvariable=self.stock_out_filter_var, width=12, bootstyle="warning")
         filter_entry.pack(side='left', padx=2)
-        filter_entry.bind("<Return>", lambda e: self.refresh_stock_out())
+        filter_entry.bind("<Return>", lambda e: self.apply_stock_out_filter())
         
-        tb.Button(filter_frame, text="筛选", command=self.refresh_stock_out, bootstyle="warning-outline").pack(side='left', padx=2)
-        tb.Button(filter_frame, text="清除", command=lambda: [self.stock_out_filter_var.set(""), self.refresh_stock_out()], bootstyle="secondary-outline").pack(side='left', padx=2)
+        tb.Button(filter_frame, text="筛选", command=self.apply_stock_out_filter, bootstyle="warning-outline").pack(side='left', padx=2)
+        tb.Button(filter_frame, text="清除", command=lambda: [self.stock_out_filter_var.set(""), self.apply_stock_out_filter()], bootstyle="secondary-outline").pack(side='left', padx=2)
         
         # 主区域分割
         main_area = tb.Frame(stock_out_frame, bootstyle="light")
@@ -172,15 +170,18 @@ class StockOutTab:
             '备注': 'center'      # 文本居中对齐
         }
         
-        # 创建表格
-        self.stock_out_tree = tb.Treeview(table_frame, columns=columns, show='headings', 
-                                         height=16, bootstyle="warning", style="StockOut.Treeview")
+        # 创建表格（虚拟表格，只创建可见区域的行）
+        self.stock_out_tree = VirtualTreeview(table_frame, columns=columns, show='headings', 
+                                         height=16, bootstyle="warning", style="StockOut.Treeview",
+                                         stripe_tags=('evenrow', 'oddrow'))
         
         for col in columns:
             self.stock_out_tree.heading(col, text=col, anchor='center')
             width = column_widths.get(col, 120)
             align = column_aligns.get(col, 'center')
             self.stock_out_tree.column(col, width=width, anchor=align)
+        # 点击列标题排序
+        self.stock_out_tree.enable_heading_sort()
             
         # 滚动条
         scrollbar = tb.Scrollbar(table_frame, orient="vertical", command=self.stock_out_tree.yview, bootstyle="warning-round")
@@ -373,31 +374,19 @@ class StockOutTab:
 
     def refresh_stock_out(self):
         """刷新出库记录表格"""
-        for item in self.stock_out_tree.get_children():
-            self.stock_out_tree.delete(item)
-            
         self.status_var.set("正在加载数据...")
         stock_out_data = self.db_manager.get_stock_out()
-        filter_text = self.stock_out_filter_var.get().strip()
-        filtered = []
+        rows = []
+        keys = []
+        records = []
         
         for item in stock_out_data:
             try:
                 # 正确解析数据库查询结果，包括押金字段
-                _, item_name, transaction_time, quantity, unit_price, fee, deposit, total_amount, note, *_ = item
+                record_id, item_name, transaction_time, quantity, unit_price, fee, deposit, total_amount, note, *_ = item
             except Exception as e:
                 messagebox.showerror("数据结构异常", f"出库数据结构异常: {e}\n请检查表结构与代码字段一致性。\nitem={item}")
                 continue
-                
-            if not filter_text or filter_text in str(item_name):
-                filtered.append((item_name, transaction_time, quantity, unit_price, fee, total_amount, note))
-                
-        # 添加数据到表格
-        total = [0, 0, 0, 0, 0]  # 数量、单价和、手续费和、总额
-        
-        for i, (item_name, transaction_time, quantity, unit_price, fee, total_amount, note) in enumerate(filtered):
-            # 设置交替行颜色
-            row_tags = ('evenrow',) if i % 2 == 0 else ('oddrow',)
             
             # 格式化数字显示
             quantity_display = f"{int(quantity):,}" if quantity else "0"
@@ -405,7 +394,8 @@ class StockOutTab:
             fee_display = f"{int(round(fee)):,}" if fee else "0"
             total_amount_display = f"{int(round(total_amount)):,}" if total_amount else "0"
             
-            self.stock_out_tree.insert('', 'end', values=(
+            # 交替行颜色由表格按显示位置添加
+            rows.append(((
                 item_name,
                 transaction_time.strftime("%Y-%m-%d %H:%M:%S") if hasattr(transaction_time, 'strftime') else str(transaction_time),
                 quantity_display,
@@ -413,8 +403,30 @@ class StockOutTab:
                 fee_display,
                 total_amount_display,
                 note if note is not None else ''
-            ), tags=row_tags)
+            ), ()))
+            keys.append(record_id)
+            records.append((item_name, quantity, unit_price, fee, total_amount))
             
+        # 一次性替换表格数据，按记录id保持行id，只更新有变化的行；筛选只在内存中进行
+        self.stock_out_tree.set_rows(rows, keys=keys)
+        self._stock_out_records = records
+        self._stock_out_total_row = None
+        self.apply_stock_out_filter()
+
+    def apply_stock_out_filter(self):
+        """按物品名筛选已加载的出库记录，并更新合计行"""
+        if not hasattr(self, '_stock_out_records'):
+            self.refresh_stock_out()
+            return
+        filter_text = self.stock_out_filter_var.get().strip()
+        self.stock_out_tree.set_filter((lambda values: filter_text in str(values[0])) if filter_text else None)
+        if self._stock_out_total_row is not None:
+            self.stock_out_tree.delete(self._stock_out_total_row)
+            self._stock_out_total_row = None
+        
+        filtered = [r for r in self._stock_out_records if not filter_text or filter_text in str(r[0])]
+        total = [0, 0, 0, 0, 0]  # 数量、单价和、手续费和、总额
+        for _, quantity, unit_price, fee, total_amount in filtered:
             try:
                 total[0] += int(quantity)
                 total[1] += int(round(unit_price))
@@ -425,7 +437,7 @@ class StockOutTab:
                 
         # 合计行
         if filter_text and filtered:
-            self.stock_out_tree.insert('', 'end', values=(
+            self._stock_out_total_row = self.stock_out_tree.insert('', 'end', values=(
                 '合计', '', 
                 f"{total[0]:,}", 
                 f"{total[1]:,}", 
@@ -720,24 +732,24 @@ class StockOutTab:
             messagebox.showinfo("提示", "请先添加图片")
             return
             
+        # 图片在后台并发识别，完成后在主线程中解析
+        self.status_var.set("正在进行OCR识别，请稍候...")
+        self.main_gui.ocr_batch.run_in_tk(
+            self.main_gui.tk_async, ocr_images,
+            on_progress=lambda done, total, result: self.status_var.set(f"已识别 {done}/{total} 张图片..."),
+            on_done=self._on_batch_ocr_done,
+            owner=self.ocr_preview
+        )
+
+    def _on_batch_ocr_done(self, results):
+        """批量识别完成后按图片顺序解析出库数据"""
+        self.status_var.set("就绪")
         all_data = []
-        for img in ocr_images:
+        for result in results:
             try:
-                buf = io.BytesIO()
-                img.save(buf, format='PNG')
-                img_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-                url = "http://sql.didiba.uk:1224/api/ocr"
-                payload = {
-                    "base64": img_b64,
-                    "options": {
-                        "data.format": "text"
-                    }
-                }
-                headers = {"Content-Type": "application/json"}
-                resp = requests.post(url, json=payload, headers=headers, timeout=20)
-                resp.raise_for_status()
-                ocr_result = resp.json()
-                text = ocr_result.get('data')
+                if not result.ok:
+                    raise result.error
+                text = result.text
                 if not text:
                     continue
                 
@@ -860,6 +872,7 @@ class StockOutTab:
         success_count = 0
         error_count = 0
         error_messages = []
+        records = []
         
         for data in confirmed_data:
             try:
@@ -905,14 +918,7 @@ class StockOutTab:
                 
                 now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 
-                # 自动减少库存
-                success = self.db_manager.decrease_inventory(item_name, quantity)
-                if not success:
-                    error_count += 1
-                    error_messages.append(f"{item_name}: 库存不足，无法出库数量 {quantity}")
-                    continue
-                    
-                self.db_manager.save_stock_out({
+                records.append({
                     'item_name': item_name,
                     'transaction_time': now,
                     'quantity': quantity,
@@ -922,12 +928,18 @@ class StockOutTab:
                     'total_amount': total_amount,
                     'note': data.get('note', '') or data.get('备注', '')  # 支持中文字段名
                 })
-                
-                success_count += 1
             except Exception as e:
                 error_count += 1
                 error_messages.append(f"处理记录时出错: {str(e)}")
         
+        # 一次事务批量扣减库存并保存出库记录，库存不足的记录不会写入
+        for record, (ok, message) in zip(records, self.db_manager.bulk_save_stock_out(records, decrease_inventory=True)):
+            if ok:
+                success_count += 1
+            else:
+                error_count += 1
+                error_messages.append(f"{record['item_name']}: {message}")
+        
         # 刷新界面
         if success_count > 0:
             self.refresh_stock_out()
@@ -1208,7 +1220,7 @@ class StockOutTab:
             # 获取行的当前标签
             try:
                 # 检查行是否仍然存在
-                if self.last_hover_row in self.stock_out_tree.get_children():
+                if self.stock_out_tree.exists(self.last_hover_row):
                     current_tags = list(self.stock_out_tree.item(self.last_hover_row, 'tags'))
                     # 移除悬停标签
                     if 'hovering' in current_tags:
@@ -1222,7 +1234,7 @@ class StockOutTab:
         if row_id and row_id != self.last_hover_row:
             try:
                 # 确保行存在
-                if row_id in self.stock_out_tree.get_children():
+                if self.stock_out_tree.exists(row_id):
                     # 获取行的当前标签
                     current_tags = list(self.stock_out_tree.item(row_id, 'tags'))
                     # 添加悬停标签
@@ -1271,15 +1283,14 @@ class StockOutTab:
         self.monitor_button.config(text="停止监听剪贴板", bootstyle="danger")
         self.status_var.set("剪贴板监听已启动，等待图片...")
         
-        # 开始监听循环
-        self.check_clipboard()
+        # 由调度器每秒检查一次剪贴板
+        self.main_gui.task_scheduler.every('stock_out.clipboard', 1000, self.check_clipboard,
+                                           owner=self.monitor_button, run_now=True)
     
     def stop_clipboard_monitoring(self):
         """停止监听剪贴板"""
-        # 取消定时任务
-        if self.monitor_job_id is not None:
-            self.main_gui.root.after_cancel(self.monitor_job_id)
-            self.monitor_job_id = None
+        # 取消定时检查
+        self.main_gui.task_scheduler.stop('stock_out.clipboard')
             
         # 更新UI
         self.monitoring_clipboard = False
@@ -1287,34 +1298,35 @@ class StockOutTab:
         self.status_var.set("剪贴板监听已停止")
     
     def check_clipboard(self):
-        """检查剪贴板是否有图片"""
+        """检查剪贴板是否有图片，读取剪贴板在后台线程中进行"""
         if not self.monitoring_clipboard:
             return
-            
+        self.main_gui.task_scheduler.submit(
+            'stock_out.clipboard', clipboard_helper.get_clipboard_image,
+            owner=self.monitor_button,
+            on_done=self._on_clipboard_checked,
+            on_error=lambda e: self.status_var.set(f"检查剪贴板出错: {str(e)}")
+        )
+    
+    def _on_clipboard_checked(self, img):
+        """在主线程中处理剪贴板中的图片"""
+        if not self.monitoring_clipboard or img is None:
+            return
+        # 有图片，处理它
+        self.process_clipboard_image(img)
+        
+        # 处理完后清除剪贴板
         try:
-            # 检查剪贴板是否有图片
-            img = clipboard_helper.get_clipboard_image()
-            if img is not None:
-                # 有图片，处理它
-                self.process_clipboard_image(img)
-                
-                # 处理完后清除剪贴板
-                try:
-                    if clipboard_helper.PYPERCLIP_AVAILABLE:
-                        import pyperclip
-                        pyperclip.copy('')
-                    elif clipboard_helper.WIN32_AVAILABLE:
-                        import win32clipboard
-                        win32clipboard.OpenClipboard()
-                        win32clipboard.EmptyClipboard()
-                        win32clipboard.CloseClipboard()
-                except Exception as e:
-                    self.status_var.set(f"清除剪贴板失败: {str(e)}")
+            if clipboard_helper.PYPERCLIP_AVAILABLE:
+                import pyperclip
+                pyperclip.copy('')
+            elif clipboard_helper.WIN32_AVAILABLE:
+                import win32clipboard
+                win32clipboard.OpenClipboard()
+                win32clipboard.EmptyClipboard()
+                win32clipboard.CloseClipboard()
         except Exception as e:
-            self.status_var.set(f"检查剪贴板出错: {str(e)}")
-            
-        # 继续监听，设置下一次检查
-        self.monitor_job_id = self.main_gui.root.after(1000, self.check_clipboard)  # 每秒检查一次
+            self.status_var.set(f"清除剪贴板失败: {str(e)}")
     
     def process_clipboard_image(self, img):
         """处理从剪贴板获取的图片"""
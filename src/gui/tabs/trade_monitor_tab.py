@@ -1,12 +1,12 @@
 import ttkbootstrap as tb
 from tkinter import ttk, messagebox, filedialog as fd
 import tkinter as tk
-import threading
 from datetime import datetime
 from PIL import Image
 import os
 from src.gui.dialogs import ModalInputDialog
 from src.gui.components import OCRPreview, OCRPreviewDialog
+from src.gui.components.row_reconciler import RowReconciler
 from src.utils import clipboard_helper
 from src.gui.utils.monitor_ocr_parser import parse_monitor_ocr_text
 import logging
@@ -22,7 +22,6 @@ class TradeMonitorTab:
         
         # 添加线程安全标志
         self.is_destroyed = False
-        self.active_threads = []
         
         # 添加OCR图片存储列表
         self._pending_ocr_images = []
@@ -176,6 +175,8 @@ class TradeMonitorTab:
         # 创建表格
         self.monitor_tree = tb.Treeview(table_frame, columns=columns, show='headings', 
                                        height=16, bootstyle="primary", style="Monitor.Treeview")
+        # 按记录id增量更新表格行
+        self.monitor_rows = RowReconciler(self.monitor_tree)
         
         for col in columns:
             self.monitor_tree.heading(col, text=col, anchor='center')
@@ -478,52 +479,31 @@ class TradeMonitorTab:
             
             total_images = len(self._pending_ocr_images)
             
-            # 创建全局变量存储OCR结果，确保在线程完成后仍然可用
+            # 创建全局变量存储OCR结果，确保在识别完成后仍然可用
             self._ocr_processing_result = []
             
-            def process_images():
-                import io
-                import base64
-                import requests
+            def update_progress(done, total, result):
+                progress.configure(value=done / total * 100)
+                progress_label.configure(text=f"处理图片 {done}/{total}...")
                 
+            def process_results(results):
                 all_ocr_data = []  # 局部变量存储OCR结果
+                item_dict = self.main_gui.load_item_dict()
                 
-                for i, img in enumerate(self._pending_ocr_images):
-                    # 更新进度
-                    progress_window.after(10, lambda p=((i+1)/total_images*100): progress.configure(value=p))
-                    progress_window.after(10, lambda idx=i+1, total=total_images: 
-                                         progress_label.configure(text=f"处理图片 {idx}/{total}..."))
+                for result in results:
+                    i = result.index
+                    if not result.ok:
+                        print(f"处理图片 {i+1} 时出错: {str(result.error)}")
+                        continue
+                    ocr_text = result.text
+                    if not ocr_text:
+                        print(f"图片 {i+1} OCR识别返回空文本")
+                        continue
+                        
+                    print(f"OCR识别结果：\n{ocr_text}")  # 调试输出
                     
                     try:
-                        # 直接在这里实现OCR API调用
-                        buf = io.BytesIO()
-                        img.save(buf, format='PNG')
-                        img_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-                        
-                        # 发送API请求
-                        url = "http://sql.didiba.uk:1224/api/ocr"
-                        payload = {
-                            "base64": img_b64,
-                            "options": {
-                                "data.format": "text"
-                            }
-                        }
-                        headers = {"Content-Type": "application/json"}
-                        
-                        resp = requests.post(url, json=payload, headers=headers, timeout=20)
-                        resp.raise_for_status()
-                        
-                        ocr_result = resp.json()
-                        ocr_text = ocr_result.get('data', '')
-                        
-                        if not ocr_text:
-                            print(f"图片 {i+1} OCR识别返回空文本")
-                            continue
-                            
-                        print(f"OCR识别结果：\n{ocr_text}")  # 调试输出
-                        
                         # 解析OCR文本，使用专用解析器
-                        item_dict = self.main_gui.load_item_dict()
                         ocr_data = parse_monitor_ocr_text(ocr_text, item_dict)
                         
                         # 调试信息：打印解析结果
@@ -532,7 +512,6 @@ class TradeMonitorTab:
                         # 将结果添加到列表
                         if ocr_data:
                             all_ocr_data.extend(ocr_data)
-                            
                     except Exception as e:
                         print(f"处理图片 {i+1} 时出错: {str(e)}")
                 
@@ -543,11 +522,15 @@ class TradeMonitorTab:
                 print(f"所有OCR数据: {all_ocr_data}")
                 print(f"数据列表长度: {len(all_ocr_data)}")
                 
-                # 在主线程上显示结果，使用progress_window.after确保在窗口销毁前调度
-                progress_window.after(100, self._finish_ocr_processing)
+                self._finish_ocr_processing()
                 
-            # 在新线程中处理图片
-            threading.Thread(target=process_images, daemon=True).start()
+            # 图片在共用的事件循环线程中限流并发识别，进度和结果在主线程中回调
+            self.main_gui.ocr_batch.run_in_tk(
+                self.main_gui.tk_async, list(self._pending_ocr_images),
+                on_progress=update_progress,
+                on_done=process_results,
+                owner=progress_window
+            )
             
         except Exception as e:
             messagebox.showerror("错误", f"OCR识别失败: {str(e)}")
@@ -669,7 +652,8 @@ class TradeMonitorTab:
             # 获取当前日期和时间
             now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            # 批量导入
+            # 校验并整理待导入数据
+            records = []
             for item in confirmed_data:
                 try:
                     # 从item字典中获取数据
@@ -694,49 +678,57 @@ class TradeMonitorTab:
                         failed_items.append(f"{item_name}(无服务器)")
                         continue
                     
-                    # 插入数据库
-                    self.db_manager.add_trade_monitor(
-                        item_name=item_name,
-                        price=price,
-                        quantity=quantity,
-                        server=server,
-                        update_date=now,
-                        note=note
-                    )
-                    
-                    # 记录操作日志
-                    if hasattr(self.main_gui, 'log_operation'):
-                        from src.utils.operation_types import OperationType, TabName
-                        last_id = self.db_manager.get_last_inserted_id()
-                        data = {
-                            'id': last_id,
-                            'item_name': item_name,
-                            'price': price,
-                            'quantity': quantity,
-                            'server': server,
-                            'update_date': now,
-                            'note': note
-                        }
-                        self.main_gui.log_operation(OperationType.ADD, TabName.TRADE_MONITOR, data)
-                    
-                    # 尝试发送邮件通知
-                    try:
-                        self._send_email_notification(item_name, price, quantity, server, note)
-                    except Exception as e:
-                        # 邮件发送失败不影响主流程
-                        import logging
-                        logger = logging.getLogger(__name__)
-                        logger.error(f"发送邮件通知失败: {e}", exc_info=True)
-                        
-                    # 记录成功导入的项目
-                    imported_count += 1
-                    success_items.append(item_name)
+                    records.append({
+                        'item_name': item_name,
+                        'monitor_time': now,
+                        'quantity': quantity,
+                        'market_price': price,
+                        'strategy': note,
+                        'server': server,
+                        'note': note
+                    })
                     
                 except Exception as e:
                     failed_count += 1
                     failed_items.append(f"{item.get('物品', '未知')}({str(e)})")
                     continue
             
+            # 一次事务批量写入数据库
+            imported = []
+            for record, (ok, message) in zip(records, self.db_manager.bulk_upsert_trade_monitor(records)):
+                if not ok:
+                    failed_count += 1
+                    failed_items.append(f"{record['item_name']}({message})")
+                    continue
+                imported.append({
+                    'item_name': record['item_name'],
+                    'price': record['market_price'],
+                    'quantity': record['quantity'],
+                    'server': record['server'],
+                    'update_date': now,
+                    'monitor_time': now,
+                    'note': record['note']
+                })
+                
+                # 尝试发送邮件通知
+                try:
+                    self._send_email_notification(record['item_name'], record['market_price'],
+                                                  record['quantity'], record['server'], record['note'])
+                except Exception as e:
+                    # 邮件发送失败不影响主流程
+                    import logging
+                    logger = logging.getLogger(__name__)
+                    logger.error(f"发送邮件通知失败: {e}", exc_info=True)
+                    
+                # 记录成功导入的项目
+                imported_count += 1
+                success_items.append(record['item_name'])
+            
+            # 记录操作日志
+            if imported and hasattr(self.main_gui, 'log_operation'):
+                from src.utils.operation_types import OperationType, TabName
+                self.main_gui.log_operation(OperationType.BATCH_ADD, TabName.TRADE_MONITOR, imported)
+            
             # 刷新表格显示
             self.refresh_monitor()
             
@@ -1229,10 +1221,10 @@ class TradeMonitorTab:
             return
             
         self.status_var.set("正在加载数据...")
-        # 创建一个后台线程来获取数据
-        thread = threading.Thread(target=self._fetch_and_draw_monitor, daemon=True)
-        thread.start()
-        self.active_threads.append(thread)
+        # 由调度器在后台获取数据，排队中不重复提交，执行中再次刷新时完成后再执行一次
+        self.main_gui.task_scheduler.submit(
+            'trade_monitor.refresh', self._fetch_and_draw_monitor, owner=self.monitor_frame
+        )
 
     def _fetch_and_draw_monitor(self):
         """后台线程获取并显示交易监控数据"""
@@ -1276,6 +1268,7 @@ class TradeMonitorTab:
                     item_id, item_name, monitor_time, quantity, market_price, target_price, planned_price, break_even_price, profit, profit_rate, strategy, *_ = row
                     
                     table_data.append({
+                        'item_id': item_id,
                         'item_name': item_name,
                         'monitor_time': monitor_time,
                         'quantity': self._calc_field(quantity, 0, int),
@@ -1375,12 +1368,8 @@ class TradeMonitorTab:
             return default_value
 
     def _draw_monitor(self, table_data):
-        """绘制交易监控表格"""
-        # 清空现有数据
-        for item in self.monitor_tree.get_children():
-            self.monitor_tree.delete(item)
-            
-        # 添加数据到表格
+        """绘制交易监控表格，只修改有变化的行"""
+        rows = []
         for i, item in enumerate(table_data):
             # 设置交替行颜色和利润标签
             tags = []
@@ -1445,8 +1434,7 @@ class TradeMonitorTab:
             if target_price > 0 or planned_price > 0 or strategy:
                 tags.append('manual_field')
             
-            # 插入行
-            self.monitor_tree.insert('', 'end', values=(
+            rows.append((item['item_id'], (
                 item_name_display,
                 item['monitor_time'].strftime("%Y-%m-%d %H:%M:%S") if hasattr(item['monitor_time'], 'strftime') else str(item['monitor_time']),
                 quantity_display,
@@ -1457,7 +1445,9 @@ class TradeMonitorTab:
                 profit_display,
                 profit_rate_display,
                 strategy_display
-            ), tags=tags) 
+            ), tags))
+        
+        self.monitor_rows.update(rows)
 
     def on_destroy(self, event):
         """处理销毁事件"""
@@ -1466,12 +1456,7 @@ class TradeMonitorTab:
             # 清理资源
             print("交易监控标签页被销毁，停止所有后台线程")
             
-            # 清理线程
-            for thread in self.active_threads:
-                if thread.is_alive():
-                    # 无法强制终止线程，但可以标记已销毁，线程会自行检查
-                    pass
-            self.active_threads.clear()
+            # 后台刷新任务以monitor_frame为owner，由调度器自动取消
             
             # 清理资源
             self._pending_ocr_images.clear()
@@ -132,17 +132,13 @@ def backup_database_python():
                 f.write("DROP TABLE IF EXISTS `" + table + "`;\n")
                 f.write(create_table + ";\n\n")
                 
-                # 获取表数据
-                cursor.execute(f"SELECT * FROM `{table}`")
-                rows = cursor.fetchall()
-                
-                if rows:
-                    f.write(f"-- Data for {table}\n")
-                    f.write("LOCK TABLES `" + table + "` WRITE;\n")
-                    
-                    # 获取列名
-                    cursor.execute(f"DESCRIBE `{table}`")
-                    columns = [column[0] for column in cursor.fetchall()]
+                # 用服务器端游标逐批读取表数据，不把整张表读入内存
+                has_rows = False
+                for rows in db_manager.iter_query_chunks(conn, f"SELECT * FROM `{table}`"):
+                    if not has_rows:
+                        f.write(f"-- Data for {table}\n")
+                        f.write("LOCK TABLES `" + table + "` WRITE;\n")
+                        has_rows = True
                     
                     # 构建INSERT语句
                     for row in rows:
@@ -158,7 +154,8 @@ def backup_database_python():
                                 values.append("'" + str(value).replace("'", "''") + "'")
                                 
                         f.write(f"INSERT INTO `{table}` VALUES ({', '.join(values)});\n")
-                    
+                
+                if has_rows:
                     f.write("UNLOCK TABLES;\n\n")
             
             # 写入文件尾
@@ -191,10 +188,11 @@ def clear_stock_data():
     
     try:
         # 清空库存相关表
-        tables = ['stock_in', 'stock_out']
+        tables = ['stock_in', 'stock_out', 'item_trade_summary']
         for table in tables:
             cursor.execute(f"DELETE FROM {table}")
         conn.commit()
+        db_manager.mark_tables_changed(*tables)
         print("已清空原有库存数据")
         return True
     except Exception as e:
@@ -220,6 +218,8 @@ def import_stock_in(df, progress_callback=None):
         # 导入数据
         success_count = 0
         error_count = 0
+        records = []
+        source_rows = []
         
         for idx, (_, row) in enumerate(df.iterrows()):
             try:
@@ -239,7 +239,7 @@ def import_stock_in(df, progress_callback=None):
                         # 如果解析失败，使用当前时间
                         transaction_time = datetime.now()
                 
-                db_manager.save_stock_in({
+                records.append({
                     'item_name': str(row['物品']),
                     'transaction_time': transaction_time,
                     'quantity': int(float(row['入库数量'])) if pd.notna(row['入库数量']) else 0,
@@ -247,11 +247,19 @@ def import_stock_in(df, progress_callback=None):
                     'avg_cost': int(float(row['入库均价'])) if pd.notna(row['入库均价']) else 0,
                     'note': note
                 })
-                success_count += 1
+                source_rows.append(row)
             except Exception as e:
                 print(f"导入入库记录失败: {e}, 行: {row.to_dict()}")
                 error_count += 1
         
+        # 一次事务批量写入
+        for row, (ok, message) in zip(source_rows, db_manager.bulk_save_stock_in(records)):
+            if ok:
+                success_count += 1
+            else:
+                print(f"导入入库记录失败: {message}, 行: {row.to_dict()}")
+                error_count += 1
+        
         print(f"入库数据导入完成！成功: {success_count}, 失败: {error_count}")
         return True
     except Exception as e:
@@ -273,6 +281,8 @@ def import_stock_out(df, progress_callback=None):
         # 导入数据
         success_count = 0
         error_count = 0
+        records = []
+        source_rows = []
         
         def safe_int(val):
             try:
@@ -309,7 +319,7 @@ def import_stock_out(df, progress_callback=None):
                 if '总金额' in row and pd.notna(row['总金额']):
                     total_amount = safe_int(row['总金额'])
                 
-                db_manager.save_stock_out({
+                records.append({
                     'item_name': str(row['物品']),
                     'transaction_time': transaction_time,
                     'quantity': quantity,
@@ -319,11 +329,19 @@ def import_stock_out(df, progress_callback=None):
                     'total_amount': total_amount,
                     'note': note
                 })
-                success_count += 1
+                source_rows.append(row)
             except Exception as e:
                 print(f"导入出库记录失败: {e}, 行: {row.to_dict()}")
                 error_count += 1
         
+        # 一次事务批量写入
+        for row, (ok, message) in zip(source_rows, db_manager.bulk_save_stock_out(records)):
+            if ok:
+                success_count += 1
+            else:
+                print(f"导入出库记录失败: {message}, 行: {row.to_dict()}")
+                error_count += 1
+        
         print(f"出库数据导入完成！成功: {success_count}, 失败: {error_count}")
         return True
     except Exception as e:
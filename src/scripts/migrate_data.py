@@ -7,7 +7,9 @@ from tqdm import tqdm
 import json
 import subprocess
 import shlex
+from itertools import zip_longest
 from src.utils.db_backup import DatabaseBackup
+from src.core.db_manager import DatabaseManager
 
 class DataMigrator:
     def __init__(self):
@@ -159,18 +161,17 @@ class DataMigrator:
             return None
 
     def verify_data(self, table_name, local_rows, remote_rows):
-        """验证数据完整性"""
+        """验证数据完整性（local_rows和remote_rows可以是流式读取的行迭代器）"""
         print(f"\n验证表 {table_name} 的数据完整性...")
         
-        # 验证记录数
-        if len(local_rows) != len(remote_rows):
-            print(f"警告: 表 {table_name} 记录数不匹配")
-            print(f"本地记录数: {len(local_rows)}")
-            print(f"远程记录数: {len(remote_rows)}")
-            return False
-            
-        # 验证数据内容
-        for i, (local_row, remote_row) in enumerate(zip(local_rows, remote_rows)):
+        missing = object()
+        for i, (local_row, remote_row) in enumerate(zip_longest(local_rows, remote_rows, fillvalue=missing)):
+            # 验证记录数
+            if local_row is missing or remote_row is missing:
+                print(f"警告: 表 {table_name} 记录数不匹配")
+                print(f"{'远程' if local_row is missing else '本地'}表在第 {i+1} 行之后还有多余记录")
+                return False
+            # 验证数据内容
             if local_row != remote_row:
                 print(f"警告: 表 {table_name} 第 {i+1} 行数据不匹配")
                 print(f"本地数据: {local_row}")
@@ -193,11 +194,11 @@ class DataMigrator:
         self.local_cursor.execute(f"DESCRIBE {table_name}")
         columns = [column[0] for column in self.local_cursor.fetchall()]
         
-        # 获取本地数据
-        self.local_cursor.execute(f"SELECT * FROM {table_name}")
-        local_rows = self.local_cursor.fetchall()
+        # 获取本地记录数，数据本身用服务器端游标分批读取，不一次性读入内存
+        self.local_cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        total_rows = self.local_cursor.fetchone()[0]
         
-        if not local_rows:
+        if not total_rows:
             print(f"表 {table_name} 没有数据需要迁移")
             return
         
@@ -213,16 +214,18 @@ class DataMigrator:
         
         # 迁移数据
         try:
-            # 使用tqdm显示进度条
-            for row in tqdm(local_rows, desc=f"迁移 {table_name}", unit="行"):
-                self.remote_cursor.execute(insert_query, row)
+            # 使用tqdm显示进度条，每批一条多行INSERT
+            with tqdm(total=total_rows, desc=f"迁移 {table_name}", unit="行") as progress:
+                for rows in DatabaseManager.iter_query_chunks(self.local_conn, f"SELECT * FROM {table_name}"):
+                    self.remote_cursor.executemany(insert_query, rows)
+                    progress.update(len(rows))
             self.remote_conn.commit()
             
-            # 验证数据
-            self.remote_cursor.execute(f"SELECT * FROM {table_name}")
-            remote_rows = self.remote_cursor.fetchall()
+            # 验证数据：两边同时流式读取逐行比较
+            local_rows = (row for rows in DatabaseManager.iter_query_chunks(self.local_conn, f"SELECT * FROM {table_name}") for row in rows)
+            remote_rows = (row for rows in DatabaseManager.iter_query_chunks(self.remote_conn, f"SELECT * FROM {table_name}") for row in rows)
             if self.verify_data(table_name, local_rows, remote_rows):
-                print(f"成功迁移并验证 {len(local_rows)} 条数据到表 {table_name}")
+                print(f"成功迁移并验证 {total_rows} 条数据到表 {table_name}")
             else:
                 print(f"警告: 表 {table_name} 数据验证未通过")
                 
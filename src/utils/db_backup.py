@@ -182,51 +182,45 @@ class DatabaseBackup:
                     f.write(f"DROP TABLE IF EXISTS `{table_name}`;\n")
                     f.write(f"{create_table};\n\n")
                     
-                    # 获取表数据
-                    cursor.execute(f"SELECT * FROM `{table_name}`")
-                    rows = cursor.fetchall()
+                    # 获取列名（流式读取数据期间连接不能执行其他查询，需先查询）
+                    cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+                    columns = [column[0] for column in cursor.fetchall()]
+                    columns_str = ", ".join(f"`{column}`" for column in columns)
                     
-                    if rows:
-                        f.write(f"--\n-- 转存表中的数据 `{table_name}`\n--\n\n")
+                    # 用服务器端游标分批读取表数据，每批最多1000行写一条INSERT语句，内存占用与表大小无关
+                    batch_size = 1000
+                    wrote_header = False
+                    for batch in DatabaseManager.iter_query_chunks(conn, f"SELECT * FROM `{table_name}`", chunk_size=batch_size):
+                        if not wrote_header:
+                            f.write(f"--\n-- 转存表中的数据 `{table_name}`\n--\n\n")
+                            wrote_header = True
+                        values_list = []
                         
-                        # 获取列名
-                        cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
-                        columns = [column[0] for column in cursor.fetchall()]
-                        columns_str = ", ".join(f"`{column}`" for column in columns)
-                        
-                        # 分批写入INSERT语句，每次最多1000行
-                        batch_size = 1000
-                        total_rows = len(rows)
-                        
-                        for i in range(0, total_rows, batch_size):
-                            batch = rows[i:i+batch_size]
-                            values_list = []
+                        for row in batch:
+                            values = []
+                            for value in row:
+                                if value is None:
+                                    values.append("NULL")
+                                elif isinstance(value, (int, float)):
+                                    values.append(str(value))
+                                elif isinstance(value, datetime.datetime):
+                                    values.append(f"'{value.strftime('%Y-%m-%d %H:%M:%S')}'")
+                                elif isinstance(value, datetime.date):
+                                    values.append(f"'{value.strftime('%Y-%m-%d')}'")
+                                elif isinstance(value, bytes):
+                                    hex_value = value.hex()
+                                    values.append(f"x'{hex_value}'")
+                                else:
+                                    # 处理字符串，转义单引号
+                                    escaped_value = str(value).replace("'", "''")
+                                    values.append(f"'{escaped_value}'")
                             
-                            for row in batch:
-                                values = []
-                                for value in row:
-                                    if value is None:
-                                        values.append("NULL")
-                                    elif isinstance(value, (int, float)):
-                                        values.append(str(value))
-                                    elif isinstance(value, datetime.datetime):
-                                        values.append(f"'{value.strftime('%Y-%m-%d %H:%M:%S')}'")
-                                    elif isinstance(value, datetime.date):
-                                        values.append(f"'{value.strftime('%Y-%m-%d')}'")
-                                    elif isinstance(value, bytes):
-                                        hex_value = value.hex()
-                                        values.append(f"x'{hex_value}'")
-                                    else:
-                                        # 处理字符串，转义单引号
-                                        escaped_value = str(value).replace("'", "''")
-                                        values.append(f"'{escaped_value}'")
-                                
-                                values_str = ", ".join(values)
-                                values_list.append(f"({values_str})")
-                            
-                            # 写入INSERT语句
-                            values_block = ",\n".join(values_list)
-                            f.write(f"INSERT INTO `{table_name}` ({columns_str}) VALUES\n{values_block};\n\n")
+                            values_str = ", ".join(values)
+                            values_list.append(f"({values_str})")
+                        
+                        # 写入INSERT语句
+                        values_block = ",\n".join(values_list)
+                        f.write(f"INSERT INTO `{table_name}` ({columns_str}) VALUES\n{values_block};\n\n")
                 
                 f.write("SET FOREIGN_KEY_CHECKS=1;\n")
                 f.write("COMMIT;\n")
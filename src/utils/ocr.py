@@ -1,61 +1,177 @@
 """
 通用OCR文本识别模块
-提供图像文字识别功能，使用外部API服务
+提供图像文字识别功能，识别由当前OCR后端完成（默认使用外部API服务）
 """
-import io
-import base64
+import threading
+import time
 import requests
 import logging
+from src.utils.ocr_cache import get_ocr_cache, image_key
+from src.utils.ocr_backends import DEFAULT_TIMEOUT, HttpOCRBackend, create_backend
+from src.utils.ocr_preprocess import OCRPreprocessor, create_preprocessor
 
 # 设置日志记录器
 logger = logging.getLogger(__name__)
 
-def recognize_text(img):
+# 当前使用的OCR后端，按部署通过set_backend()选择
+_backend = None
+_backend_lock = threading.Lock()
+
+# 识别前的图片预处理（默认只灰度化和缩放），所有识别入口共用，set_preprocessor(None)可关闭
+_preprocessor = OCRPreprocessor()
+
+# 识别统计：后端调用次数、缓存命中次数、预处理和识别的累计耗时、预处理前后的像素数
+_stats = {
+    'recognized': 0, 'cache_hits': 0, 'preprocess_ms': 0.0, 'recognize_ms': 0.0,
+    'input_pixels': 0, 'output_pixels': 0,
+}
+_stats_lock = threading.Lock()
+
+
+def get_backend():
+    """返回当前OCR后端，未设置时使用远程HTTP服务"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = HttpOCRBackend()
+        return _backend
+
+
+def set_backend(backend):
+    """
+    切换OCR后端
+
+    Args:
+        backend: OCRBackend实例，或后端名称（'http' / 'tesseract'）
+    """
+    global _backend
+    if isinstance(backend, str):
+        backend = create_backend(backend)
+    with _backend_lock:
+        old, _backend = _backend, backend
+    if old is not None and old is not backend:
+        old.close()
+    logger.info(f"OCR后端: {backend.name}")
+
+
+def get_preprocessor():
+    return _preprocessor
+
+
+def set_preprocessor(preprocessor):
+    """
+    设置识别前的图片预处理
+
+    Args:
+        preprocessor: OCRPreprocessor实例；也可以是配置值（False/None关闭，True默认参数，字典为参数）
+    """
+    global _preprocessor
+    if not isinstance(preprocessor, OCRPreprocessor):
+        preprocessor = create_preprocessor(preprocessor)
+    _preprocessor = preprocessor
+    logger.info(f"OCR预处理: {preprocessor.signature if preprocessor else '关闭'}")
+
+
+def _record(**values):
+    with _stats_lock:
+        for name, value in values.items():
+            _stats[name] += value
+
+
+def get_stats():
+    """
+    返回OCR识别统计，包含当前后端自身的统计（如HTTP上传的字节数）
+
+    可由此计算每次识别的平均上传大小和耗时，用于比较预处理开启前后的效果。
     """
-    使用OCR API识别图片中的文本
-    
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot.update(get_backend().stats())
+    return snapshot
+
+
+def _cached_text(key):
+    cache = get_ocr_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except Exception as e:
+        logger.error(f"读取OCR缓存失败: {str(e)}")
+        return None
+
+
+def _store_text(key, text):
+    cache = get_ocr_cache()
+    if cache is None:
+        return
+    try:
+        cache.put(key, text)
+    except Exception as e:
+        logger.error(f"写入OCR缓存失败: {str(e)}")
+
+
+def recognize_text(img, timeout=DEFAULT_TIMEOUT, use_cache=True, backend=None, preprocess=True):
+    """
+    识别图片中的文本
+
+    相同像素内容的图片直接返回本地缓存的结果，不再调用OCR后端。
+    未命中缓存时先按当前预处理设置处理图片，再交给OCR后端识别。
+
     参数:
         img: PIL.Image对象，要识别的图片
-        
+        timeout: 识别超时（秒）
+        use_cache: 是否使用本地OCR结果缓存
+        backend: 使用的OCR后端，默认为get_backend()
+        preprocess: 是否做识别前的图片预处理
+
     返回:
         str: 识别出的文本，如果识别失败则返回空字符串
-    
+
     异常:
         可能引发请求相关的异常，如ConnectionError, Timeout等
     """
+    backend = backend or get_backend()
+    preprocessor = _preprocessor if preprocess else None
     try:
-        # 转换图片为base64编码
-        buf = io.BytesIO()
-        img.save(buf, format='PNG')
-        img_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-        
-        # 发送API请求
-        url = "http://sql.didiba.uk:1224/api/ocr"
-        payload = {
-            "base64": img_b64,
-            "options": {
-                "data.format": "text"
-            }
-        }
-        headers = {"Content-Type": "application/json"}
-        
-        logger.info("正在发送OCR识别请求...")
-        resp = requests.post(url, json=payload, headers=headers, timeout=20)
-        resp.raise_for_status()
-        
-        ocr_result = resp.json()
-        text = ocr_result.get('data', '')
-        
+        # 缓存按原图计算，命中时连预处理也省掉；不同预处理参数的结果分开缓存
+        namespace = backend.cache_namespace
+        if preprocessor is not None:
+            namespace = f"{namespace}|{preprocessor.signature}"
+        key = image_key(img, namespace=namespace) if use_cache else None
+        if key is not None:
+            text = _cached_text(key)
+            if text is not None:
+                _record(cache_hits=1)
+                logger.info(f"OCR缓存命中，长度:{len(text)}")
+                return text
+
+        input_pixels = img.size[0] * img.size[1]
+        start = time.perf_counter()
+        if preprocessor is not None:
+            img = preprocessor.process(img)
+        preprocessed = time.perf_counter()
+
+        logger.info(f"正在发送OCR识别请求（{backend.name}）...")
+        text = backend.recognize(img, timeout=timeout)
+        _record(
+            recognized=1, input_pixels=input_pixels, output_pixels=img.size[0] * img.size[1],
+            preprocess_ms=(preprocessed - start) * 1000, recognize_ms=(time.perf_counter() - preprocessed) * 1000,
+        )
+
         if not text:
             logger.warning("OCR识别返回空文本")
         else:
             logger.info(f"成功识别文本，长度:{len(text)}")
-            
+            # 空结果可能是服务端临时异常，不缓存
+            if key is not None:
+                _store_text(key, text)
+
         return text
-        
+
     except requests.exceptions.RequestException as e:
         logger.error(f"OCR API请求失败: {str(e)}")
         raise
     except Exception as e:
         logger.error(f"OCR识别过程中发生未知错误: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
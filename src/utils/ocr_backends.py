@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# OCR后端模块 - 统一的识别接口，提供远程HTTP服务和本地Tesseract两种实现
+
+import abc
+import base64
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    pytesseract = None
+    TESSERACT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# OCR服务地址和默认超时（秒）
+OCR_API_URL = "http://sql.didiba.uk:1224/api/ocr"
+DEFAULT_TIMEOUT = 20
+
+# 共用的HTTP会话，复用keep-alive连接
+_session = None
+_session_lock = threading.Lock()
+SESSION_POOL_SIZE = 16
+
+
+def get_session():
+    """返回全局共用的requests.Session，连接池大小为SESSION_POOL_SIZE"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SESSION_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def encode_image(img, image_format='PNG'):
+    """把PIL图片编码为base64字符串，PNG使用最高压缩，WEBP使用无损压缩"""
+    buf = io.BytesIO()
+    if image_format == 'WEBP':
+        img.save(buf, format='WEBP', lossless=True, method=6)
+    else:
+        img.save(buf, format='PNG', optimize=True)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+class OCRBackend(abc.ABC):
+    """
+    OCR后端接口
+
+    子类必须实现recognize()，返回识别出的文本；失败时抛出异常。
+    cache_namespace用于区分不同后端的缓存结果。
+    """
+
+    name = ''
+
+    @property
+    def cache_namespace(self):
+        return self.name
+
+    @abc.abstractmethod
+    def recognize(self, img, timeout=None):
+        """识别图片中的文本"""
+
+    def stats(self):
+        """返回后端自身的统计数据，如上传字节数"""
+        return {}
+
+    def close(self):
+        """释放后端占用的资源"""
+        pass
+
+
+class HttpOCRBackend(OCRBackend):
+    """
+    远程OCR服务
+
+    Args:
+        url: OCR接口地址
+        timeout: 默认请求超时（秒）
+        image_format: 上传图片的编码格式，'PNG' 或 'WEBP'（需要服务端支持）
+    """
+
+    name = 'http'
+
+    def __init__(self, url=OCR_API_URL, timeout=DEFAULT_TIMEOUT, image_format='PNG'):
+        self.url = url
+        self.timeout = timeout
+        self.image_format = image_format.upper()
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'payload_bytes': 0}
+
+    def recognize(self, img, timeout=None):
+        encoded = encode_image(img, self.image_format)
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['payload_bytes'] += len(encoded)
+        payload = {
+            "base64": encoded,
+            "options": {
+                "data.format": "text"
+            }
+        }
+        headers = {"Content-Type": "application/json"}
+        resp = get_session().post(self.url, json=payload, headers=headers, timeout=timeout or self.timeout)
+        resp.raise_for_status()
+        return resp.json().get('data', '') or ''
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+def _tesseract_init(tesseract_cmd):
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _tesseract_recognize(mode, size, data, lang, tessdata_dir, config):
+    """在子进程中执行识别，图片以原始像素传入，避免编码开销"""
+    from PIL import Image
+    img = Image.frombytes(mode, size, data)
+    options = config or ''
+    if tessdata_dir:
+        options = f'--tessdata-dir "{tessdata_dir}" {options}'
+    return pytesseract.image_to_string(img, lang=lang, config=options.strip())
+
+
+class TesseractOCRBackend(OCRBackend):
+    """
+    本地Tesseract识别
+
+    识别在进程池中执行，多张图片可同时使用多个CPU核心，不依赖网络。
+    需要安装pytesseract和Tesseract程序。
+
+    Args:
+        lang: 识别语言
+        tessdata_dir: 语言数据目录，默认使用项目中带有chi_sim.traineddata的game-trad-server目录
+        tesseract_cmd: tesseract可执行文件路径，不在PATH中时需要指定
+        max_workers: 进程数，默认为CPU核心数
+        config: 传给tesseract的其他参数
+    """
+
+    name = 'tesseract'
+
+    def __init__(self, lang='chi_sim', tessdata_dir=None, tesseract_cmd=None, max_workers=None, config='--psm 6'):
+        if not TESSERACT_AVAILABLE:
+            raise RuntimeError("未安装pytesseract，无法使用本地Tesseract识别")
+        if tessdata_dir is None:
+            from src.utils.path_resolver import resolve_path
+            tessdata_dir = resolve_path('game-trad-server')
+        self.lang = lang
+        self.tessdata_dir = tessdata_dir
+        self.config = config
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_tesseract_init, initargs=(tesseract_cmd,)
+        )
+
+    @property
+    def cache_namespace(self):
+        return f"{self.name}:{self.lang}:{self.config}"
+
+    def recognize(self, img, timeout=None):
+        future = self._pool.submit(
+            _tesseract_recognize, img.mode, img.size, img.tobytes(), self.lang, self.tessdata_dir, self.config
+        )
+        return future.result(timeout=timeout) or ''
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+BACKENDS = {
+    HttpOCRBackend.name: HttpOCRBackend,
+    TesseractOCRBackend.name: TesseractOCRBackend,
+}
+
+
+def create_backend(name='http', **options):
+    """
+    按名称创建OCR后端
+
+    Args:
+        name: 'http' 或 'tesseract'
+        options: 传给后端构造函数的参数，值为None的参数使用默认值
+    """
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"未知的OCR后端: {name}")
+    return backend_class(**{key: value for key, value in options.items() if value is not None})
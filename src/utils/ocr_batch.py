@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# 批量OCR模块 - 在共用的事件循环线程中限流并发识别多张图片，失败自动重试，结果按输入顺序返回
+
+import asyncio
+import logging
+import time
+from concurrent.futures import CancelledError
+
+import requests
+
+from src.core.async_db import get_event_loop_thread
+from src.utils import ocr
+
+logger = logging.getLogger(__name__)
+
+
+class OCRResult:
+    """单张图片的识别结果"""
+
+    def __init__(self, index):
+        self.index = index       # 图片在输入列表中的位置
+        self.text = ''
+        self.error = None        # 重试后仍失败时的异常
+        self.attempts = 0
+        self.elapsed = 0.0       # 含重试的总耗时（秒）
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _should_retry(error):
+    """连接错误、超时、429和5xx可以重试，其余错误直接失败"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+class OCRBatchService:
+    """
+    批量OCR识别服务
+
+    识别协程运行在全局共用的事件循环线程中，阻塞的识别调用交给事件循环的默认线程池，
+    同时识别的图片数由信号量限制为max_workers（所有批次共用）；远程服务的请求复用keep-alive连接，
+    本地Tesseract后端的识别分布在多个进程中。
+    单张图片失败时按 backoff * 2^n 秒退避重试，最多retries次。
+
+    - recognize_batch(images, on_progress) 阻塞执行直到全部完成，适合后台线程和脚本
+    - run_in_tk(bridge, images, on_progress, on_done) 通过TkAsyncBridge提交后立即返回，
+      进度和最终结果都在Tk主线程中回调
+
+    Args:
+        max_workers: 最多同时识别的图片数
+        retries: 单张图片失败后的最多重试次数
+        backoff: 首次重试前的等待时间（秒）
+        recognize: 识别函数 recognize(img) -> str，默认ocr.recognize_text
+        loop_thread: 事件循环线程，默认使用全局共用的实例
+    """
+
+    def __init__(self, max_workers=4, retries=2, backoff=0.5, recognize=None, loop_thread=None):
+        self.max_workers = max(1, int(max_workers))
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.recognize = recognize or ocr.recognize_text
+        self.loop_thread = loop_thread or get_event_loop_thread()
+        self._semaphore = None   # 在事件循环线程中首次使用时创建
+        self._closed = False
+
+    async def _recognize_one(self, index, img):
+        result = OCRResult(index)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            if self._closed:
+                result.error = CancelledError()
+                return result
+            loop = asyncio.get_running_loop()
+            start = time.monotonic()
+            while True:
+                result.attempts += 1
+                try:
+                    result.text = await loop.run_in_executor(None, self.recognize, img) or ''
+                    result.error = None
+                    break
+                except Exception as e:
+                    result.error = e
+                    if result.attempts > self.retries or not _should_retry(e):
+                        logger.error(f"图片 {index + 1} OCR识别失败: {e}")
+                        break
+                    delay = self.backoff * (2 ** (result.attempts - 1))
+                    logger.warning(f"图片 {index + 1} OCR识别失败，{delay:.1f}秒后重试: {e}")
+                    await asyncio.sleep(delay)
+            result.elapsed = time.monotonic() - start
+        return result
+
+    async def _recognize_all(self, images, on_progress=None):
+        total = len(images)
+        results = [None] * total
+        tasks = [asyncio.ensure_future(self._recognize_one(i, img)) for i, img in enumerate(images)]
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            result = await task
+            results[result.index] = result
+            if on_progress is not None:
+                on_progress(done, total, result)
+        return results
+
+    def recognize_batch(self, images, on_progress=None):
+        """
+        并发识别并等待全部完成
+
+        Args:
+            images: PIL图片列表
+            on_progress: 每完成一张调用 on_progress(已完成数, 总数, OCRResult)，按完成先后顺序，
+                在事件循环线程中调用
+
+        Returns:
+            OCRResult列表，顺序与images一致
+        """
+        return self.loop_thread.submit(self._recognize_all(images, on_progress)).result()
+
+    def run_in_tk(self, bridge, images, on_progress=None, on_done=None, owner=None):
+        """
+        并发识别，进度和结果在Tk主线程中回调
+
+        每张图片作为一个协程提交给bridge，由bridge的结果队列统一交回主线程。
+
+        Args:
+            bridge: TkAsyncBridge实例
+            images: PIL图片列表
+            on_progress: 每完成一张调用 on_progress(已完成数, 总数, OCRResult)
+            on_done: 全部完成后调用 on_done(OCRResult列表)，顺序与images一致
+            owner: 所属控件，控件销毁后不再回调
+        """
+        total = len(images)
+        results = [None] * total
+        state = {'done': 0}
+
+        def finish(index, result):
+            results[index] = result
+            state['done'] += 1
+            if on_progress is not None:
+                try:
+                    on_progress(state['done'], total, result)
+                except Exception as e:
+                    print(f"更新OCR进度失败: {e}")
+            if state['done'] == total and on_done is not None:
+                on_done(results)
+
+        def failed(index, error):
+            result = OCRResult(index)
+            result.error = error
+            finish(index, result)
+
+        if total == 0:
+            if on_done is not None:
+                on_done(results)
+            return
+        for index, img in enumerate(images):
+            bridge.run(
+                self._recognize_one(index, img),
+                lambda result, i=index: finish(i, result),
+                on_error=lambda error, i=index: failed(i, error),
+                owner=owner
+            )
+
+    def shutdown(self):
+        """不再接受新任务，尚未开始的识别取消"""
+        self._closed = True
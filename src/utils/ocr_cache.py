@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# OCR结果缓存模块 - 按图片像素内容哈希在本地SQLite中缓存识别结果，超出容量时淘汰最久未使用的记录
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def image_key(img, namespace=''):
+    """
+    计算图片的内容哈希
+
+    使用像素数据的精确哈希而不是感知哈希：交易截图之间往往只差几个数字，
+    感知哈希会把它们视为同一张图而返回错误的识别结果。
+
+    Args:
+        img: PIL.Image对象
+        namespace: 区分识别方式的前缀（如后端名、预处理参数），不同方式的结果分开缓存
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{namespace}|{img.mode}|{img.size[0]}x{img.size[1]}|".encode('utf-8'))
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    OCR识别结果的本地缓存
+
+    同一张截图重复粘贴或取消预览后再次导入时直接返回缓存结果，不再请求OCR服务。
+    缓存总大小超过max_bytes或条数超过max_entries时，按最近使用时间淘汰旧记录。
+    可在多个线程中同时使用。
+
+    Args:
+        path: SQLite文件路径，默认在用户缓存目录下
+        max_bytes: 缓存文本的总字节数上限
+        max_entries: 缓存条数上限
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        if path is None:
+            from src.utils.path_resolver import get_cache_dir
+            path = os.path.join(get_cache_dir(), 'ocr_cache.sqlite3')
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache (last_used)")
+        self._conn.commit()
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache"
+        ).fetchone()
+
+    def get(self, key):
+        """返回缓存的识别文本，未命中时返回None"""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            self._conn.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._stats['hits'] += 1
+            return row[0]
+
+    def put(self, key, text):
+        """保存识别文本，必要时淘汰最久未使用的记录"""
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, text, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, text, size, now, now)
+            )
+            if old is None:
+                self._entries += 1
+                self._bytes += size
+            else:
+                self._bytes += size - old[0]
+            self._stats['stores'] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self._bytes <= self.max_bytes and self._entries <= self.max_entries:
+            return
+        # 一次淘汰到上限的90%，避免每次写入都触发淘汰
+        target_bytes = self.max_bytes * 0.9
+        target_entries = int(self.max_entries * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_used").fetchall()
+        victims = []
+        for key, size in rows:
+            if self._bytes <= target_bytes and self._entries <= target_entries:
+                break
+            victims.append((key,))
+            self._bytes -= size
+            self._entries -= 1
+        self._conn.executemany("DELETE FROM ocr_cache WHERE key = ?", victims)
+        self._stats['evictions'] += len(victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_cache")
+            self._conn.commit()
+            self._entries = 0
+            self._bytes = 0
+
+    def stats(self):
+        """返回命中、未命中、写入、淘汰次数及当前条数和总字节数"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = self._entries
+            snapshot['bytes'] = self._bytes
+        return snapshot
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_cache_failed = False
+
+
+def get_ocr_cache():
+    """返回全局共用的OCR缓存，缓存文件无法打开时返回None（不影响识别）"""
+    global _cache, _cache_failed
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = OCRCache()
+            except Exception as e:
+                _cache_failed = True
+                logger.error(f"OCR缓存不可用: {e}")
+        return _cache
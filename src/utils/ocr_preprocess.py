@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# OCR预处理模块 - 识别前灰度化和缩放，可选裁剪到表格区域和二值化，减小上传数据量并加快识别
+
+import logging
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = ImageOps = None
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 截图没有DPI信息时按普通屏幕的96DPI计算
+DEFAULT_SCREEN_DPI = 96
+
+
+def otsu_threshold(histogram):
+    """按大津法从256级灰度直方图计算二值化阈值"""
+    total = sum(histogram)
+    if total == 0:
+        return 128
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_threshold, best_variance = 128, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def background_level(gray):
+    """取图片四条边上出现最多的灰度值作为背景色"""
+    width, height = gray.size
+    histogram = [0] * 256
+    for box in ((0, 0, width, 1), (0, height - 1, width, height), (0, 0, 1, height), (width - 1, 0, width, height)):
+        for level, count in enumerate(gray.crop(box).histogram()):
+            histogram[level] += count
+    return max(range(256), key=histogram.__getitem__)
+
+
+def find_content_box(gray, tolerance=24, margin=8):
+    """
+    查找与背景色明显不同的内容区域（交易表格所在的范围）
+
+    Returns:
+        (left, top, right, bottom)，整张图都是背景时返回None
+    """
+    background = background_level(gray)
+    mask = gray.point([255 if abs(level - background) > tolerance else 0 for level in range(256)])
+    box = mask.getbbox()
+    if box is None:
+        return None
+    left, top, right, bottom = box
+    width, height = gray.size
+    return max(0, left - margin), max(0, top - margin), min(width, right + margin), min(height, bottom + margin)
+
+
+class OCRPreprocessor:
+    """
+    OCR识别前的图片预处理
+
+    依次执行：裁剪到内容区域 -> 灰度化 -> 缩放到目标DPI -> 二值化（深色背景时反相为白底黑字）。
+    默认只灰度化，并把超过目标DPI或max_side的图片按比例缩小（不放大）；裁剪可能切掉与背景色接近的浅色文字，二值化会丢失低对比度和抗锯齿的笔画，
+    且效果因OCR后端而异，需按后端实测后显式开启。二值化后的图片为1位黑白图，编码为PNG后通常只有原截图的几分之一。
+    相同参数对同一张图的处理结果相同，signature用于区分不同参数的OCR缓存。
+
+    Args:
+        crop: 是否裁剪掉四周与背景色相同的区域（有损，默认关闭）
+        grayscale: 是否转为灰度图
+        binarize: 是否二值化（需要grayscale，有损，默认关闭）
+        target_dpi: 缩放目标DPI，图片DPI高于此值时按比例缩小
+        max_side: 缩放后长边的最大像素数，没有DPI信息的高分屏截图按此限制缩小
+    """
+
+    def __init__(self, crop=False, grayscale=True, binarize=False, target_dpi=DEFAULT_SCREEN_DPI, max_side=2000):
+        self.crop = crop
+        self.grayscale = grayscale
+        self.binarize = binarize and grayscale
+        self.target_dpi = target_dpi
+        self.max_side = max_side
+
+    @property
+    def signature(self):
+        return f"crop={int(self.crop)},gray={int(self.grayscale)},bin={int(self.binarize)},dpi={self.target_dpi},max={self.max_side}"
+
+    def _scale(self, img, dpi):
+        scale = 1.0
+        if self.target_dpi and dpi > self.target_dpi:
+            scale = self.target_dpi / dpi
+        if self.max_side and max(img.size) * scale > self.max_side:
+            scale = self.max_side / max(img.size)
+        if scale >= 1.0:
+            return img
+        size = (max(1, round(img.size[0] * scale)), max(1, round(img.size[1] * scale)))
+        return img.resize(size, Image.LANCZOS)
+
+    def process(self, img):
+        """
+        返回预处理后的新图片，不修改原图
+
+        Args:
+            img: PIL.Image对象
+        """
+        if not PIL_AVAILABLE:
+            return img
+        dpi = img.info.get('dpi', (DEFAULT_SCREEN_DPI,))[0] or DEFAULT_SCREEN_DPI
+        if img.mode not in ('L', 'RGB'):
+            img = img.convert('RGB')
+        gray = img.convert('L') if img.mode != 'L' else img
+
+        if self.crop:
+            box = find_content_box(gray)
+            if box is not None and box != (0, 0) + img.size:
+                img = img.crop(box)
+                gray = gray.crop(box)
+
+        if self.grayscale:
+            img = gray
+        img = self._scale(img, dpi)
+
+        if self.binarize:
+            threshold = otsu_threshold(img.histogram())
+            img = img.point([255 if level > threshold else 0 for level in range(256)])
+            # 深色背景的游戏界面反相为白底黑字，OCR对这种形式识别最稳定
+            if background_level(img) < 128:
+                img = ImageOps.invert(img)
+            img = img.convert('1', dither=Image.NONE)
+        return img
+
+
+def create_preprocessor(options):
+    """
+    按配置创建预处理器
+
+    Args:
+        options: False/None表示不做预处理，True表示使用默认参数（只灰度化和缩放），字典为OCRPreprocessor的参数，
+                 如 {"crop": true, "binarize": true} 开启裁剪和二值化
+    """
+    if not options:
+        return None
+    if options is True:
+        return OCRPreprocessor()
+    return OCRPreprocessor(**options)
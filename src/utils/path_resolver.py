@@ -15,6 +15,7 @@ _DATA_DIR = None
 _CONFIG_DIR = None
 _LOG_DIR = None
 _USER_DATA_DIR = None
+_CACHE_DIR = None
 _APP_NAME = "GameTrad"
 
 def is_frozen():
@@ -175,6 +176,23 @@ def get_database_path(db_name="game_trading.db"):
     
     return os.path.join(db_dir, db_name)
 
+def get_cache_dir():
+    """
+    获取用户缓存目录，用于存储可随时删除的缓存数据（如OCR识别结果）
+    - 使用系统标准的用户缓存目录
+    """
+    global _CACHE_DIR
+    if _CACHE_DIR is not None:
+        return _CACHE_DIR
+    
+    # 使用appdirs库获取标准缓存目录
+    _CACHE_DIR = appdirs.user_cache_dir(_APP_NAME)
+    
+    # 确保目录存在
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+    
+    return _CACHE_DIR
+
 def get_temp_dir():
     """
     获取临时目录，用于存储临时文件
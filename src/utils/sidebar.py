@@ -2,6 +2,36 @@ import tkinter as tk
 import ttkbootstrap as tb
 import inspect
 
+
+class TabVisibility:
+    """
+    标签页可见性状态
+
+    标签页隐藏时刷新请求只记下不执行，切换回来时只补一次刷新。
+    由ModernSidebar.switch_tab调用标签页的on_tab_shown/on_tab_hidden更新。
+    """
+
+    def __init__(self, visible=True):
+        self.visible = visible
+        self.stale = False
+
+    def defer(self):
+        """标签页隐藏时记下待刷新并返回True，可见时返回False"""
+        if self.visible:
+            return False
+        self.stale = True
+        return True
+
+    def show(self):
+        """标记为可见，返回隐藏期间是否有被推迟的刷新"""
+        self.visible = True
+        stale, self.stale = self.stale, False
+        return stale
+
+    def hide(self):
+        self.visible = False
+
+
 class ModernSidebar:
     def __init__(self, parent, ui_manager, width=220, callbacks=None):
         self.parent = parent
@@ -114,15 +144,31 @@ class ModernSidebar:
         
         self.tab_frames[tab_id] = tab_frame
         
-        # 初始化第一个选项卡为活动状态
+        # 初始化第一个选项卡为活动状态，其余选项卡创建后即处于隐藏状态
         if len(self.tabs) == 1:
             self.switch_tab(tab_id)
+        else:
+            self._notify_visibility(tab_content, False)
+    
+    def _notify_visibility(self, tab_content, visible):
+        """通知选项卡内容可见性变化，选项卡可实现on_tab_shown/on_tab_hidden暂停或恢复定时刷新"""
+        hook = getattr(tab_content, 'on_tab_shown' if visible else 'on_tab_hidden', None)
+        if callable(hook):
+            try:
+                hook()
+            except Exception as e:
+                print(f"选项卡可见性切换处理失败: {e}")
     
     def switch_tab(self, tab_id):
         """切换选项卡"""
+        # 重复点击当前选项卡时不触发可见性变化
+        changed = tab_id != self.active_tab
+        
         # 隐藏当前活动选项卡
         if self.active_tab:
             self.tab_frames[self.active_tab].pack_forget()
+            if changed:
+                self._notify_visibility(self.get_active_tab_content(), False)
             
             # 更改之前活动按钮的样式 - 重置为正常样式
             for tab in self.tabs:
@@ -143,6 +189,12 @@ class ModernSidebar:
                 tab_title = tab['title']
                 break
                 
+        # 通知新选项卡已可见，补上隐藏期间推迟的刷新
+        if changed:
+            self._notify_visibility(self.get_active_tab_content(), True)
+            if 'on_tab_shown' in self.callbacks and callable(self.callbacks['on_tab_shown']):
+                self.callbacks['on_tab_shown'](self.get_active_tab_content())
+                
         # 执行tab切换回调
         if 'on_tab_changed' in self.callbacks and callable(self.callbacks['on_tab_changed']):
             # 调用回调并传递标签页标题
@@ -155,6 +207,10 @@ class ModernSidebar:
                 return tab['content']
         return None 
     
+    def is_tab_visible(self, tab_content):
+        """选项卡内容当前是否可见"""
+        return tab_content is not None and tab_content is self.get_active_tab_content()
+    
     def get_active_tab(self):
         """获取当前活动选项卡的完整信息"""
         for tab in self.tabs:
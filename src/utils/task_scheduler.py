@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# 后台任务调度模块 - 共用的有界工作线程池，支持按键去重、优先级、随控件销毁取消和周期定时器
+
+import itertools
+import queue
+import threading
+import time
+import traceback
+
+# 优先级，数值越小越先执行
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class Task:
+    """一次后台任务，由TaskScheduler.submit()创建"""
+
+    def __init__(self, key, func, args, priority, owner, on_done, on_error):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.owner = owner
+        self.on_done = on_done
+        self.on_error = on_error
+        self.state = 'queued'        # queued / running / finished
+        self.cancelled = False
+        self.rerun = None            # 执行期间同key的新提交，完成后按此重新提交
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    def cancel(self):
+        """取消任务：排队中的不再执行，执行中的丢弃结果"""
+        self.cancelled = True
+
+
+class TaskScheduler:
+    """
+    全局共用的后台任务调度器
+
+    - submit(key, func, ...) 在有界工作线程池中执行func，完成后在Tk主线程中调用on_done/on_error；
+      同一个key的任务还在排队时不会重复提交，直接返回排队中的任务；已开始执行时记录下最后一次提交，
+      当前任务完成后再执行一次，保证执行期间提交时已写入的数据能被读到
+    - 排队的任务按优先级执行，同优先级先提交先执行
+    - 指定owner控件后，控件销毁时自动取消其任务和定时器
+    - every(key, interval_ms, callback) 在主线程中周期调用callback，统一替代各标签页自己的after循环
+    - tasks() / stats() 返回当前排队/执行中的任务、定时器及耗时统计
+
+    除工作线程外，所有方法都只在Tk主线程中调用。
+
+    Args:
+        root: Tk根窗口
+        max_workers: 工作线程数
+        poll_interval: 有任务进行时检查结果的间隔（毫秒）
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=30):
+        self.root = root
+        self.max_workers = max(1, int(max_workers))
+        self.poll_interval = poll_interval
+        self._queue = queue.PriorityQueue()
+        self._results = queue.SimpleQueue()
+        self._seq = itertools.count()
+        self._workers = []
+        self._active = {}        # key -> 排队或执行中的Task
+        self._timers = {}        # key -> {'interval', 'callback', 'owner', 'after_id'}
+        self._watched = set()    # 已绑定<Destroy>的控件路径
+        self._pending = 0
+        self._polling = False
+        self._closed = False
+        self._stats = {
+            'submitted': 0,
+            'deduplicated': 0,   # 因同key任务排队中而合并的提交次数
+            'coalesced': 0,      # 同key任务执行中、合并为完成后再执行一次的提交次数
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'run_time': 0.0,     # 已完成任务的累计执行时间（秒）
+            'wait_time': 0.0,    # 已完成任务的累计排队时间（秒）
+        }
+
+    # ---------- 后台任务 ----------
+
+    def submit(self, key, func, *args, priority=PRIORITY_NORMAL, owner=None, on_done=None, on_error=None):
+        """
+        提交后台任务
+
+        Args:
+            key: 任务键，同一时间每个键最多一个任务
+            func: 在工作线程中执行的函数 func(*args)，不能访问Tk控件
+            priority: 优先级，PRIORITY_HIGH / PRIORITY_NORMAL / PRIORITY_LOW
+            owner: 所属控件，控件销毁时取消任务并丢弃结果
+            on_done: 成功时在主线程中调用 on_done(result)
+            on_error: 失败时在主线程中调用 on_error(exception)，未提供时打印异常
+
+        Returns:
+            Task实例；同key任务进行中时返回该任务，调度器已关闭时返回None
+        """
+        if self._closed:
+            return None
+        running = self._active.get(key)
+        if running is not None and not running.cancelled:
+            # 工作线程先把状态改为running再调用func，仍为queued说明func尚未开始，执行时能读到最新数据
+            if running.state == 'queued':
+                self._stats['deduplicated'] += 1
+            else:
+                running.rerun = (func, args, priority, owner, on_done, on_error)
+                self._stats['coalesced'] += 1
+            return running
+
+        task = Task(key, func, args, priority, owner, on_done, on_error)
+        self._active[key] = task
+        self._stats['submitted'] += 1
+        self._watch_owner(owner)
+        self._ensure_workers()
+        self._queue.put((priority, next(self._seq), task))
+        self._pending += 1
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._drain)
+        return task
+
+    def is_running(self, key):
+        """指定key的任务是否在排队或执行中"""
+        task = self._active.get(key)
+        return task is not None and not task.cancelled
+
+    def cancel(self, key):
+        """取消指定key的任务和定时器"""
+        task = self._active.get(key)
+        if task is not None:
+            task.cancel()
+        self.stop(key)
+
+    def cancel_owner(self, owner):
+        """取消属于某个控件的全部任务和定时器"""
+        for task in list(self._active.values()):
+            if task.owner is owner:
+                task.cancel()
+        for key, timer in list(self._timers.items()):
+            if timer['owner'] is owner:
+                self.stop(key)
+
+    # ---------- 周期定时器 ----------
+
+    def every(self, key, interval_ms, callback, owner=None, run_now=False):
+        """
+        每隔interval_ms毫秒在主线程中调用一次callback，同一个key重复注册时替换原定时器
+
+        callback一般再通过submit()提交后台任务，上一次任务未完成时会被自动合并。
+        """
+        self.stop(key)
+        if self._closed:
+            return
+        self._timers[key] = {'interval': int(interval_ms), 'callback': callback, 'owner': owner, 'after_id': None}
+        self._watch_owner(owner)
+        if run_now:
+            self._fire(key)
+        else:
+            self._arm(key)
+
+    def stop(self, key):
+        """停止定时器，不影响已提交的任务"""
+        timer = self._timers.pop(key, None)
+        if timer is not None and timer['after_id'] is not None:
+            try:
+                self.root.after_cancel(timer['after_id'])
+            except Exception:
+                pass
+
+    def has_timer(self, key):
+        return key in self._timers
+
+    def _arm(self, key):
+        timer = self._timers.get(key)
+        if timer is not None:
+            timer['after_id'] = self.root.after(timer['interval'], lambda: self._fire(key))
+
+    def _fire(self, key):
+        timer = self._timers.get(key)
+        if timer is None:
+            return
+        timer['after_id'] = None
+        try:
+            timer['callback']()
+        except Exception as e:
+            print(f"定时任务 {key} 执行失败: {e}")
+            traceback.print_exc()
+        # 回调中可能停止或替换了定时器
+        if self._timers.get(key) is timer:
+            self._arm(key)
+
+    # ---------- 状态查看 ----------
+
+    def tasks(self):
+        """返回排队/执行中的任务和定时器列表，耗时单位为毫秒"""
+        now = time.monotonic()
+        result = []
+        for task in self._active.values():
+            started = task.started_at
+            result.append({
+                'key': task.key,
+                'kind': 'task',
+                'state': 'cancelled' if task.cancelled else task.state,
+                'priority': task.priority,
+                'owner': str(task.owner) if task.owner is not None else None,
+                'wait_ms': ((started or now) - task.submitted_at) * 1000,
+                'run_ms': (now - started) * 1000 if started else 0.0,
+            })
+        for key, timer in self._timers.items():
+            result.append({
+                'key': key,
+                'kind': 'timer',
+                'state': 'scheduled',
+                'interval_ms': timer['interval'],
+                'owner': str(timer['owner']) if timer['owner'] is not None else None,
+            })
+        return result
+
+    def stats(self):
+        """返回提交、合并、重新执行、完成、失败、取消次数及平均排队/执行耗时（毫秒）"""
+        snapshot = dict(self._stats)
+        finished = snapshot['completed'] + snapshot['failed']
+        snapshot['avg_run_ms'] = snapshot.pop('run_time') / finished * 1000 if finished else 0.0
+        snapshot['avg_wait_ms'] = snapshot.pop('wait_time') / finished * 1000 if finished else 0.0
+        snapshot['queued'] = sum(1 for task in self._active.values() if task.state == 'queued')
+        snapshot['running'] = sum(1 for task in self._active.values() if task.state == 'running')
+        snapshot['timers'] = len(self._timers)
+        snapshot['workers'] = len(self._workers)
+        return snapshot
+
+    def shutdown(self):
+        """取消所有任务和定时器并结束工作线程"""
+        self._closed = True
+        for key in list(self._timers):
+            self.stop(key)
+        for task in self._active.values():
+            task.cancel()
+        for _ in self._workers:
+            # 哨兵排在所有任务之后
+            self._queue.put((float('inf'), next(self._seq), None))
+
+    # ---------- 内部实现 ----------
+
+    def _ensure_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"TaskWorker-{len(self._workers) + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            _, _, task = self._queue.get()
+            if task is None:
+                return
+            if not task.cancelled:
+                task.started_at = time.monotonic()
+                task.state = 'running'
+                try:
+                    task.result = task.func(*task.args)
+                except Exception as e:
+                    task.error = e
+                task.finished_at = time.monotonic()
+            task.state = 'finished'
+            self._results.put(task)
+
+    def _watch_owner(self, owner):
+        if owner is None:
+            return
+        path = str(owner)
+        if path in self._watched:
+            return
+        self._watched.add(path)
+
+        def on_destroy(event):
+            if event.widget is owner:
+                self._watched.discard(path)
+                self.cancel_owner(owner)
+        owner.bind("<Destroy>", on_destroy, add='+')
+
+    def _owner_alive(self, owner):
+        if owner is None:
+            return True
+        try:
+            return bool(owner.winfo_exists())
+        except Exception:
+            return False
+
+    def _drain(self):
+        while True:
+            try:
+                task = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if self._active.get(task.key) is task:
+                del self._active[task.key]
+            self._finish(task)
+            if task.rerun is not None and not task.cancelled:
+                func, args, priority, owner, on_done, on_error = task.rerun
+                self.submit(task.key, func, *args, priority=priority, owner=owner, on_done=on_done, on_error=on_error)
+
+        if self._pending > 0:
+            self.root.after(self.poll_interval, self._drain)
+        else:
+            self._polling = False
+
+    def _finish(self, task):
+        if task.cancelled or not self._owner_alive(task.owner):
+            self._stats['cancelled'] += 1
+            return
+        self._stats['wait_time'] += task.started_at - task.submitted_at
+        self._stats['run_time'] += task.finished_at - task.started_at
+        try:
+            if task.error is None:
+                self._stats['completed'] += 1
+                if task.on_done is not None:
+                    task.on_done(task.result)
+            else:
+                self._stats['failed'] += 1
+                if task.on_error is not None:
+                    task.on_error(task.error)
+                else:
+                    print(f"后台任务 {task.key} 失败: {task.error}")
+                    traceback.print_exception(type(task.error), task.error, task.error.__traceback__)
+        except Exception as e:
+            print(f"处理后台任务 {task.key} 结果失败: {e}")
+            traceback.print_exc()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# Tk异步桥接模块 - 把事件循环线程中协程的结果交回Tk主线程处理
+
+import queue
+import traceback
+
+
+class TkAsyncBridge:
+    """
+    在Tk主线程中接收协程结果
+
+    run()把协程提交到事件循环线程，完成后结果放入线程安全队列，
+    由一个root.after定时器在主线程中统一取出并调用回调。没有进行中的任务时定时器自动停止。
+    指定key时，同key的新任务会取消并替换进行中的旧任务，旧任务的结果不再回调。
+
+    Args:
+        root: Tk根窗口
+        loop_thread: EventLoopThread实例
+        poll_interval: 有任务进行时检查结果的间隔（毫秒）
+    """
+
+    def __init__(self, root, loop_thread, poll_interval=30):
+        self.root = root
+        self.loop_thread = loop_thread
+        self.poll_interval = poll_interval
+        self._results = queue.SimpleQueue()
+        self._pending = 0
+        self._polling = False
+        self._keyed = {}    # key -> 该key最新一次提交的Future
+
+    def run(self, coro, on_done=None, on_error=None, owner=None, key=None):
+        """
+        执行协程，完成后在主线程中回调
+
+        Args:
+            coro: 协程对象
+            on_done: 成功时调用 on_done(result)
+            on_error: 失败时调用 on_error(exception)，未提供时打印异常
+            owner: 所属控件，控件已销毁时丢弃结果
+            key: 任务键，同key的旧任务被取消，结果即使已返回也不再回调
+
+        Returns:
+            concurrent.futures.Future，可调用cancel()取消
+        """
+        if key is not None:
+            previous = self._keyed.pop(key, None)
+            if previous is not None:
+                previous.cancel()
+        future = self.loop_thread.submit(coro)
+        if key is not None:
+            self._keyed[key] = future
+        future.add_done_callback(lambda f: self._results.put((f, on_done, on_error, owner, key)))
+        self._pending += 1
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._drain)
+        return future
+
+    def _drain(self):
+        while True:
+            try:
+                future, on_done, on_error, owner, key = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if key is not None:
+                if self._keyed.get(key) is not future:
+                    # 已被同key的新任务替换
+                    continue
+                del self._keyed[key]
+            if future.cancelled():
+                continue
+            try:
+                if owner is not None and not owner.winfo_exists():
+                    continue
+                exc = future.exception()
+                if exc is None:
+                    if on_done is not None:
+                        on_done(future.result())
+                elif on_error is not None:
+                    on_error(exc)
+                else:
+                    print(f"异步任务失败: {exc}")
+                    traceback.print_exception(type(exc), exc, exc.__traceback__)
+            except Exception as e:
+                print(f"处理异步任务结果失败: {e}")
+                traceback.print_exc()
+
+        if self._pending > 0:
+            self.root.after(self.poll_interval, self._drain)
+        else:
+            self._polling = False
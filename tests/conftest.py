@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 与test_system.py相同，从仓库根目录导入src包
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test_system.py是手动运行的演示脚本（没有测试函数），导入的src.core.recipe_parser不在仓库中，收集时会中断整个测试，因此不参与pytest收集
+collect_ignore = ['test_system.py']
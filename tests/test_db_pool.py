@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from src.core.db_pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, fail_ping=False):
+        self.closed = False
+        self.rollbacks = 0
+        self.fail_ping = fail_ping
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def ping(self):
+        if self.fail_ping:
+            raise RuntimeError("连接已断开")
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        return object()
+
+
+def make_pool(**options):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+    return ConnectionPool(connect, **options), opened
+
+
+def test_release_rolls_back_and_reuses_connection():
+    pool, opened = make_pool(max_size=2)
+    conn = pool.acquire()
+    raw = conn.raw
+    conn.close()
+    assert raw.rollbacks == 1
+
+    again = pool.acquire()
+    assert again.raw is raw
+    assert len(opened) == 1
+    assert pool.stats()['hits'] == 1
+    again.close()
+
+
+def test_closed_proxy_cannot_be_used():
+    pool, _ = make_pool()
+    conn = pool.acquire()
+    conn.close()
+    with pytest.raises(RuntimeError):
+        conn.cursor()
+    # 重复close不会重复归还
+    conn.close()
+    assert pool.stats()['idle'] == 1
+
+
+def test_acquire_times_out_when_exhausted():
+    pool, _ = make_pool(max_size=1, acquire_timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats['timeouts'] == 1 and stats['in_use'] == 1
+    conn.close()
+
+
+def test_waiter_gets_released_connection():
+    pool, opened = make_pool(max_size=1, acquire_timeout=2)
+    conn = pool.acquire()
+    got = []
+
+    def waiter():
+        other = pool.acquire()
+        got.append(other.raw)
+        other.close()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    conn.close()
+    thread.join(2)
+    assert got == opened
+    assert pool.stats()['waits'] == 1
+
+
+def test_invalidate_closes_connection():
+    pool, opened = make_pool()
+    conn = pool.acquire()
+    conn.invalidate()
+    assert opened[0].closed
+    assert pool.stats()['idle'] == 0 and pool.stats()['in_use'] == 0
+
+
+def test_failed_health_check_replaces_connection():
+    pool, opened = make_pool(health_check_interval=0)
+    conn = pool.acquire()
+    conn.raw.fail_ping = True
+    conn.close()
+
+    fresh = pool.acquire()
+    assert fresh.raw is not opened[0]
+    assert opened[0].closed
+    assert pool.stats()['health_check_failures'] == 1
+    fresh.close()
+
+
+def test_idle_connections_are_evicted():
+    pool, opened = make_pool(idle_timeout=0.01)
+    pool.acquire().close()
+    time.sleep(0.02)
+    assert pool.evict_idle() == 1
+    assert opened[0].closed
+
+
+def test_close_all_rejects_new_acquires():
+    pool, opened = make_pool()
+    conn = pool.acquire()
+    pool.close_all()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    # 关闭后归还的连接直接断开
+    conn.close()
+    assert opened[0].closed
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from src.core.formula_engine import FormulaError, compile_formula, evaluate, evaluate_columns, validate_formula
+
+
+@pytest.mark.parametrize('text', [
+    "__import__('os').system('echo')",
+    "open('x')",
+    "quantity.__class__",
+    "[x for x in range(3)]",
+    "lambda: 1",
+    "_secret + 1",
+    "max(quantity, key=abs)",
+    "None",
+    "",
+])
+def test_rejects_disallowed_syntax(text):
+    with pytest.raises(FormulaError):
+        compile_formula(text)
+    assert validate_formula(text) is not None
+
+
+def test_accepts_whitelisted_functions():
+    assert validate_formula("round(max(price, 1) * quantity / 3, 2)") is None
+    assert evaluate("round(max(price, 1) * quantity / 3, 2)", {'price': 10, 'quantity': 2}) == 6.67
+
+
+def test_evaluate_returns_default_on_error():
+    assert evaluate("price / quantity", {'price': 1, 'quantity': 0}, default=-1) == -1
+    assert evaluate("price +", {'price': 1}, default=-1) == -1
+
+
+COLUMNS = {
+    'price': [10.0, 0.0, -3.5, 7.0, 2.0],
+    'quantity': [3, 0, 2, 5, 0],
+    'fee': [1.0, 2.0, 0.0, 0.5, 3.0],
+}
+
+PARITY_FORMULAS = [
+    "price * quantity - fee",
+    "price / quantity",
+    "(price - fee) // quantity",
+    "price % 3 + quantity ** 2",
+    "abs(price) + min(price, fee, 1) - max(quantity, 2)",
+    "int(price / 3) + float(quantity)",
+    "price if quantity > 2 else fee",
+    "price > 0 and quantity or fee",
+    "not quantity",
+    "0 < price < 8",
+    "-price + +fee",
+]
+
+
+@pytest.mark.parametrize('text', PARITY_FORMULAS)
+def test_vector_matches_scalar(text):
+    """按列求值与逐行求值结果一致，逐行出错（如除以0）的行取default"""
+    size = len(COLUMNS['price'])
+    expected = [
+        evaluate(text, {name: values[i] for name, values in COLUMNS.items()}, default=-1)
+        for i in range(size)
+    ]
+    result = evaluate_columns(text, COLUMNS, default=-1)
+    assert result.shape == (size,)
+    np.testing.assert_allclose(result, np.asarray(expected, dtype=float))
+
+
+def test_evaluate_columns_invalid_formula_returns_default():
+    result = evaluate_columns("__import__('os')", COLUMNS, default=0)
+    assert result.tolist() == [0.0] * len(COLUMNS['price'])
+
+
+def test_evaluate_columns_broadcasts_constants():
+    assert evaluate_columns("2 + 3", COLUMNS).tolist() == [5.0] * len(COLUMNS['price'])
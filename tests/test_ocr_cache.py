@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+# src.utils包初始化时会导入OCR模块
+pytest.importorskip('requests')
+
+from src.utils.ocr_cache import OCRCache, image_key
+
+
+class FakeImage:
+    """提供image_key所需的mode、size和tobytes()"""
+
+    def __init__(self, pixels, mode='L', size=(2, 2)):
+        self.pixels = bytes(pixels)
+        self.mode = mode
+        self.size = size
+
+    def tobytes(self):
+        return self.pixels
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = OCRCache(path=str(tmp_path / 'ocr_cache.sqlite3'))
+    yield cache
+    cache.close()
+
+
+def test_image_key_depends_on_pixels_mode_size_and_namespace():
+    key = image_key(FakeImage([0, 1, 2, 3]))
+    assert key == image_key(FakeImage([0, 1, 2, 3]))
+    assert key != image_key(FakeImage([0, 1, 2, 4]))
+    assert key != image_key(FakeImage([0, 1, 2, 3], mode='P'))
+    assert key != image_key(FakeImage([0, 1, 2, 3], size=(4, 1)))
+    assert key != image_key(FakeImage([0, 1, 2, 3]), namespace='http')
+
+
+def test_get_and_put(cache):
+    assert cache.get('k') is None
+    cache.put('k', '物品 10 200')
+    assert cache.get('k') == '物品 10 200'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores'], stats['entries']) == (1, 1, 1, 1)
+    assert stats['bytes'] == len('物品 10 200'.encode('utf-8'))
+
+
+def test_replacing_entry_updates_size(cache):
+    cache.put('k', 'aaaa')
+    cache.put('k', 'bb')
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['bytes'] == 2
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = OCRCache(path=str(tmp_path / 'ocr_cache.sqlite3'), max_entries=3)
+    try:
+        for key in ('a', 'b', 'c'):
+            cache.put(key, key)
+            time.sleep(0.02)
+        # 读取a使其成为最近使用
+        assert cache.get('a') == 'a'
+        time.sleep(0.02)
+        cache.put('d', 'd')
+        assert cache.get('b') is None
+        assert cache.get('a') == 'a' and cache.get('d') == 'd'
+        assert cache.stats()['evictions'] >= 1
+    finally:
+        cache.close()
+
+
+def test_oversized_text_is_not_stored(tmp_path):
+    cache = OCRCache(path=str(tmp_path / 'ocr_cache.sqlite3'), max_bytes=4)
+    try:
+        cache.put('k', 'too long')
+        assert cache.get('k') is None
+        assert cache.stats()['entries'] == 0
+    finally:
+        cache.close()
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'ocr_cache.sqlite3')
+    first = OCRCache(path=path)
+    first.put('k', 'text')
+    first.close()
+    second = OCRCache(path=path)
+    try:
+        assert second.stats()['entries'] == 1
+        assert second.get('k') == 'text'
+    finally:
+        second.close()
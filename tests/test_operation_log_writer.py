@@ -0,0 +1,176 @@
+import threading
+import time
+
+from src.core.operation_log_writer import OperationLogWriter
+
+
+class Recorder:
+    """记录写入的批次；gate未放行前写入会阻塞，用于让日志在队列中积压，delay模拟较慢的写入"""
+
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.delay = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, rows):
+        self.gate.wait(5)
+        time.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            return "写入失败"
+        self.batches.append(list(rows))
+        return None
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_flush_writes_pending_rows():
+    recorder = Recorder()
+    writer = OperationLogWriter(recorder, batch_size=100, flush_interval=60)
+    for i in range(5):
+        assert writer.submit(i)
+    assert writer.flush(timeout=5)
+    assert recorder.rows == [0, 1, 2, 3, 4]
+    writer.close()
+
+
+def test_batches_are_split_by_batch_size():
+    recorder = Recorder()
+    writer = OperationLogWriter(recorder, batch_size=2, flush_interval=60)
+    for i in range(5):
+        writer.submit(i)
+    writer.flush(timeout=5)
+    assert recorder.rows == list(range(5))
+    assert max(len(batch) for batch in recorder.batches) == 2
+    writer.close()
+
+
+def test_close_writes_remaining_rows_and_stops_thread():
+    recorder = Recorder()
+    writer = OperationLogWriter(recorder, flush_interval=60)
+    for i in range(3):
+        writer.submit(i)
+    assert writer.close(timeout=5)
+    assert recorder.rows == [0, 1, 2]
+    assert not writer._thread.is_alive()
+    # 关闭后不再接受日志
+    assert writer.submit(99) is False
+
+
+def test_close_during_flush_drain_stops_thread():
+    """flush的批量写入过程中到达的停止标记被一并取出时，后台线程也要退出"""
+    recorder = Recorder()
+    writer = OperationLogWriter(recorder, batch_size=1, flush_interval=60)
+    writer.submit('a')
+    writer.flush(timeout=5)
+
+    recorder.gate.clear()
+    writer.submit('b')
+    # 后台线程取出'b'后阻塞在写入中，随后依次排入刷新请求和停止标记
+    wait_for(lambda: writer._queue.qsize() == 0)
+    flushed = []
+    flusher = threading.Thread(target=lambda: flushed.append(writer.flush(timeout=5)))
+    flusher.start()
+    wait_for(lambda: writer._queue.qsize() == 1)
+    closer = threading.Thread(target=lambda: writer.close(timeout=5))
+    closer.start()
+    wait_for(lambda: writer._queue.qsize() == 2)
+    recorder.gate.set()
+    flusher.join(5)
+    closer.join(5)
+
+    assert flushed == [True]
+    assert recorder.rows == ['a', 'b']
+    assert not writer._thread.is_alive()
+
+
+def test_queued_flush_waits_for_drained_rows():
+    """刷新时一并取出的其他刷新请求，要等取出的日志写完才返回"""
+    recorder = Recorder()
+    writer = OperationLogWriter(recorder, batch_size=1, flush_interval=60)
+    writer.submit('a')
+    writer.flush(timeout=5)
+
+    recorder.gate.clear()
+    writer.submit('b')
+    wait_for(lambda: writer._queue.qsize() == 0)
+    results = []
+
+    def flush():
+        results.append((writer.flush(timeout=5), list(recorder.rows)))
+    # 队列依次为：刷新请求、'c'、刷新请求，后两项在处理第一个刷新请求时被一并取出
+    threads = [threading.Thread(target=flush), threading.Thread(target=flush)]
+    threads[0].start()
+    wait_for(lambda: writer._queue.qsize() == 1)
+    writer.submit('c')
+    threads[1].start()
+    wait_for(lambda: writer._queue.qsize() == 3)
+    recorder.delay = 0.1
+    recorder.gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [(True, ['a', 'b', 'c'])] * 2
+    writer.close()
+
+
+def test_failed_batch_is_retried_then_dropped():
+    recorder = Recorder(fail_times=10)
+    writer = OperationLogWriter(recorder, flush_interval=60, max_retries=2)
+    writer.submit('a')
+    writer.flush(timeout=5)
+    stats = writer.stats()
+    assert stats['failures'] == 3
+    assert stats['dropped'] == 1
+    assert recorder.rows == []
+
+    recorder.fail_times = 1
+    writer.submit('b')
+    writer.flush(timeout=5)
+    assert recorder.rows == ['b']
+    assert writer.stats()['written'] == 1
+    writer.close()
+
+
+def test_flush_without_pending_rows_returns_immediately():
+    recorder = Recorder()
+    writer = OperationLogWriter(recorder, flush_interval=60)
+    writer.submit('a')
+    assert writer.flush(timeout=5)
+    assert writer.pending() == 0
+
+    # 没有待写入的日志时不再向后台线程排入刷新请求
+    def fail(item):
+        raise AssertionError("不应排入刷新请求")
+    writer._queue.put = fail
+    assert writer.flush(timeout=5)
+    del writer._queue.put
+    writer.close()
+
+
+def test_drain_retries_with_backoff():
+    times = []
+
+    def write(rows):
+        times.append(time.monotonic())
+        return "写入失败" if len(times) < 3 else None
+    writer = OperationLogWriter(write, flush_interval=60, max_retries=3,
+                                retry_backoff=0.05, max_retry_backoff=0.08)
+    writer.submit('a')
+    assert writer.flush(timeout=5)
+    assert len(times) == 3
+    # 第一次重试等待0.05秒，第二次按指数退避应为0.1秒，但不超过上限0.08秒
+    assert times[1] - times[0] >= 0.05
+    assert times[2] - times[1] >= 0.08
+    assert writer.stats()['written'] == 1
+    assert writer.pending() == 0
+    writer.close()
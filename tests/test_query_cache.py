@@ -0,0 +1,57 @@
+import time
+
+from src.core.query_cache import QueryCache, tables_in_query
+
+
+def test_tables_in_query():
+    query = "SELECT * FROM stock_in s JOIN `item_dict` d ON s.item_name = d.item_name"
+    assert tables_in_query(query) == {'stock_in', 'item_dict'}
+
+
+def test_make_key_normalizes_whitespace():
+    assert QueryCache.make_key("SELECT *\n  FROM inventory", None) == QueryCache.make_key("SELECT * FROM inventory", ())
+
+
+def test_hit_and_miss():
+    cache = QueryCache()
+    key = cache.make_key("SELECT * FROM inventory", ())
+    assert cache.get(key) == (False, None)
+    cache.put(key, ((1,),), {'inventory'})
+    assert cache.get(key) == (True, ((1,),))
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['hit_rate'] == 0.5
+
+
+def test_entries_expire_after_ttl():
+    cache = QueryCache(ttl=0.01)
+    key = cache.make_key("SELECT * FROM inventory", ())
+    cache.put(key, (), {'inventory'})
+    time.sleep(0.02)
+    assert cache.get(key) == (False, None)
+    assert cache.stats()['expired'] == 1
+
+
+def test_invalidate_tables_only_drops_affected_entries():
+    cache = QueryCache()
+    inventory = cache.make_key("SELECT * FROM inventory", ())
+    joined = cache.make_key("SELECT * FROM stock_in JOIN inventory", ())
+    stock_out = cache.make_key("SELECT * FROM stock_out", ())
+    cache.put(inventory, 'a', {'inventory'})
+    cache.put(joined, 'b', {'stock_in', 'inventory'})
+    cache.put(stock_out, 'c', {'stock_out'})
+
+    cache.invalidate_tables('INVENTORY')
+    assert cache.get(inventory)[0] is False
+    assert cache.get(joined)[0] is False
+    assert cache.get(stock_out) == (True, 'c')
+    assert cache.stats()['invalidations'] == 2
+
+
+def test_oldest_entry_evicted_when_full():
+    cache = QueryCache(max_entries=2)
+    keys = [cache.make_key(f"SELECT {i} FROM t", ()) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, i, {'t'})
+    assert cache.get(keys[0])[0] is False
+    assert cache.get(keys[2]) == (True, 2)
+    assert cache.stats()['entries'] == 2
@@ -0,0 +1,125 @@
+import pytest
+
+# src.gui.components包初始化时会导入依赖ttkbootstrap和PIL的预览组件
+pytest.importorskip('ttkbootstrap')
+pytest.importorskip('PIL')
+
+from src.gui.components.row_reconciler import RowReconciler
+
+
+class FakeTree:
+    """只实现RowReconciler用到的Treeview方法，并记录调用"""
+
+    def __init__(self):
+        self.order = []
+        self.items = {}
+        self.calls = []
+
+    def get_children(self, parent=''):
+        return tuple(self.order)
+
+    def insert(self, parent, index, iid, values, tags):
+        self.calls.append(('insert', iid))
+        self.order.insert(index, iid)
+        self.items[iid] = (tuple(values), tuple(tags))
+        return iid
+
+    def delete(self, *iids):
+        self.calls.append(('delete',) + iids)
+        for iid in iids:
+            self.order.remove(iid)
+            del self.items[iid]
+
+    def item(self, iid, values, tags):
+        self.calls.append(('item', iid))
+        self.items[iid] = (tuple(values), tuple(tags))
+
+    def move(self, iid, parent, index):
+        self.calls.append(('move', iid))
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def rows(self):
+        return [(iid,) + self.items[iid] for iid in self.order]
+
+
+def rows(*keys, tags=()):
+    return [(key, (key, f"v{key}"), tags) for key in keys]
+
+
+def test_initial_update_inserts_all_rows():
+    tree = FakeTree()
+    stats = RowReconciler(tree).update(rows(1, 2, 3))
+    assert tree.order == ['1', '2', '3']
+    assert stats['inserted'] == 3 and stats['tk_calls'] == 4
+
+
+def test_unchanged_rows_make_no_tk_calls():
+    tree = FakeTree()
+    reconciler = RowReconciler(tree)
+    reconciler.update(rows(1, 2, 3))
+    tree.calls.clear()
+    stats = reconciler.update(rows(1, 2, 3))
+    assert tree.calls == []
+    assert stats['unchanged'] == 3
+
+
+def test_mixed_changes_match_desired_rows():
+    tree = FakeTree()
+    reconciler = RowReconciler(tree)
+    reconciler.update(rows(1, 2, 3, 4, 5))
+    tree.calls.clear()
+
+    desired = [(5, (5, 'v5'), ()), (1, (1, 'changed'), ('red',)), (3, (3, 'v3'), ()), (6, (6, 'v6'), ())]
+    stats = reconciler.update(desired)
+    assert tree.rows() == [(str(key), tuple(values), tags) for key, values, tags in desired]
+    assert stats['deleted'] == 2 and stats['inserted'] == 1 and stats['updated'] == 1
+    # 删除一次性完成，只移动不在最长有序子序列中的行
+    assert [call for call in tree.calls if call[0] == 'delete'] == [('delete', '2', '4')]
+    assert stats['moved'] == 1
+
+
+def test_reverse_order_keeps_longest_stable_run():
+    tree = FakeTree()
+    reconciler = RowReconciler(tree)
+    reconciler.update(rows(*range(6)))
+    stats = reconciler.update(rows(*reversed(range(6))))
+    assert tree.order == [str(key) for key in reversed(range(6))]
+    assert stats['moved'] == 5
+
+
+def test_duplicate_keys_get_unique_iids():
+    tree = FakeTree()
+    RowReconciler(tree).update(rows(1, 1, 1))
+    assert tree.order == ['1', '1#2', '1#3']
+
+
+def test_forget_rewrites_row():
+    tree = FakeTree()
+    reconciler = RowReconciler(tree)
+    reconciler.update(rows(1, 2))
+    # 外部直接修改了某行后调用forget，下次update重新写入
+    tree.item('1', values=('edited',), tags=())
+    reconciler.forget('1')
+    tree.calls.clear()
+    reconciler.update(rows(1, 2))
+    assert tree.calls == [('item', '1')]
+    assert tree.items['1'] == ((1, 'v1'), ())
+
+
+def test_rows_removed_outside_are_reinserted():
+    tree = FakeTree()
+    reconciler = RowReconciler(tree)
+    reconciler.update(rows(1, 2, 3))
+    tree.delete('2')
+    reconciler.update(rows(1, 2, 3))
+    assert tree.order == ['1', '2', '3']
+
+
+def test_clear_removes_all_rows():
+    tree = FakeTree()
+    reconciler = RowReconciler(tree)
+    reconciler.update(rows(1, 2))
+    reconciler.clear()
+    assert tree.order == []
+    assert reconciler.update(rows(1))['inserted'] == 1
@@ -0,0 +1,188 @@
+import threading
+import time
+
+import pytest
+
+# src.utils包初始化时会导入OCR模块
+pytest.importorskip('requests')
+
+from src.utils.task_scheduler import PRIORITY_HIGH, PRIORITY_LOW, TaskScheduler
+
+
+class FakeRoot:
+    """代替Tk根窗口：after()登记的回调由run_pending()在测试线程中执行"""
+
+    def __init__(self):
+        self._callbacks = {}
+        self._ids = 0
+
+    def after(self, ms, callback):
+        self._ids += 1
+        self._callbacks[self._ids] = callback
+        return self._ids
+
+    def after_cancel(self, after_id):
+        self._callbacks.pop(after_id, None)
+
+    def run_pending(self):
+        callbacks, self._callbacks = self._callbacks, {}
+        for callback in callbacks.values():
+            callback()
+
+
+class FakeOwner:
+    def __init__(self):
+        self.alive = True
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def winfo_exists(self):
+        return self.alive
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+@pytest.fixture
+def scheduler(root):
+    scheduler = TaskScheduler(root, max_workers=1, poll_interval=1)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def run_until(root, predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        root.run_pending()
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_result_delivered_on_main_thread(root, scheduler):
+    results = []
+    scheduler.submit('k', lambda x: x * 2, 21, on_done=results.append)
+    assert run_until(root, lambda: results)
+    assert results == [42]
+    assert not scheduler.is_running('k')
+    assert scheduler.stats()['completed'] == 1
+
+
+def test_error_goes_to_on_error(root, scheduler):
+    errors = []
+
+    def fail():
+        raise ValueError("失败")
+    scheduler.submit('k', fail, on_error=errors.append)
+    assert run_until(root, lambda: errors)
+    assert isinstance(errors[0], ValueError)
+    assert scheduler.stats()['failed'] == 1
+
+
+def test_queued_task_is_deduplicated(root, scheduler):
+    gate = threading.Event()
+    calls = []
+    scheduler.submit('block', gate.wait, 5)
+    first = scheduler.submit('k', calls.append, 1)
+    second = scheduler.submit('k', calls.append, 2)
+    assert second is first
+    gate.set()
+    assert run_until(root, lambda: not scheduler.tasks())
+    assert calls == [1]
+    assert scheduler.stats()['deduplicated'] == 1
+
+
+def test_submit_while_running_reruns_once_with_latest_args(root, scheduler):
+    gate = threading.Event()
+    started = threading.Event()
+    calls = []
+    results = []
+
+    def work(value):
+        calls.append(value)
+        started.set()
+        gate.wait(5)
+        return value
+    scheduler.submit('k', work, 1, on_done=results.append)
+    assert started.wait(5)
+    scheduler.submit('k', work, 2, on_done=results.append)
+    scheduler.submit('k', work, 3, on_done=results.append)
+    gate.set()
+    assert run_until(root, lambda: len(results) == 2)
+    assert calls == [1, 3]
+    assert results == [1, 3]
+    assert scheduler.stats()['coalesced'] == 2
+
+
+def test_cancel_discards_result_and_rerun(root, scheduler):
+    gate = threading.Event()
+    started = threading.Event()
+    calls = []
+    results = []
+
+    def work(value):
+        calls.append(value)
+        started.set()
+        gate.wait(5)
+        return value
+    scheduler.submit('k', work, 1, on_done=results.append)
+    assert started.wait(5)
+    scheduler.submit('k', work, 2, on_done=results.append)
+    scheduler.cancel('k')
+    gate.set()
+    assert run_until(root, lambda: scheduler.stats()['cancelled'] == 1)
+    root.run_pending()
+    assert results == [] and calls == [1]
+
+
+def test_destroyed_owner_discards_result(root, scheduler):
+    owner = FakeOwner()
+    results = []
+    gate = threading.Event()
+    scheduler.submit('k', gate.wait, 5, owner=owner, on_done=results.append)
+    owner.alive = False
+    gate.set()
+    assert run_until(root, lambda: scheduler.stats()['cancelled'] == 1)
+    assert results == []
+
+
+def test_cancel_owner_cancels_tasks_and_timers(root, scheduler):
+    owner = FakeOwner()
+    gate = threading.Event()
+    scheduler.submit('block', gate.wait, 5)
+    task = scheduler.submit('k', lambda: None, owner=owner)
+    scheduler.every('timer', 1000, lambda: None, owner=owner)
+    scheduler.cancel_owner(owner)
+    assert task.cancelled
+    assert not scheduler.has_timer('timer')
+    gate.set()
+
+
+def test_higher_priority_runs_first(root, scheduler):
+    gate = threading.Event()
+    order = []
+    scheduler.submit('block', gate.wait, 5)
+    scheduler.submit('low', order.append, 'low', priority=PRIORITY_LOW)
+    scheduler.submit('high', order.append, 'high', priority=PRIORITY_HIGH)
+    gate.set()
+    assert run_until(root, lambda: len(order) == 2)
+    assert order == ['high', 'low']
+
+
+def test_every_fires_repeatedly_until_stopped(root, scheduler):
+    fired = []
+    scheduler.every('tick', 1000, lambda: fired.append(1), run_now=True)
+    assert fired == [1]
+    root.run_pending()
+    root.run_pending()
+    assert fired == [1, 1, 1]
+    scheduler.stop('tick')
+    root.run_pending()
+    assert fired == [1, 1, 1]
+
+
+def test_closed_scheduler_rejects_tasks(root, scheduler):
+    scheduler.shutdown()
+    assert scheduler.submit('k', lambda: None) is None